@@ -0,0 +1,162 @@
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Sin un límite de disco en MB/s, la referencia es lo que mueve cada trabajo en las primeras mediciones
+DISK_BASELINE_SAMPLES = 3
+# Por debajo de este tráfico el disco no se evalúa (por ejemplo mientras se buscan o analizan videos)
+DISK_MIN_MB_S = 5.0
+# El disco está saturado si cada trabajo mueve menos de esta fracción de la referencia
+DISK_SATURATION_RATIO = 0.5
+
+class AdaptiveController:
+    """
+    Ajusta la cantidad de cortes simultáneos según la carga real de la máquina.
+
+    Cada cierto intervalo mide CPU, iowait, lectura/escritura de disco y memoria disponible.
+    Si la máquina está saturada baja un trabajo, si sobra capacidad sube uno. Para no oscilar,
+    un cambio solo se aplica después de varias mediciones seguidas en la misma dirección y
+    dentro de una banda alrededor del objetivo no se hace nada.
+
+    Sin max_disk_mb_s, el límite del disco se deduce solo: de las primeras DISK_BASELINE_SAMPLES
+    mediciones con tráfico se toma cuánto mueve cada trabajo. Mientras el disco no es el cuello
+    de botella, sumar trabajos suma tráfico; cuando cada trabajo mueve menos de
+    DISK_SATURATION_RATIO de esa referencia, el disco está saturado y se baja un trabajo.
+    """
+
+    def __init__(self, max_jobs: int, min_jobs: int = 1, initial_jobs: Optional[int] = None,
+                 target_cpu: float = 85.0, cpu_band: float = 10.0, max_iowait: float = 20.0,
+                 max_disk_mb_s: Optional[float] = None, min_available_mb: int = 1024,
+                 interval: float = 2.0, samples_to_change: int = 2) -> None:
+        """
+        Args:
+            max_jobs (int): Máximo de trabajos simultáneos (tamaño del pool).
+            min_jobs (int): Mínimo de trabajos simultáneos.
+            initial_jobs (Optional[int]): Trabajos al arrancar; por defecto la mitad del máximo.
+            target_cpu (float): Uso de CPU objetivo, en porcentaje.
+            cpu_band (float): Margen alrededor del objetivo en el que no se cambia nada.
+            max_iowait (float): Porcentaje de iowait a partir del cual el disco está saturado.
+            max_disk_mb_s (Optional[float]): Lectura + escritura máxima en MB/s; None la deduce de
+                las primeras mediciones.
+            min_available_mb (int): Memoria disponible mínima en MB.
+            interval (float): Segundos mínimos entre mediciones.
+            samples_to_change (int): Mediciones seguidas necesarias para subir o bajar.
+        """
+        self.max_jobs = max(max_jobs, 1)
+        self.min_jobs = max(min(min_jobs, self.max_jobs), 1)
+        if initial_jobs is None:
+            initial_jobs = max(self.max_jobs // 2, self.min_jobs)
+        self._limit = min(max(initial_jobs, self.min_jobs), self.max_jobs)
+        self.target_cpu = target_cpu
+        self.cpu_band = cpu_band
+        self.max_iowait = max_iowait
+        self.max_disk_mb_s = max_disk_mb_s
+        self.min_available_mb = min_available_mb
+        self.interval = interval
+        self.samples_to_change = samples_to_change
+
+        self._lock = threading.Lock()
+        self._streak = 0
+        self._last_sample = 0.0
+        self._disk_baseline: Optional[float] = None  # MB/s por trabajo
+        self._baseline_samples: List[float] = []
+        # psutil solo hace falta con la concurrencia adaptativa
+        import psutil
+        self._last_disk = psutil.disk_io_counters()
+        self._last_disk_time = time.monotonic()
+        # La primera llamada a cpu_percent siempre retorna 0, se descarta aquí
+        psutil.cpu_percent(interval=None)
+        psutil.cpu_times_percent(interval=None)
+
+    def sample(self) -> Dict[str, float]:
+        """
+        Mide la carga actual de la máquina desde la medición anterior.
+
+        Returns:
+            Dict[str, float]: 'cpu' e 'iowait' en porcentaje, 'disk_mb_s' y 'available_mb'.
+        """
+        import psutil
+        now = time.monotonic()
+        disk = psutil.disk_io_counters()
+        elapsed = max(now - self._last_disk_time, 1e-6)
+        disk_mb_s = 0.0
+        if disk is not None and self._last_disk is not None:
+            moved = (disk.read_bytes - self._last_disk.read_bytes) + (disk.write_bytes - self._last_disk.write_bytes)
+            disk_mb_s = moved / elapsed / 1024 / 1024
+        self._last_disk, self._last_disk_time = disk, now
+
+        # iowait solo existe en Linux
+        iowait = getattr(psutil.cpu_times_percent(interval=None), 'iowait', 0.0)
+        return {
+            'cpu': psutil.cpu_percent(interval=None),
+            'iowait': iowait,
+            'disk_mb_s': disk_mb_s,
+            'available_mb': psutil.virtual_memory().available / 1024 / 1024,
+        }
+
+    def _disk_state(self, metrics: Dict[str, float]) -> Tuple[bool, bool]:
+        """
+        Decide si el disco está saturado y si tiene margen para un trabajo más.
+
+        Returns:
+            Tuple[bool, bool]: (saturado, con margen).
+        """
+        disk_mb_s = metrics['disk_mb_s']
+        if self.max_disk_mb_s is not None:
+            return disk_mb_s > self.max_disk_mb_s, disk_mb_s < self.max_disk_mb_s * 0.8
+        if disk_mb_s < DISK_MIN_MB_S:
+            return False, True
+        per_job = disk_mb_s / self._limit
+        if self._disk_baseline is None:
+            self._baseline_samples.append(per_job)
+            if len(self._baseline_samples) >= DISK_BASELINE_SAMPLES:
+                self._disk_baseline = max(self._baseline_samples)
+                logging.info(f'Referencia de disco: {self._disk_baseline:.0f} MB/s por trabajo')
+            return False, True
+        return per_job < self._disk_baseline * DISK_SATURATION_RATIO, per_job >= self._disk_baseline * 0.8
+
+    def _direction(self, metrics: Dict[str, float]) -> int:
+        """
+        Decide si hay que bajar (-1), subir (1) o mantener (0) la concurrencia.
+        """
+        disk_saturated, disk_has_room = self._disk_state(metrics)
+        if (metrics['cpu'] > self.target_cpu + self.cpu_band or metrics['iowait'] > self.max_iowait
+                or metrics['available_mb'] < self.min_available_mb or disk_saturated):
+            return -1
+        if (metrics['cpu'] < self.target_cpu - self.cpu_band and metrics['iowait'] < self.max_iowait / 2
+                and metrics['available_mb'] > self.min_available_mb * 2 and disk_has_room):
+            return 1
+        return 0
+
+    def limit(self) -> int:
+        """
+        Retorna la cantidad de trabajos simultáneos permitida, midiendo la carga si ya pasó el intervalo.
+
+        Se puede llamar todas las veces que haga falta: entre mediciones retorna el último valor.
+
+        Returns:
+            int: Trabajos simultáneos permitidos.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_sample < self.interval:
+                return self._limit
+            self._last_sample = now
+
+            metrics = self.sample()
+            direction = self._direction(metrics)
+            if direction == 0 or (self._streak and (direction > 0) != (self._streak > 0)):
+                self._streak = direction
+            else:
+                self._streak += direction
+
+            if abs(self._streak) >= self.samples_to_change:
+                new_limit = min(max(self._limit + direction, self.min_jobs), self.max_jobs)
+                if new_limit != self._limit:
+                    logging.info(f"Concurrencia {self._limit} -> {new_limit} (CPU {metrics['cpu']:.0f}%, "
+                                 f"iowait {metrics['iowait']:.0f}%, disco {metrics['disk_mb_s']:.0f} MB/s, "
+                                 f"memoria libre {metrics['available_mb']:.0f} MB)")
+                    self._limit = new_limit
+                self._streak = 0
+            return self._limit
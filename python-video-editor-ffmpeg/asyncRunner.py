@@ -0,0 +1,227 @@
+import os
+import queue
+import asyncio
+from collections import deque
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+import cutVideo
+from scheduler import IDLE, _Failure
+
+class AsyncJobRunner:
+    """
+    Ejecuta trabajos de corte en hilos y lanza ffmpeg con asyncio.create_subprocess_exec.
+
+    Los trabajos esperan casi todo el tiempo a ffmpeg, así que no hace falta un proceso de
+    Python por trabajo: todos comparten el mismo intérprete y la memoria no crece con la
+    concurrencia. Los procesos ffmpeg quedan a cargo del event loop, que los mata si la
+    ejecución se cancela.
+    """
+
+    def __init__(self, max_concurrency: int, limit: Optional[Callable[[], int]] = None) -> None:
+        """
+        Args:
+            max_concurrency (int): Máximo de trabajos (y por lo tanto de ffmpeg) simultáneos.
+            limit (Optional[Callable[[], int]]): Función que retorna el límite actual, por ejemplo
+                AdaptiveController.limit; nunca se supera max_concurrency.
+        """
+        self.max_concurrency = max(max_concurrency, 1)
+        self.limit = limit
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._main_task: Optional[asyncio.Task] = None
+        self._cancelled = threading.Event()
+
+    async def run_ffmpeg(self, cmd: List[str], on_line: Optional[Callable[[str], None]] = None) -> None:
+        """
+        Ejecuta un comando ffmpeg y espera a que termine.
+
+        Si la tarea se cancela, el proceso se mata y se borra la salida a medio escribir.
+
+        Args:
+            cmd (List[str]): Comando ffmpeg; el último argumento es el archivo de salida.
+            on_line (Optional[Callable[[str], None]]): Si se indica, recibe cada línea de stdout
+                mientras ffmpeg corre (por ejemplo la salida de -progress).
+
+        Raises:
+            subprocess.CalledProcessError: Si ffmpeg termina con error.
+        """
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE if on_line is not None else asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            if on_line is None:
+                _, stderr = await process.communicate()
+            else:
+                # stderr se lee en paralelo para que ffmpeg no se bloquee con el buffer lleno
+                stderr_task = asyncio.ensure_future(process.stderr.read())
+                try:
+                    async for line in process.stdout:
+                        on_line(line.decode('utf-8', 'replace'))
+                    stderr = await stderr_task
+                    await process.wait()
+                finally:
+                    stderr_task.cancel()
+        except asyncio.CancelledError:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            if os.path.exists(cmd[-1]):
+                os.remove(cmd[-1])
+            raise
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+
+    def run_ffmpeg_blocking(self, cmd: List[str], on_line: Optional[Callable[[str], None]] = None) -> None:
+        """
+        Ejecuta un comando ffmpeg desde un hilo de trabajo usando el event loop del ejecutor.
+
+        Se registra con cutVideo.set_runner para que los cortes no usen subprocess.run.
+
+        Args:
+            cmd (List[str]): Comando ffmpeg a ejecutar.
+            on_line (Optional[Callable[[str], None]]): Función para cada línea de stdout.
+        """
+        if self._loop is None or self._cancelled.is_set():
+            raise asyncio.CancelledError()
+        asyncio.run_coroutine_threadsafe(self.run_ffmpeg(cmd, on_line), self._loop).result()
+
+    async def _run(self, func: Callable[[Any], Any], iterable: Iterable[Any],
+                   on_result: Callable[[Any], None], executor: ThreadPoolExecutor,
+                   followups: Optional[Callable[[Any], Iterable[Any]]] = None) -> None:
+        tasks = set()
+        extra = deque()
+
+        async def run_one(args: Any) -> None:
+            try:
+                result = await self._loop.run_in_executor(executor, func, args)
+            except Exception as e:
+                result = _Failure(e)
+            if followups is not None and not isinstance(result, _Failure):
+                extra.extend(followups(result))
+            on_result(result)
+
+        iterator = iter(iterable)
+        exhausted = False
+        try:
+            while True:
+                # Se espera un lugar libre antes de leer el siguiente item, así la cola queda acotada.
+                # Se cuentan las tareas en curso en vez de usar un asyncio.Semaphore porque el
+                # límite puede cambiar durante la ejecución (ver _current_limit)
+                while len(tasks) >= self._current_limit():
+                    # Con un límite dinámico se revisa cada tanto por si sube
+                    await asyncio.wait(tasks, timeout=1.0 if self.limit else None,
+                                       return_when=asyncio.FIRST_COMPLETED)
+                if extra:
+                    args = extra.popleft()
+                elif not exhausted:
+                    # Leer el siguiente item puede bloquear (CSV, copia de entrada), se hace fuera del loop
+                    args = await self._loop.run_in_executor(None, next, iterator, _DONE)
+                    if args is _DONE:
+                        exhausted = True
+                        continue
+                    if args is IDLE:
+                        # La espera de trabajos nuevos ocurrió en el hilo, los resultados siguieron llegando
+                        continue
+                elif tasks:
+                    # Un trabajo en curso todavía puede agregar otros
+                    await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                else:
+                    break
+                task = asyncio.ensure_future(run_one(args))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except asyncio.CancelledError:
+            self._cancelled.set()
+            for task in tasks:
+                task.cancel()
+            # Las tareas de ffmpeg se cancelan y matan su proceso; se espera a que terminen
+            pending = [t for t in asyncio.all_tasks(self._loop) if t is not asyncio.current_task()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            raise
+
+    def _current_limit(self) -> int:
+        if self.limit is None:
+            return self.max_concurrency
+        return min(max(self.limit(), 1), self.max_concurrency)
+
+    def imap_unordered(self, func: Callable[[Any], Any], iterable: Iterable[Any],
+                       followups: Optional[Callable[[Any], Iterable[Any]]] = None) -> Iterator[Any]:
+        """
+        Ejecuta func con cada elemento y entrega los resultados a medida que terminan.
+
+        Tiene la misma forma que scheduler.imap_unordered_bounded para poder alternar entre
+        el pool de procesos y este ejecutor. Si el consumidor deja de iterar (por ejemplo,
+        con Ctrl+C) la ejecución se cancela y se matan los ffmpeg en curso.
+
+        Args:
+            func (Callable[[Any], Any]): Función bloqueante a ejecutar en un hilo.
+            iterable (Iterable[Any]): Argumentos de cada trabajo.
+            followups (Optional[Callable[[Any], Iterable[Any]]]): Trabajos que dependen de un
+                resultado; se ejecutan antes que los siguientes del iterable.
+
+        Yields:
+            Any: Resultado de cada trabajo, en orden de finalización.
+        """
+        results: "queue.Queue[Any]" = queue.Queue()
+        ready = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='corte')
+
+        async def main() -> None:
+            self._loop = asyncio.get_running_loop()
+            self._main_task = asyncio.current_task()
+            ready.set()
+            await self._run(func, iterable, results.put, executor, followups)
+
+        def loop_thread() -> None:
+            try:
+                asyncio.run(main())
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                results.put(_Failure(e))
+            finally:
+                ready.set()
+                results.put(_DONE)
+
+        previous_runner = cutVideo._runner
+        cutVideo.set_runner(self.run_ffmpeg_blocking)
+        thread = threading.Thread(target=loop_thread, name='asyncio-ffmpeg', daemon=True)
+        thread.start()
+        ready.wait()
+        try:
+            while True:
+                result = results.get()
+                if result is _DONE:
+                    break
+                if isinstance(result, _Failure):
+                    raise result.error
+                yield result
+        finally:
+            self.cancel()
+            thread.join()
+            executor.shutdown(wait=True, cancel_futures=True)
+            cutVideo.set_runner(previous_runner)
+
+    def cancel(self) -> None:
+        """
+        Cancela la ejecución en curso. Se puede llamar desde cualquier hilo.
+        """
+        self._cancelled.set()
+        loop, task = self._loop, self._main_task
+        if loop is not None and task is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # El loop ya terminó
+                logging.debug('El event loop ya estaba cerrado al cancelar')
+
+_DONE = object()
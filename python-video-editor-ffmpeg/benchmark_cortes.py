@@ -0,0 +1,448 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import datetime
+import platform
+import statistics
+import tempfile
+import subprocess
+from typing import List, Dict, Any, Callable, Optional, Tuple
+
+import cutVideo
+import cutVideo_original
+import probe
+import segmentCache
+import tracing
+from cutJob import format_ms
+
+# Valores por defecto de la suite: cada combinación de duración, GOP y cantidad de cortes es un caso
+SUITE_DURATIONS = [60, 600]
+SUITE_GOPS = [25, 250]
+SUITE_SEGMENTS = [1, 5, 20]
+# Los videos sintéticos llevan su número de fotograma en binario, en una franja de cuadros
+# blancos y negros arriba a la izquierda; se lee aunque el video se haya recodificado
+FIXTURE_FPS = 25
+MARK_BITS = 16
+MARK_BLOCK = 16
+# Un salto de hasta estos fotogramas no separa dos cortes: la copia del flujo puede dejar
+# algún fotograma B de más al final de un tramo
+RUN_GAP_FRAMES = 5
+
+def generate_fixture(path: str, duration: int, gop: int = 50) -> None:
+    """
+    Genera un video sintético con fuentes lavfi de ffmpeg, con el número de cada fotograma
+    marcado en la imagen (ver read_frame_numbers).
+
+    Args:
+        path (str): Ruta del video a generar.
+        duration (int): Duración del video en segundos.
+        gop (int): Distancia entre fotogramas clave, en fotogramas.
+    """
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'testsrc2=size=640x360:rate={FIXTURE_FPS}:duration={duration}',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:sample_rate=48000:duration={duration}',
+        '-filter_complex',
+        f'color=black:size={MARK_BITS * MARK_BLOCK}x{MARK_BLOCK}:rate={FIXTURE_FPS}:duration={duration},format=gray,'
+        f"geq=lum='255*mod(floor(N/pow(2,floor(X/{MARK_BLOCK}))),2)'[marca];[0:v][marca]overlay=0:0[v]",
+        '-map', '[v]', '-map', '1:a',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-g', str(gop),
+        '-c:a', 'aac', '-shortest',
+        path
+    ], check=True)
+
+def build_cuts(duration: int, segments: int) -> List[Tuple[int, int]]:
+    """
+    Reparte cortes de igual tamaño a lo largo del video, dejando un segundo libre entre ellos.
+
+    Args:
+        duration (int): Duración del video en segundos.
+        segments (int): Cantidad de cortes.
+
+    Returns:
+        List[Tuple[int, int]]: Pares (inicio_ms, fin_ms).
+    """
+    step = duration * 1000 // segments
+    return [(i * step + 1000, (i + 1) * step - 1000) for i in range(segments)]
+
+def fixture_path(fixtures_dir: str, duration: int, gop: int) -> str:
+    """
+    Retorna el video sintético de una duración y GOP, generándolo solo si no existe.
+
+    Args:
+        fixtures_dir (str): Carpeta donde se guardan los videos sintéticos.
+        duration (int): Duración del video en segundos.
+        gop (int): Distancia entre fotogramas clave, en fotogramas.
+
+    Returns:
+        str: Ruta del video.
+    """
+    path = os.path.join(fixtures_dir, f'fuente-{duration}s-gop{gop}-marcas.mp4')
+    if not os.path.exists(path):
+        with cutVideo.atomic_output(path) as tmp_path:
+            generate_fixture(tmp_path, duration, gop)
+    return path
+
+def count_frames(path: str) -> int:
+    """
+    Cuenta los fotogramas del primer flujo de video leyendo los paquetes, sin decodificar.
+
+    Args:
+        path (str): Video a medir.
+
+    Returns:
+        int: Cantidad de fotogramas.
+    """
+    output = subprocess.run([
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0', '-count_packets',
+        '-show_entries', 'stream=nb_read_packets', '-of', 'csv=p=0', path
+    ], capture_output=True, text=True, check=True).stdout
+    return int(output.strip().split(',')[0])
+
+def read_frame_numbers(path: str) -> List[int]:
+    """
+    Lee el número de fotograma del video sintético marcado en cada fotograma de un video.
+
+    Args:
+        path (str): Video cortado a partir de un video de generate_fixture.
+
+    Returns:
+        List[int]: Número de fotograma del original de cada fotograma, en orden de presentación.
+    """
+    output = subprocess.run([
+        'ffmpeg', '-v', 'error', '-i', path, '-map', '0:v:0', '-vsync', 'passthrough',
+        '-vf', f'crop={MARK_BITS * MARK_BLOCK}:{MARK_BLOCK}:0:0,scale={MARK_BITS}:1:flags=area,format=gray',
+        '-f', 'rawvideo', '-'
+    ], capture_output=True, check=True).stdout
+    return [sum(1 << bit for bit, value in enumerate(output[i:i + MARK_BITS]) if value >= 128)
+            for i in range(0, len(output) - MARK_BITS + 1, MARK_BITS)]
+
+def cut_accuracy(frames: List[int], cuts: List[Tuple[int, int]]) -> Dict[str, Any]:
+    """
+    Compara dónde empieza y termina cada corte del video resultante con lo pedido.
+
+    Los tramos se reconocen por los saltos en la numeración de los fotogramas. Un corte que
+    arranca en el fotograma clave anterior tiene error de inicio negativo aunque la duración
+    total sea la correcta.
+
+    Args:
+        frames (List[int]): Números de fotograma del video resultante (read_frame_numbers).
+        cuts (List[Tuple[int, int]]): Cortes pedidos, en milisegundos.
+
+    Returns:
+        Dict[str, Any]: 'tramos_detectados' y, si coinciden con los cortes, el error de inicio
+        de cada corte en ms (negativo si empieza antes) y el mayor error de inicio y de fin.
+        Si los tramos no coinciden (por ejemplo dos cortes que se unieron) los errores son None.
+    """
+    runs = []  # [primer fotograma, último fotograma]
+    for number in frames:
+        if runs and runs[-1][1] < number <= runs[-1][1] + RUN_GAP_FRAMES:
+            runs[-1][1] = number
+        else:
+            runs.append([number, number])
+    result: Dict[str, Any] = {'tramos_detectados': len(runs), 'inicio_error_ms': None,
+                              'inicio_error_ms_max': None, 'fin_error_ms_max': None}
+    if len(runs) != len(cuts):
+        return result
+    frame_ms = 1000 / FIXTURE_FPS
+    # Fotograma en o después de un tiempo: el primero de un corte en su inicio, el siguiente al último en su fin
+    frame_at = lambda ms: -(-ms * FIXTURE_FPS // 1000)
+    starts = [round((first - frame_at(begin)) * frame_ms) for (first, _), (begin, _) in zip(runs, cuts)]
+    ends = [round((last + 1 - frame_at(end)) * frame_ms) for (_, last), (_, end) in zip(runs, cuts)]
+    result.update(inicio_error_ms=starts, inicio_error_ms_max=max(abs(e) for e in starts),
+                  fin_error_ms_max=max(abs(e) for e in ends))
+    return result
+
+def snapped(engine: Callable, info: probe.ProbeInfo) -> Callable:
+    """
+    Ajusta los cortes a los fotogramas clave antes de un motor que copia el flujo, como hace el
+    procesamiento paralelo; así los dos motores por copia cortan lo mismo y se pueden comparar.
+
+    Args:
+        engine (Callable): Función con la firma de cutVideo.cutMultipleVideo.
+        info (probe.ProbeInfo): Información del video de entrada.
+
+    Returns:
+        Callable: Motor con la misma firma.
+    """
+    def run(input_video_path: str, name: str, ext: str, cortes: List[Tuple[int, int]], outdir: str) -> None:
+        engine(input_video_path, name, ext, probe.snap_segments(cortes, info), outdir)
+    return run
+
+def run_engine(engine: Callable, source: str, cuts: List[Tuple[int, int]], workdir: str) -> Dict[str, Any]:
+    """
+    Ejecuta un motor de corte y mide tiempo, bytes escritos y precisión.
+
+    Args:
+        engine (Callable): Función con la firma de cutVideo.cutMultipleVideo.
+        source (str): Video de entrada.
+        cuts (List[Tuple[int, int]]): Cortes a aplicar, en milisegundos.
+        workdir (str): Carpeta de salida vacía para esta ejecución.
+
+    Returns:
+        Dict[str, Any]: Tiempo de pared, tiempo de CPU (de ffmpeg y de este proceso), bytes
+        escritos por todos los ffmpeg (tramos intermedios incluidos), segundos de video por segundo, fotogramas del video resultante, error de
+        duración respecto a la suma de los cortes y error de inicio y fin de cada corte (cut_accuracy).
+    """
+    # Sin caché de tramos: cada repetición corta todos sus tramos
+    cache_root = segmentCache.cache_root()
+    segmentCache.configure(None)
+    # Los tramos se borran después de unirlos: los bytes escritos salen de la medición de cada ffmpeg
+    trace_dir = f'{workdir}-traza'
+    tracing.configure(trace_dir)
+    try:
+        # os.times incluye los procesos hijos terminados, es decir los ffmpeg del motor
+        times_before = os.times()
+        start = time.perf_counter()
+        engine(source, 'bench', 'mp4', cuts, workdir)
+        wall = time.perf_counter() - start
+        times_after = os.times()
+    finally:
+        tracing.configure(None)
+        segmentCache.configure(cache_root)
+    bytes_written = sum(event['args'].get('bytes_out', 0) for event in tracing.load_events(trace_dir))
+    shutil.rmtree(trace_dir, ignore_errors=True)
+    cpu = sum(after - before for after, before in zip(times_after[:4], times_before[:4]))
+    expected_ms = sum(end - begin for begin, end in cuts)
+    output_path = os.path.join(workdir, 'bench.mp4')
+    output_ms = probe.probe_source(output_path, use_cache=False).duration_ms
+    return {
+        'wall_s': round(wall, 3),
+        'cpu_s': round(cpu, 3),
+        'bytes_written': bytes_written,
+        'media_s_per_s': round(expected_ms / 1000 / wall, 1),
+        'fotogramas': count_frames(output_path),
+        'duration_error_ms': abs(output_ms - expected_ms),
+        **cut_accuracy(read_frame_numbers(output_path), cuts),
+    }
+
+class _TracedSubprocess:
+    # Reemplaza al módulo subprocess de cutVideo_original: sus ffmpeg pasan por cutVideo.run_ffmpeg
+    # y quedan medidos como los de los otros motores
+    @staticmethod
+    def run(cmd: List[str], check: bool = True) -> None:
+        cutVideo.run_ffmpeg(cmd)
+
+def cut_original(input_video_path: str, name: str, ext: str, cortes: List[Tuple[int, int]], outdir: str) -> None:
+    # El motor original recibe los tiempos como texto y busca en la salida (-ss después de -i, -to)
+    original_subprocess = cutVideo_original.subprocess
+    cutVideo_original.subprocess = _TracedSubprocess
+    try:
+        cutVideo_original.cutMultipleVideo(input_video_path, name, ext,
+                                           [[format_ms(inicio), format_ms(fin)] for inicio, fin in cortes], outdir)
+    finally:
+        cutVideo_original.subprocess = original_subprocess
+
+def suite_engines(source: str) -> Dict[str, Callable]:
+    """
+    Arma todos los motores y modos de corte para la suite.
+
+    Args:
+        source (str): Video de entrada, para analizarlo en los modos que lo necesitan.
+
+    Returns:
+        Dict[str, Callable]: Nombre -> motor con la firma de cutVideo.cutMultipleVideo.
+    """
+    info = probe.probe_source(source, use_cache=False)
+    return {
+        'original': cut_original,
+        'partes_y_concat': snapped(cutVideo.cutMultipleVideo, info),
+        'una_pasada': snapped(cutVideo.cutMultipleVideoSinglePass, info),
+        cutVideo.MODE_SMART: lambda *args: cutVideo.cutVideoSmart(*args, info),
+        cutVideo.MODE_REENCODE: lambda *args: cutVideo.cutVideoReencode(*args, info),
+    }
+
+def build_engines(compare: str, source: str) -> Dict[str, Callable]:
+    """
+    Arma los motores a comparar.
+
+    Args:
+        compare (str): 'motores' compara los dos motores de corte múltiple por copia, con los
+            cortes ajustados a los fotogramas clave; 'modos' compara copia, corte inteligente y
+            recodificación completa.
+        source (str): Video de entrada, para analizarlo en los modos que lo necesitan.
+
+    Returns:
+        Dict[str, Callable]: Nombre -> motor con la firma de cutVideo.cutMultipleVideo.
+    """
+    info = probe.probe_source(source, use_cache=False)
+    if compare == 'motores':
+        return {
+            'partes_y_concat': snapped(cutVideo.cutMultipleVideo, info),
+            'una_pasada': snapped(cutVideo.cutMultipleVideoSinglePass, info),
+        }
+    return {
+        cutVideo.MODE_COPY: snapped(cutVideo.cutMultipleVideoSinglePass, info),
+        cutVideo.MODE_SMART: lambda *args: cutVideo.cutVideoSmart(*args, info),
+        cutVideo.MODE_REENCODE: lambda *args: cutVideo.cutVideoReencode(*args, info),
+    }
+
+def measure_engine(engine: Callable, source: str, cuts: List[Tuple[int, int]], tmp_root: str,
+                   name: str, repetitions: int) -> Dict[str, Any]:
+    """
+    Ejecuta un motor varias veces, cada una en una carpeta vacía, y resume las mediciones.
+
+    Args:
+        engine (Callable): Función con la firma de cutVideo.cutMultipleVideo.
+        source (str): Video de entrada.
+        cuts (List[Tuple[int, int]]): Cortes a aplicar, en milisegundos.
+        tmp_root (str): Carpeta temporal de la ejecución.
+        name (str): Nombre del motor, para la carpeta de salida.
+        repetitions (int): Repeticiones.
+
+    Returns:
+        Dict[str, Any]: Tiempos mínimo y mediano, CPU, bytes escritos, fotogramas, error de duración
+        y errores de inicio y fin de los cortes.
+    """
+    runs = []
+    for i in range(repetitions):
+        workdir = os.path.join(tmp_root, f'{name}-{i}')
+        os.mkdir(workdir)
+        try:
+            runs.append(run_engine(engine, source, cuts, workdir))
+        finally:
+            shutil.rmtree(workdir)
+    return {
+        'wall_s_min': min(r['wall_s'] for r in runs),
+        'wall_s_mediana': statistics.median(r['wall_s'] for r in runs),
+        'cpu_s_min': min(r['cpu_s'] for r in runs),
+        'media_s_per_s_max': max(r['media_s_per_s'] for r in runs),
+        'bytes_written': runs[0]['bytes_written'],
+        'fotogramas': runs[0]['fotogramas'],
+        'duration_error_ms': runs[0]['duration_error_ms'],
+        'tramos_detectados': runs[0]['tramos_detectados'],
+        'inicio_error_ms_max': runs[0]['inicio_error_ms_max'],
+        'fin_error_ms_max': runs[0]['fin_error_ms_max'],
+        'inicio_error_ms': runs[0]['inicio_error_ms'],
+    }
+
+def ffmpeg_version() -> str:
+    output = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True, check=True).stdout
+    return output.splitlines()[0] if output else ''
+
+def run_suite(args: argparse.Namespace, tmp_root: str) -> Dict[str, Any]:
+    """
+    Ejecuta todos los motores sobre cada combinación de duración, GOP y cantidad de cortes.
+
+    Args:
+        args (argparse.Namespace): Argumentos de la línea de comandos.
+        tmp_root (str): Carpeta temporal de la ejecución.
+
+    Returns:
+        Dict[str, Any]: Entorno de la medición y una fila por caso y motor.
+    """
+    fixtures_dir = args.fixtures or os.path.join(tmp_root, 'fuentes')
+    os.makedirs(fixtures_dir, exist_ok=True)
+    cases = []
+    for duration in args.duraciones:
+        for gop in args.gops:
+            source = fixture_path(fixtures_dir, duration, gop)
+            engines = suite_engines(source)
+            selected = args.motores or list(engines)
+            unknown = [name for name in selected if name not in engines]
+            if unknown:
+                raise ValueError(f'Motores desconocidos: {", ".join(unknown)} (disponibles: {", ".join(engines)})')
+            for segments in args.lista_cortes:
+                cuts = build_cuts(duration, segments)
+                for name in selected:
+                    result = measure_engine(engines[name], source, cuts, tmp_root, name, args.repeticiones)
+                    cases.append({'duracion_s': duration, 'gop': gop, 'cortes': segments, 'motor': name, **result})
+                    print(f'{duration}s gop {gop} {segments} cortes {name}: {result["wall_s_min"]:.2f} s, '
+                          f'error {result["duration_error_ms"]} ms, inicio {result["inicio_error_ms_max"]} ms',
+                          file=sys.stderr)
+    return {
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'ffmpeg': ffmpeg_version(),
+        'python': platform.python_version(),
+        'sistema': platform.platform(),
+        'repeticiones': args.repeticiones,
+        'casos': cases,
+    }
+
+def compare_with_base(report: Dict[str, Any], base_path: str) -> List[Dict[str, Any]]:
+    """
+    Compara el tiempo y el error de cada caso con una medición anterior de la suite.
+
+    Args:
+        report (Dict[str, Any]): Resultado de run_suite.
+        base_path (str): JSON de una ejecución anterior.
+
+    Returns:
+        List[Dict[str, Any]]: Por caso presente en ambas: tiempo relativo (>1 es más lento)
+        y diferencia de error en ms.
+    """
+    with open(base_path, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    key = lambda case: (case['duracion_s'], case['gop'], case['cortes'], case['motor'])
+    base_cases = {key(case): case for case in base.get('casos', [])}
+    comparison = []
+    for case in report['casos']:
+        previous: Optional[Dict[str, Any]] = base_cases.get(key(case))
+        if previous is None:
+            continue
+        comparison.append({
+            'duracion_s': case['duracion_s'], 'gop': case['gop'], 'cortes': case['cortes'], 'motor': case['motor'],
+            'wall_relativo': round(case['wall_s_min'] / previous['wall_s_min'], 3) if previous['wall_s_min'] else None,
+            'error_ms_diferencia': case['duration_error_ms'] - previous['duration_error_ms'],
+        })
+    return comparison
+
+def parse_int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(',') if v.strip()]
+
+def main() -> None:
+    """
+    Compara los motores o los modos de corte sobre videos sintéticos.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark de los motores y modos de corte')
+    parser.add_argument('--comparar', choices=['motores', 'modos', 'suite'], default='motores',
+                        help='motores: partes y concat contra una pasada; modos: copia, inteligente y recodificar; '
+                             'suite: todos los motores sobre varias duraciones, GOP y cantidades de cortes')
+    parser.add_argument('--duracion', type=int, default=600, help='Duración del video sintético en segundos')
+    parser.add_argument('--cortes', type=int, default=10, help='Cantidad de cortes por video')
+    parser.add_argument('--gop', type=int, default=50, help='Fotogramas entre fotogramas clave del video sintético')
+    parser.add_argument('--repeticiones', type=int, default=3, help='Repeticiones por motor')
+    parser.add_argument('--duraciones', type=parse_int_list, default=SUITE_DURATIONS,
+                        help='Suite: duraciones en segundos separadas por coma')
+    parser.add_argument('--gops', type=parse_int_list, default=SUITE_GOPS, help='Suite: GOP separados por coma')
+    parser.add_argument('--lista-cortes', type=parse_int_list, default=SUITE_SEGMENTS,
+                        help='Suite: cantidades de cortes separadas por coma')
+    parser.add_argument('--motores', type=lambda v: v.split(','), default=None,
+                        help='Suite: motores a medir separados por coma (por defecto todos)')
+    parser.add_argument('--fixtures', help='Suite: carpeta donde guardar y reutilizar los videos sintéticos')
+    parser.add_argument('--salida', help='Archivo JSON donde guardar el resultado')
+    parser.add_argument('--base', help='Suite: JSON de una ejecución anterior para comparar')
+    args = parser.parse_args()
+
+    tmp_root = tempfile.mkdtemp(prefix='bench-cortes-')
+    try:
+        if args.comparar == 'suite':
+            report = run_suite(args, tmp_root)
+            if args.base:
+                report['comparacion'] = compare_with_base(report, args.base)
+        else:
+            source = os.path.join(tmp_root, 'fuente.mp4')
+            generate_fixture(source, args.duracion, args.gop)
+            cuts = build_cuts(args.duracion, args.cortes)
+            engines = build_engines(args.comparar, source)
+            results = {name: measure_engine(engine, source, cuts, tmp_root, name, args.repeticiones)
+                       for name, engine in engines.items()}
+            report = {'comparar': args.comparar, 'duracion_s': args.duracion, 'cortes': args.cortes,
+                      'gop': args.gop, 'resultados': results}
+            if args.comparar == 'motores':
+                # Con los mismos cortes ajustados, los dos motores deben dar el mismo video
+                report['fotogramas_iguales'] = len({r['fotogramas'] for r in results.values()}) == 1
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.salida:
+            with open(args.salida, 'w', encoding='utf-8') as f:
+                f.write(output)
+        print(output)
+    finally:
+        shutil.rmtree(tmp_root)
+
+if __name__ == '__main__':
+    main()
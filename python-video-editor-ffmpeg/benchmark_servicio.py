@@ -0,0 +1,191 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import jobService
+
+def _percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(int(round(fraction * (len(values) - 1))), len(values) - 1)]
+
+def submit_many(port: int, count: int, prefix: str) -> List[float]:
+    """
+    Envía pedidos uno tras otro por una conexión persistente y mide la latencia de cada uno.
+
+    Los IDs no tienen video en la carpeta de entrada, así se mide el servicio y no ffmpeg.
+
+    Args:
+        port (int): Puerto del servicio.
+        count (int): Cantidad de pedidos.
+        prefix (str): Prefijo de los IDs, distinto por cliente.
+
+    Returns:
+        List[float]: Latencia de cada pedido en segundos.
+    """
+    conn = http.client.HTTPConnection(jobService.DEFAULT_HOST, port)
+    latencies = []
+    try:
+        for i in range(count):
+            body = json.dumps({'id': f'{prefix}{i}', 'cortes': '00:00:01|00:00:05|00:00:10|00:00:12'})
+            start = time.perf_counter()
+            conn.request('POST', '/trabajos', body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - start)
+            if response.status not in (200, 202):
+                raise RuntimeError(f'El servicio respondió {response.status}')
+    finally:
+        conn.close()
+    return latencies
+
+def measure_submissions(port: int, count: int, clients: int, run: str) -> Dict[str, Any]:
+    """
+    Mide la latencia y los pedidos por segundo con varios clientes a la vez.
+
+    Args:
+        port (int): Puerto del servicio.
+        count (int): Pedidos por cliente.
+        clients (int): Clientes simultáneos.
+        run (str): Prefijo de los IDs de esta medición.
+
+    Returns:
+        Dict[str, Any]: 'clientes', 'pedidos', 'pedidos_por_s', 'p50_ms', 'p95_ms' y 'max_ms'.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        parts = list(pool.map(lambda c: submit_many(port, count, f'{run}-{c}-'), range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for part in parts for latency in part]
+    return {
+        'clientes': clients,
+        'pedidos': len(latencies),
+        'pedidos_por_s': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 0.5) * 1000, 2),
+        'p95_ms': round(_percentile(latencies, 0.95) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2),
+    }
+
+def cold_start_s(repetitions: int) -> float:
+    """
+    Mide lo que tarda un intérprete nuevo en importar el procesamiento paralelo, que es lo que
+    paga cada ejecución sin el servicio antes de cortar el primer video.
+
+    Args:
+        repetitions (int): Repeticiones; se toma la mediana.
+
+    Returns:
+        float: Segundos.
+    """
+    times = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import main_procesamiento_paralelo'], check=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)))
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def first_ffmpeg_s(from_stdin: bool, repetitions: int) -> Optional[float]:
+    """
+    Mide cuánto tarda cli.py con un solo trabajo desde que arranca hasta lanzar el primer ffmpeg o ffprobe.
+
+    En el PATH se antepone un ffmpeg y un ffprobe falsos que solo dejan una marca y fallan, así
+    se mide el arranque sin el corte. Necesita un sistema con /bin/sh.
+
+    Args:
+        from_stdin (bool): Si el trabajo llega por --jobs-from-stdin en vez de un CSV de una fila.
+        repetitions (int): Repeticiones; se toma la mediana.
+
+    Returns:
+        Optional[float]: Segundos, o None si nunca se lanzó ffmpeg.
+    """
+    times = []
+    for _ in range(repetitions):
+        # Carpeta nueva cada vez: sin caché de ffprobe ni manifiesto de una ejecución anterior
+        tmp = tempfile.mkdtemp(prefix='bench-arranque-')
+        try:
+            input_folder, output_folder, bin_dir = (os.path.join(tmp, name) for name in ('entrada', 'salida', 'bin'))
+            for folder in (input_folder, output_folder, bin_dir):
+                os.makedirs(folder)
+            with open(os.path.join(input_folder, '1.mp4'), 'wb') as f:
+                f.write(b'\0' * 1024)
+            mark = os.path.join(tmp, 'primer-ffmpeg')
+            for name in ('ffmpeg', 'ffprobe'):
+                fake = os.path.join(bin_dir, name)
+                with open(fake, 'w') as f:
+                    f.write('#!/bin/sh\n[ -e "$MARCA" ] || : > "$MARCA"\nexit 1\n')
+                os.chmod(fake, 0o755)
+            env = dict(os.environ, PATH=bin_dir + os.pathsep + os.environ.get('PATH', ''), MARCA=mark)
+            cmd = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cli.py'),
+                   '--entrada', input_folder, '--salida', output_folder, '--procesos', '1']
+            job = {'id': '1', 'cortes': '00:00:01|00:00:03'}
+            if from_stdin:
+                cmd.append('--jobs-from-stdin')
+                stdin = json.dumps(job) + '\n'
+            else:
+                csv_path = os.path.join(tmp, 'cortes.csv')
+                with open(csv_path, 'w', encoding='utf-8') as f:
+                    f.write(f'ID,TYPE,CORTES\n{job["id"]},Video,{job["cortes"]}\n')
+                cmd += ['--csv', csv_path]
+                stdin = ''
+            start = time.time()
+            subprocess.run(cmd, input=stdin, text=True, cwd=tmp, env=env, capture_output=True)
+            if os.path.exists(mark):
+                times.append(os.stat(mark).st_mtime - start)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+    return round(statistics.median(times), 3) if times else None
+
+def main() -> None:
+    """
+    Mide la latencia y el rendimiento de envío de trabajos al servicio de cortes, y lo compara con
+    lo que tarda cli.py en lanzar el primer ffmpeg de un solo trabajo.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark de envío de trabajos al servicio de cortes')
+    parser.add_argument('--pedidos', type=int, default=500, help='Pedidos por cliente')
+    parser.add_argument('--clientes', type=lambda v: [int(x) for x in v.split(',')], default=[1, 4, 16],
+                        help='Clientes simultáneos a medir, separados por coma')
+    parser.add_argument('--procesos', type=int, default=2, help='Procesos del pool del servicio')
+    parser.add_argument('--repeticiones', type=int, default=3, help='Repeticiones del arranque en frío')
+    parser.add_argument('--salida', help='Archivo JSON donde guardar el resultado')
+    args = parser.parse_args()
+
+    tmp_root = tempfile.mkdtemp(prefix='bench-servicio-')
+    input_folder = os.path.join(tmp_root, 'entrada')
+    output_folder = os.path.join(tmp_root, 'salida')
+    os.makedirs(input_folder)
+    os.makedirs(output_folder)
+    service = jobService.JobService(input_folder, output_folder, args.procesos)
+    service.start()
+    server = jobService.serve(service, port=0)
+    port = server.server_address[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        results = [measure_submissions(port, args.pedidos, clients, f'c{clients}') for clients in args.clientes]
+        report = {'arranque_en_frio_s': round(cold_start_s(args.repeticiones), 3),
+                  'primer_ffmpeg_csv_s': first_ffmpeg_s(False, args.repeticiones),
+                  'primer_ffmpeg_stdin_s': first_ffmpeg_s(True, args.repeticiones),
+                  'envios': results}
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if args.salida:
+            with open(args.salida, 'w', encoding='utf-8') as f:
+                f.write(output)
+        print(output)
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import os
+import sys
+import logging
+import argparse
+from typing import List, Optional
+
+import cutVideo
+import readCSV
+import schedulingPolicy
+import staging
+import main_procesamiento_paralelo as parallel
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Arma las opciones de la línea de comandos; equivalen a las preguntas de main_procesamiento_paralelo.
+
+    Returns:
+        argparse.ArgumentParser: Parser de la línea de comandos.
+    """
+    parser = argparse.ArgumentParser(description='Corta videos según un CSV o trabajos JSONL, sin preguntas')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help='CSV con las columnas ID, TYPE, CORTES y opcionalmente FUENTE')
+    source.add_argument('--jobs-from-stdin', '--trabajos-stdin', dest='stdin', action='store_true',
+                        help='Lee un trabajo JSON por línea de la entrada estándar: '
+                             '{"id": "123", "cortes": "00:00:21|00:02:30", "fuente": "456"}')
+    parser.add_argument('--entrada', required=True, help='Carpeta de los videos sin editar')
+    parser.add_argument('--salida', required=True, help='Carpeta de los videos editados')
+    parser.add_argument('--procesos', type=int, default=max((os.cpu_count() or 1) - 1, 1),
+                        help='Cortes simultáneos (el máximo con --adaptativo)')
+    parser.add_argument('--adaptativo', action='store_true',
+                        help='Ajusta los cortes simultáneos según la carga de CPU, disco y memoria')
+    parser.add_argument('--ejecutor', choices=[parallel.EXECUTOR_PROCESSES, parallel.EXECUTOR_ASYNCIO],
+                        default=parallel.EXECUTOR_PROCESSES)
+    parser.add_argument('--modo', choices=[cutVideo.MODE_COPY, cutVideo.MODE_SMART, cutVideo.MODE_REENCODE],
+                        default=cutVideo.MODE_COPY, help='Modo de corte')
+    parser.add_argument('--orden', default=schedulingPolicy.POLICY_CSV,
+                        choices=[schedulingPolicy.POLICY_CSV, schedulingPolicy.POLICY_LONGEST_FIRST,
+                                 schedulingPolicy.POLICY_SHORTEST_FIRST],
+                        help='Orden de procesamiento; csv empieza a cortar mientras lee los trabajos')
+    parser.add_argument('--abanico', action='store_true',
+                        help='Corta en una sola lectura los IDs que comparten video de entrada')
+    parser.add_argument('--tramos', action='store_true', help='Corta en paralelo los tramos de los videos largos')
+    parser.add_argument('--copia-local', default='', help='Carpeta local donde copiar los videos antes de cortarlos')
+    parser.add_argument('--copia-gb', type=float, default=staging.DEFAULT_BUDGET_GB,
+                        help='Espacio máximo para las copias locales en GB')
+    parser.add_argument('--compartida', default='',
+                        help='Carpeta compartida para repartir los trabajos de un CSV entre varias máquinas')
+    parser.add_argument('--esperar', action='store_true',
+                        help='Espera los videos que todavía no llegaron a la carpeta de entrada; sigue '
+                             'vigilándola hasta Ctrl+C y vuelve a cortar un ID si llega otra versión de su video')
+    parser.add_argument('--hasta-completar', '--until-complete', dest='hasta_completar', action='store_true',
+                        help='Con --esperar, termina apenas llegaron todos los videos del CSV')
+    parser.add_argument('--diferencias', action='store_true', help='Procesa solo las filas nuevas o con cambios')
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Corta los videos con las opciones de la línea de comandos, para usar desde cron u otros scripts.
+
+    Args:
+        argv (Optional[List[str]]): Argumentos; por defecto los de sys.argv.
+
+    Returns:
+        int: 0 si se editaron todos los videos, 1 si alguno falló o la ejecución se interrumpió.
+    """
+    args = build_parser().parse_args(argv)
+    if args.csv and not os.path.isfile(args.csv):
+        logging.error(f'El archivo CSV {args.csv} no existe')
+        return 1
+    folders = [(args.entrada, 'El directorio de entrada'), (args.salida, 'El directorio de salida')]
+    if args.compartida:
+        folders.append((args.compartida, 'El directorio compartido'))
+    if not all(parallel.verify_directory(folder, message) for folder, message in folders):
+        return 1
+
+    jobs = readCSV.iterJobsJSONL(sys.stdin) if args.stdin else readCSV.iterDataCSV(args.csv)
+    totals = parallel.run(jobs, args.entrada, args.salida, max(args.procesos, 1), args.adaptativo, args.ejecutor,
+                          args.modo, args.orden, args.abanico, args.tramos, args.copia_local, args.copia_gb,
+                          args.compartida, args.esperar, args.diferencias, args.csv, args.hasta_completar)
+    if totals is None:
+        return 1
+    successful_edits, processed = totals
+    return 0 if successful_edits == processed else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
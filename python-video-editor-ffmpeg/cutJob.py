@@ -0,0 +1,278 @@
+import math
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+SEPARATOR = '|'
+# Dos segmentos separados por menos de esta distancia se unen en uno solo
+MERGE_TOLERANCE_MS = 0
+# Tiempo máximo aceptado en un corte (1000 horas); uno mayor es un error de carga del CSV
+MAX_TIMESTAMP_MS = 1000 * 3600 * 1000
+
+PLAN_COPY = 'copia'
+PLAN_SINGLE = 'simple'
+PLAN_MULTIPLE = 'multiple'
+
+def parse_timestamp(value: str) -> int:
+    """
+    Convierte un tiempo 'HH:MM:SS', 'MM:SS' o 'SS' (con fracción opcional) a milisegundos.
+
+    Args:
+        value (str): Tiempo a convertir, por ejemplo '00:01:08' o '00:01:08.250'.
+
+    Returns:
+        int: Tiempo en milisegundos.
+
+    Raises:
+        ValueError: Si el tiempo no tiene un formato válido, no es finito o pasa de MAX_TIMESTAMP_MS.
+    """
+    parts = value.strip().split(':')
+    if not 1 <= len(parts) <= 3 or any(not p for p in parts):
+        raise ValueError(f'Tiempo inválido: {value!r}')
+    try:
+        seconds = float(parts[-1])
+        minutes = int(parts[-2]) if len(parts) >= 2 else 0
+        hours = int(parts[-3]) if len(parts) == 3 else 0
+    except ValueError:
+        raise ValueError(f'Tiempo inválido: {value!r}') from None
+    if hours < 0 or minutes < 0 or seconds < 0 or (len(parts) >= 2 and (minutes >= 60 or seconds >= 60)):
+        raise ValueError(f'Tiempo inválido: {value!r}')
+    # 'inf', 'nan' o un número enorme harían fallar round o el array de segmentos
+    if not math.isfinite(seconds) or hours * 3600 + minutes * 60 + seconds > MAX_TIMESTAMP_MS / 1000:
+        raise ValueError(f'Tiempo fuera de rango: {value!r}')
+    return (hours * 3600 + minutes * 60) * 1000 + round(seconds * 1000)
+
+def format_ms(ms: int) -> str:
+    """
+    Convierte milisegundos al formato 'HH:MM:SS.mmm' que entiende ffmpeg.
+
+    Args:
+        ms (int): Tiempo en milisegundos.
+
+    Returns:
+        str: Tiempo formateado.
+    """
+    seconds, millis = divmod(ms, 1000)
+    return f'{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}.{millis:03d}'
+
+class CutJob:
+    """
+    Trabajo de corte de un video: su ID, los segmentos (inicio, fin) en milisegundos y,
+    opcionalmente, el ID del video de entrada si no es el mismo que el de salida.
+
+    Los segmentos se guardan aplanados en un array de enteros de 64 bits, así cada trabajo
+    ocupa poca memoria y se envía a los procesos del pool como unos pocos bytes.
+    """
+    __slots__ = ('id', 'segments', 'source')
+
+    def __init__(self, id: str, segments: Sequence[Tuple[int, int]], source: Optional[str] = None) -> None:
+        """
+        Args:
+            id (str): ID del recurso, que también es el nombre del video de salida.
+            segments (Sequence[Tuple[int, int]]): Pares (inicio_ms, fin_ms).
+            source (Optional[str]): ID del video de entrada; None si es el mismo ID.
+
+        Raises:
+            ValueError: Si algún segmento termina antes de empezar.
+        """
+        flat = array('q')
+        for start, end in segments:
+            if start < 0 or end < start:
+                raise ValueError(f'Corte inválido para el ID {id}: {format_ms(start)} - {format_ms(end)}')
+            flat.append(start)
+            flat.append(end)
+        self.id = id
+        self.segments = flat
+        self.source = source if source != id else None
+
+    @classmethod
+    def from_cortes(cls, id: str, cortes: str, source: Optional[str] = None) -> 'CutJob':
+        """
+        Crea un trabajo a partir del texto de la columna CORTES del CSV.
+
+        Args:
+            id (str): ID del recurso.
+            cortes (str): Tiempos separados por '|', siempre en pares inicio|fin.
+            source (Optional[str]): ID del video de entrada, si no es el mismo ID.
+
+        Returns:
+            CutJob: Trabajo validado.
+
+        Raises:
+            ValueError: Si la cantidad de tiempos es impar o algún tiempo es inválido.
+        """
+        return cls.from_values(id, cortes.split(SEPARATOR), source)
+
+    @classmethod
+    def from_values(cls, id: str, values: Sequence[str], source: Optional[str] = None) -> 'CutJob':
+        """
+        Crea un trabajo a partir de la lista de tiempos ya separada.
+
+        Args:
+            id (str): ID del recurso.
+            values (Sequence[str]): Tiempos en orden inicio, fin, inicio, fin...
+            source (Optional[str]): ID del video de entrada, si no es el mismo ID.
+
+        Returns:
+            CutJob: Trabajo validado.
+
+        Raises:
+            ValueError: Si la cantidad de tiempos es impar o algún tiempo es inválido.
+        """
+        if len(values) % 2 != 0:
+            raise ValueError(f'Cantidad impar de tiempos para el ID {id}: {SEPARATOR.join(values)!r}')
+        ms = [parse_timestamp(v) for v in values]
+        return cls(id, list(zip(ms[0::2], ms[1::2])), source)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CutJob':
+        """
+        Crea un trabajo a partir de un objeto JSON, como los pedidos del servicio o las líneas
+        de --jobs-from-stdin.
+
+        Args:
+            data (Dict[str, Any]): 'id', 'cortes' (texto con '|' como en el CSV o lista de tiempos)
+                y opcionalmente 'fuente'.
+
+        Returns:
+            CutJob: Trabajo validado.
+
+        Raises:
+            ValueError: Si faltan 'id' o 'cortes', o los tiempos son inválidos.
+        """
+        if not isinstance(data, dict) or 'id' not in data or 'cortes' not in data:
+            raise ValueError(f'El trabajo debe ser un objeto con "id" y "cortes": {data!r}')
+        id, cortes, source = str(data['id']), data['cortes'], data.get('fuente')
+        if isinstance(cortes, str):
+            values = cortes.split(SEPARATOR)
+        elif isinstance(cortes, list):
+            values = [str(v) for v in cortes]
+        else:
+            raise ValueError(f'Los cortes del ID {id} deben ser texto o una lista de tiempos')
+        return cls.from_values(id, values, str(source) if source else None)
+
+    def __reduce__(self):
+        # El array se serializa como un solo bloque de bytes
+        return (_rebuild, (self.id, self.segments, self.source))
+
+    def __len__(self) -> int:
+        return len(self.segments) // 2
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        segments = self.segments
+        for i in range(0, len(segments), 2):
+            yield segments[i], segments[i + 1]
+
+    def __eq__(self, other: object) -> bool:
+        return (isinstance(other, CutJob) and self.id == other.id and self.segments == other.segments
+                and self.source == other.source)
+
+    def __repr__(self) -> str:
+        cortes = SEPARATOR.join(f'{format_ms(s)}{SEPARATOR}{format_ms(e)}' for s, e in self)
+        if self.source is not None:
+            return f'CutJob({self.id!r}, {cortes!r}, source={self.source!r})'
+        return f'CutJob({self.id!r}, {cortes!r})'
+
+    @property
+    def source_id(self) -> str:
+        """
+        str: ID del video de entrada.
+        """
+        return self.source if self.source is not None else self.id
+
+    @property
+    def is_single(self) -> bool:
+        """
+        bool: True si el trabajo tiene un solo segmento.
+        """
+        return len(self.segments) == 2
+
+    @property
+    def duration_ms(self) -> int:
+        """
+        int: Duración total del video editado en milisegundos.
+        """
+        segments = self.segments
+        return sum(segments[i + 1] - segments[i] for i in range(0, len(segments), 2))
+
+    def normalized(self, tolerance_ms: int = MERGE_TOLERANCE_MS) -> 'CutJob':
+        """
+        Retorna el trabajo con sus segmentos normalizados (ver normalize_segments).
+
+        Args:
+            tolerance_ms (int): Distancia máxima entre dos segmentos para unirlos.
+
+        Returns:
+            CutJob: Trabajo normalizado; el mismo objeto si no hubo cambios.
+        """
+        pairs = self.pairs()
+        merged = normalize_segments(pairs, tolerance_ms)
+        if merged == pairs:
+            return self
+        return self.with_segments(merged)
+
+    def with_segments(self, segments: Sequence[Tuple[int, int]]) -> 'CutJob':
+        """
+        Retorna un trabajo con el mismo ID y video de entrada pero otros segmentos.
+
+        Args:
+            segments (Sequence[Tuple[int, int]]): Pares (inicio_ms, fin_ms).
+
+        Returns:
+            CutJob: Trabajo nuevo.
+        """
+        return CutJob(self.id, segments, self.source)
+
+    def pairs(self) -> List[Tuple[int, int]]:
+        """
+        Returns:
+            List[Tuple[int, int]]: Segmentos (inicio_ms, fin_ms) del trabajo.
+        """
+        return list(self)
+
+def normalize_segments(segments: Sequence[Tuple[int, int]],
+                       tolerance_ms: int = MERGE_TOLERANCE_MS) -> List[Tuple[int, int]]:
+    """
+    Ordena los segmentos, une los que se tocan o se solapan y descarta los vacíos.
+
+    Args:
+        segments (Sequence[Tuple[int, int]]): Pares (inicio_ms, fin_ms).
+        tolerance_ms (int): Distancia máxima entre dos segmentos para unirlos.
+
+    Returns:
+        List[Tuple[int, int]]: Segmentos normalizados, ordenados y sin solapamientos.
+    """
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(s for s in segments if s[1] > s[0]):
+        if merged and start - merged[-1][1] <= tolerance_ms:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def plan_cut(job: CutJob, source_duration_ms: Optional[int] = None) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Decide cómo cortar un trabajo ya normalizado.
+
+    Args:
+        job (CutJob): Trabajo a cortar.
+        source_duration_ms (Optional[int]): Duración del video de entrada, si se conoce.
+
+    Returns:
+        Tuple[str, List[Tuple[int, int]]]: PLAN_COPY si el corte cubre todo el video,
+        PLAN_SINGLE o PLAN_MULTIPLE según la cantidad de segmentos, junto con los segmentos.
+    """
+    pairs = job.pairs()
+    if len(pairs) == 1:
+        start, end = pairs[0]
+        if source_duration_ms is not None and start == 0 and end >= source_duration_ms:
+            return PLAN_COPY, pairs
+        return PLAN_SINGLE, pairs
+    return PLAN_MULTIPLE, pairs
+
+def _rebuild(id: str, segments: array, source: Optional[str] = None) -> CutJob:
+    job = CutJob.__new__(CutJob)
+    job.id = id
+    job.segments = segments
+    job.source = source
+    return job
@@ -1,64 +1,392 @@
 import subprocess
 import os
+import socket
+import shutil
+import hashlib
+import tempfile
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Iterator, Optional, Sequence, Tuple
+from cutJob import format_ms, parse_timestamp
+from probe import US_PER_MS, ProbeInfo, keyframe_after, probe_source, seek_ms, snap_segments
+import segmentCache
+import tracing
+import progress
 
-def cutMultipleVideo(input_video_path: str, name: str, ext: str, cortes: list[list[str]], outdir: str):
+# Modos de corte
+MODE_COPY = 'copia'                # Copia del flujo, rápido pero arranca en el fotograma clave anterior
+MODE_SMART = 'inteligente'         # Recodifica solo el tramo hasta el primer fotograma clave
+MODE_REENCODE = 'recodificar'      # Recodifica todo, exacto pero lento
+
+# Codificador equivalente a cada códec de entrada para el modo inteligente
+ENCODERS = {'h264': 'libx264', 'hevc': 'libx265', 'mpeg4': 'mpeg4', 'vp9': 'libvpx-vp9', 'aac': 'aac', 'mp3': 'libmp3lame', 'opus': 'libopus'}
+REENCODE_CRF = '18'
+REENCODE_PRESET = 'veryfast'
+# Perfiles H.264 como los reporta ffprobe y el valor que acepta libx264 en -profile:v
+X264_PROFILES = {'constrained baseline': 'baseline', 'baseline': 'baseline', 'main': 'main',
+                 'high': 'high', 'high 10': 'high10', 'high 10 intra': 'high10', 'high 4:2:2': 'high422',
+                 'high 4:2:2 intra': 'high422', 'high 4:4:4 predictive': 'high444', 'high 4:4:4 intra': 'high444'}
+# Tramos del corte en abanico; la búsqueda es de salida (-ss después de -i), por eso tienen su propia clave en la caché
+FAN_OUT_ARGS = ['-c', 'copy', '-avoid_negative_ts', '1']
+FAN_OUT_CACHE_MODE = 'ss-salida'
+
+# Ejecutor de comandos ffmpeg; None usa subprocess.run en el proceso actual. Recibe el comando
+# y, opcionalmente, una función que se llama con cada línea de stdout
+_runner: Optional[Callable[..., None]] = None
+
+def set_runner(runner: Optional[Callable[..., None]]):
+    global _runner
+    _runner = runner
+
+def run_ffmpeg(cmd: list[str], stage: str = tracing.STAGE_CUT, media_s: Optional[float] = None,
+               bytes_in: Optional[int] = None, outputs: Optional[Sequence[str]] = None):
+    # Con la medición activa se registra la etapa, los segundos de video (suma de los -t si no
+    # se indican) y los bytes escritos en las salidas (por defecto el último argumento)
+    trace = {}
+    if tracing.enabled():
+        if media_s is None:
+            media_s = sum(parse_timestamp(cmd[i + 1]) for i, arg in enumerate(cmd[:-1]) if arg == '-t') / 1000 or None
+        trace = {'media_s': media_s, 'bytes_in': bytes_in}
+    with tracing.span(stage, **trace) as data:
+        if progress.enabled():
+            _run_with_progress(progress.with_progress(cmd), stage != tracing.STAGE_CONCAT)
+        elif _runner is not None:
+            _runner(cmd)
+        else:
+            subprocess.run(cmd, check=True)
+        if tracing.enabled():
+            data['bytes_out'] = sum(tracing.file_size(path) or 0 for path in (outputs or [cmd[-1]]))
+
+def _run_with_progress(cmd: list[str], count_media: bool):
+    # El avance llega por stdout mientras ffmpeg corre; la unión de tramos no vuelve a contar su duración
+    parser = progress.ProgressParser(count_media)
+    if _runner is not None:
+        _runner(cmd, parser.feed_and_report)
+        return
+    with subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, text=True) as process:
+        for line in process.stdout:
+            parser.feed_and_report(line)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd)
+
+@contextmanager
+def atomic_output(final_path: str) -> Iterator[str]:
+    # ffmpeg escribe en un temporal con la misma extensión y solo si termina bien se renombra,
+    # así un archivo con el nombre final nunca está a medio escribir. El temporal lleva la máquina
+    # y el proceso: si vence un préstamo (ver jobLeases) dos nodos pueden cortar el mismo ID a la vez
+    base, ext = os.path.splitext(final_path)
+    tmp_path = f'{base}.parcial-{socket.gethostname()}-{os.getpid()}{ext}'
+    try:
+        yield tmp_path
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def source_key(input_video_path: str) -> str:
+    # Identifica el video de entrada por ruta, tamaño y mtime para no reutilizar tramos de otro archivo
+    stat = os.stat(input_video_path)
+    key = f'{os.path.abspath(input_video_path)}|{stat.st_size}|{stat.st_mtime_ns}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+
+def cut_piece(input_video_path: str, piece: str, inicio: int, fin: int, codec_args: list[str]):
+    # Los tramos terminados se reutilizan si la ejecución anterior se interrumpió
+    if os.path.exists(piece):
+        return
+    # Un tramo igual de otra ejecución o de otro ID sale de la caché sin lanzar ffmpeg
+    if segmentCache.fetch(input_video_path, inicio, fin, codec_args, piece):
+        return
+    with atomic_output(piece) as tmp_piece:
+        run_ffmpeg([
+            'ffmpeg', '-y',
+            '-ss', format_ms(inicio),
+            '-i', input_video_path,
+            '-t', format_ms(fin - inicio),
+            *codec_args,
+            tmp_piece
+        ])
+    segmentCache.store(input_video_path, inicio, fin, codec_args, piece)
+
+def cutMultipleVideo(input_video_path: str, name: str, ext: str, cortes: Sequence[Tuple[int, int]], outdir: str):
     file_dir = os.path.join(outdir, name)
     file_txt = os.path.join(file_dir, 'files.txt')
+    key = source_key(input_video_path)
 
     if not os.path.exists(file_dir):
         os.mkdir(file_dir)
-    if os.path.exists(file_txt):
-        os.remove(file_txt)
 
-    with open(file_txt, mode='a+', encoding='utf-8') as filetxt:
+    with open(file_txt, mode='w', encoding='utf-8') as filetxt:
         filetxt.write('# primer línea\n')
         
-        for index, corte in enumerate(cortes):
-            inicio = corte[0]
-            fin = corte[1]
-            filename = f'{name}part{index}.{ext}'
+        for inicio, fin in cortes:
+            # El nombre del tramo depende del video y de sus tiempos, no de su posición
+            filename = f'{name}part-{key}-{inicio}-{fin}.{ext}'
             filedir = os.path.join(file_dir, filename)
 
-            # Paso 1: Corte preciso
-            subprocess.run([
-                'ffmpeg',
-                '-ss', inicio,
-                '-i', input_video_path,
-                '-t', f'{fin}',
-                '-c', 'copy',
-                '-map', '0',
-                '-avoid_negative_ts', '1',
-                filedir
-            ], check=True)
+            # Paso 1: Corte preciso, -t es la duración del corte y no el tiempo final
+            cut_piece(input_video_path, filedir, inicio, fin,
+                       ['-c', 'copy', '-map', '0', '-avoid_negative_ts', '1'])
 
             filetxt.write(f"file '{filedir}'\n")
 
     out_filename = os.path.join(outdir, f'{name}.mp4')
     
     # Concatenación simple
-    subprocess.run([
-        'ffmpeg',
-        '-f', 'concat',
-        '-safe', '0',
-        '-i', file_txt,
-        '-c', 'copy',
-        out_filename
-    ], check=True)
-
-def cutSingleVideo(input_video_path: str, name: str, ext: str, cortes: list[str], outdir: str):
-    inicio = cortes[0]
-    fin = cortes[1]
+    with atomic_output(out_filename) as tmp_filename:
+        run_ffmpeg([
+            'ffmpeg', '-y',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', file_txt,
+            '-c', 'copy',
+            tmp_filename
+        ], tracing.STAGE_CONCAT)
+    shutil.rmtree(file_dir, ignore_errors=True)
+
+def cutSingleVideo(input_video_path: str, name: str, ext: str, cortes: Tuple[int, int], outdir: str):
+    inicio, fin = cortes
     filename = f'{name}.{ext}'
     filedir = os.path.join(outdir, filename)
 
     # Corte simple optimizado
-    subprocess.run([
-        'ffmpeg',
-        '-ss', inicio,
-        '-i', input_video_path,
-        '-t', f'{fin}',
-        '-c', 'copy',
-        '-map', '0',
-        '-avoid_negative_ts', '1',
-        filedir
-    ], check=True)
\ No newline at end of file
+    with atomic_output(filedir) as tmp_filedir:
+        run_ffmpeg([
+            'ffmpeg', '-y',
+            '-ss', format_ms(inicio),
+            '-i', input_video_path,
+            '-t', format_ms(fin - inicio),
+            '-c', 'copy',
+            '-map', '0',
+            '-avoid_negative_ts', '1',
+            tmp_filedir
+        ])
+
+def _concat_quote(path: str) -> str:
+    # El demuxer concat usa comillas simples, una comilla dentro de la ruta se escapa como '\''
+    return "'" + path.replace("'", "'\\''") + "'"
+
+def snap_to_keyframes(input_video_path: str, cortes: Sequence[Tuple[int, int]]) -> list[Tuple[int, int]]:
+    # Ajusta los inicios a los fotogramas clave antes de cortar copiando el flujo (probe.snap_segments).
+    # Si ffprobe no puede analizar el video se corta con los tiempos pedidos
+    try:
+        info = probe_source(input_video_path)
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return list(cortes)
+    snapped = snap_segments(cortes, info)
+    if not snapped:
+        raise ValueError('cortes fuera de la duración del video')
+    return snapped
+
+def cutMultipleVideoSinglePass(input_video_path: str, name: str, ext: str, cortes: Sequence[Tuple[int, int]], outdir: str):
+    # Con los inicios en fotogramas clave (snap_to_keyframes) el resultado es el mismo que el de
+    # cutMultipleVideo. Sin ajustar no lo es: cada tramo de cutMultipleVideo arranca en el fotograma
+    # clave anterior a su inicio y dura lo pedido desde ahí, mientras que el demuxer concat descarta
+    # lo anterior al inpoint y cada tramo dura justo fin - inicio
+    out_filename = os.path.join(outdir, f'{name}.{ext}')
+    source = os.path.abspath(input_video_path)
+
+    # Guion del demuxer concat que apunta directo al video original con inpoint/outpoint,
+    # así se obtiene el video final en una sola ejecución de ffmpeg sin archivos partN
+    fd, script_path = tempfile.mkstemp(prefix=f'{name}-', suffix='.ffconcat')
+    try:
+        with os.fdopen(fd, mode='w', encoding='utf-8') as script:
+            script.write('ffconcat version 1.0\n')
+            for inicio, fin in cortes:
+                script.write(f'file {_concat_quote(source)}\n')
+                script.write(f'inpoint {format_ms(inicio)}\n')
+                script.write(f'outpoint {format_ms(fin)}\n')
+
+        with atomic_output(out_filename) as tmp_filename:
+            run_ffmpeg([
+                'ffmpeg', '-y',
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', script_path,
+                '-c', 'copy',
+                '-map', '0',
+                '-avoid_negative_ts', '1',
+                tmp_filename
+            ], media_s=sum(fin - inicio for inicio, fin in cortes) / 1000)
+    finally:
+        os.remove(script_path)
+
+def _concat_pieces(pieces: Sequence[str], file_txt: str, out_filename: str):
+    with open(file_txt, mode='w', encoding='utf-8') as filetxt:
+        for piece in pieces:
+            filetxt.write(f'file {_concat_quote(os.path.abspath(piece))}\n')
+    with atomic_output(out_filename) as tmp_filename:
+        run_ffmpeg([
+            'ffmpeg', '-y',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', file_txt,
+            '-c', 'copy',
+            tmp_filename
+        ], tracing.STAGE_CONCAT, bytes_in=sum(tracing.file_size(piece) or 0 for piece in pieces))
+
+def cutFanOut(input_video_path: str, ext: str, jobs: Sequence[Tuple[str, Sequence[Tuple[int, int]]]], outdir: str):
+    # Varios IDs que cortan el mismo video: un solo ffmpeg lee la entrada una vez y escribe
+    # cada tramo como una salida distinta. Los IDs de un tramo quedan listos directamente,
+    # los de varios tramos se unen después con el concat, que solo lee los tramos ya cortados.
+    # Copia el flujo, así que los inicios deben estar en fotogramas clave, redondeados para la
+    # búsqueda de salida (probe.snap_segments con output_seek)
+    key = source_key(input_video_path)
+    outputs = []  # (archivo final, inicio, fin)
+    concats = []  # (nombre, carpeta de tramos, tramos)
+
+    for name, cortes in jobs:
+        if len(cortes) == 1:
+            inicio, fin = cortes[0]
+            outputs.append((os.path.join(outdir, f'{name}.{ext}'), inicio, fin))
+            continue
+        file_dir = os.path.join(outdir, name)
+        os.makedirs(file_dir, exist_ok=True)
+        pieces = []
+        for inicio, fin in cortes:
+            piece = os.path.join(file_dir, f'{name}part-{key}-{inicio}-{fin}.{ext}')
+            # Los tramos terminados se reutilizan si la ejecución anterior se interrumpió o están en la caché
+            if not os.path.exists(piece) and not segmentCache.fetch(input_video_path, inicio, fin, FAN_OUT_ARGS,
+                                                                    piece, FAN_OUT_CACHE_MODE):
+                outputs.append((piece, inicio, fin))
+            pieces.append(piece)
+        concats.append((name, file_dir, pieces))
+
+    if outputs:
+        with ExitStack() as stack:
+            # La entrada se lee solo hasta el último tramo pedido
+            cmd = ['ffmpeg', '-y', '-to', format_ms(max(fin for _, _, fin in outputs)), '-i', input_video_path]
+            tmp_paths = []
+            for final_path, inicio, fin in outputs:
+                tmp_path = stack.enter_context(atomic_output(final_path))
+                tmp_paths.append(tmp_path)
+                cmd += [
+                    '-map', '0',
+                    '-ss', format_ms(inicio),
+                    '-t', format_ms(fin - inicio),
+                    *FAN_OUT_ARGS,
+                    tmp_path
+                ]
+            run_ffmpeg(cmd, outputs=tmp_paths)
+        for final_path, inicio, fin in outputs:
+            if os.path.dirname(final_path) != outdir:
+                segmentCache.store(input_video_path, inicio, fin, FAN_OUT_ARGS, final_path, FAN_OUT_CACHE_MODE)
+
+    for name, file_dir, pieces in concats:
+        _concat_pieces(pieces, os.path.join(file_dir, 'files.txt'), os.path.join(outdir, f'{name}.{ext}'))
+        shutil.rmtree(file_dir, ignore_errors=True)
+
+def copyVideo(input_video_path: str, name: str, ext: str, outdir: str):
+    # El corte cubre todo el video, basta con copiar el archivo sin lanzar ffmpeg
+    with atomic_output(os.path.join(outdir, f'{name}.{ext}')) as tmp_filename:
+        shutil.copyfile(input_video_path, tmp_filename)
+
+def _encoder_args(info: ProbeInfo) -> list[str]:
+    # Parámetros de codificación iguales a los del original para que el concat por copia funcione
+    video = info.stream('video')
+    if video is None or video.get('codec_name') not in ENCODERS:
+        raise ValueError(f'Códec de video no soportado para el modo inteligente: {video and video.get("codec_name")}')
+    args = ['-c:v', ENCODERS[video['codec_name']], '-crf', REENCODE_CRF, '-preset', REENCODE_PRESET]
+    if video.get('pix_fmt'):
+        args += ['-pix_fmt', video['pix_fmt']]
+    if video.get('r_frame_rate') and video['r_frame_rate'] != '0/0':
+        args += ['-r', video['r_frame_rate']]
+    if video['codec_name'] == 'h264' and video.get('profile', '').lower() in X264_PROFILES:
+        # Un perfil que libx264 no conoce se omite y el codificador elige uno según pix_fmt
+        args += ['-profile:v', X264_PROFILES[video['profile'].lower()]]
+    if video.get('time_base'):
+        # Misma escala de tiempo en el MP4 que los tramos copiados
+        args += ['-video_track_timescale', video['time_base'].split('/')[-1]]
+
+    audio = info.stream('audio')
+    if audio is not None:
+        if audio.get('codec_name') not in ENCODERS:
+            raise ValueError(f'Códec de audio no soportado para el modo inteligente: {audio.get("codec_name")}')
+        args += ['-c:a', ENCODERS[audio['codec_name']]]
+        if audio.get('sample_rate'):
+            args += ['-ar', str(audio['sample_rate'])]
+        if audio.get('channels'):
+            args += ['-ac', str(audio['channels'])]
+    return args
+
+def _smart_pieces(cortes: Sequence[Tuple[int, int]], keyframes: Sequence[int]) -> list[Tuple[int, int, bool]]:
+    # Divide cada corte en (inicio, fin, recodificar): del inicio al siguiente fotograma clave
+    # se recodifica, desde ahí hasta el final se copia. Los fotogramas clave están en µs
+    pieces = []
+    for inicio, fin in cortes:
+        clave = keyframe_after(keyframes, inicio * US_PER_MS)
+        if clave is None or seek_ms(clave) >= fin:
+            pieces.append((inicio, fin, True))
+            continue
+        # El tramo copiado usa -ss de entrada redondeado hacia arriba para caer en el fotograma
+        # clave y no en el anterior; el recodificado termina antes de ese fotograma, sin repetirlo
+        copia = seek_ms(clave)
+        cabeza = seek_ms(clave, output_seek=True)
+        if cabeza > inicio:
+            pieces.append((inicio, cabeza, True))
+        pieces.append((copia, fin, False))
+    return pieces
+
+def plan_pieces(input_video_path: str, name: str, ext: str, cortes: Sequence[Tuple[int, int]], outdir: str,
+                info: Optional[ProbeInfo] = None) -> list[Tuple[str, int, int, list[str]]]:
+    # Tramos de un video (ruta, inicio, fin, argumentos de códec) para cortarlos por separado y unirlos
+    # con concat_pieces. Con info se planifica el modo inteligente, sin info se copia el flujo
+    file_dir = os.path.join(outdir, name)
+    os.makedirs(file_dir, exist_ok=True)
+    key = source_key(input_video_path)
+
+    if info is None:
+        # Mismos nombres y argumentos que cutMultipleVideo, así los tramos se reutilizan entre ambos
+        return [(os.path.join(file_dir, f'{name}part-{key}-{inicio}-{fin}.{ext}'), inicio, fin,
+                 ['-c', 'copy', '-map', '0', '-avoid_negative_ts', '1'])
+                for inicio, fin in cortes]
+
+    encoder_args = _encoder_args(info)
+    maps = ['-map', '0:v:0', '-map', '0:a:0?']
+    pieces = []
+    for inicio, fin, recodificar in _smart_pieces(cortes, info.keyframes):
+        if recodificar:
+            # Tramo parcial de GOP: se decodifica y se recodifica con precisión de fotograma
+            codec_args = encoder_args
+        else:
+            # Arranca justo en un fotograma clave, se copia sin perder precisión
+            codec_args = ['-c', 'copy', '-avoid_negative_ts', 'make_zero']
+        piece = os.path.join(file_dir, f'{name}smart-{key}-{inicio}-{fin}-{"r" if recodificar else "c"}.{ext}')
+        pieces.append((piece, inicio, fin, [*maps, *codec_args]))
+    return pieces
+
+def concat_pieces(pieces: Sequence[str], out_filename: str):
+    # Une los tramos de plan_pieces; solo se borran cuando el video final quedó listo
+    file_dir = os.path.dirname(pieces[0])
+    _concat_pieces(pieces, os.path.join(file_dir, 'files.txt'), out_filename)
+    shutil.rmtree(file_dir, ignore_errors=True)
+
+def cutVideoSmart(input_video_path: str, name: str, ext: str, cortes: Sequence[Tuple[int, int]], outdir: str, info: ProbeInfo):
+    pieces = plan_pieces(input_video_path, name, ext, cortes, outdir, info)
+    for piece, inicio, fin, codec_args in pieces:
+        cut_piece(input_video_path, piece, inicio, fin, codec_args)
+    concat_pieces([piece for piece, _, _, _ in pieces], os.path.join(outdir, f'{name}.{ext}'))
+
+def cutVideoReencode(input_video_path: str, name: str, ext: str, cortes: Sequence[Tuple[int, int]], outdir: str, info: ProbeInfo):
+    # Recorta y une con filtros, recodificando todo el video resultante
+    has_audio = info.stream('audio') is not None
+    filters = []
+    inputs = ''
+    for index, (inicio, fin) in enumerate(cortes):
+        start, end = inicio / 1000, fin / 1000
+        filters.append(f'[0:v:0]trim=start={start}:end={end},setpts=PTS-STARTPTS[v{index}]')
+        inputs += f'[v{index}]'
+        if has_audio:
+            filters.append(f'[0:a:0]atrim=start={start}:end={end},asetpts=PTS-STARTPTS[a{index}]')
+            inputs += f'[a{index}]'
+    filters.append(f'{inputs}concat=n={len(cortes)}:v=1:a={1 if has_audio else 0}[v]' + ('[a]' if has_audio else ''))
+
+    with atomic_output(os.path.join(outdir, f'{name}.{ext}')) as tmp_filename:
+        run_ffmpeg([
+            'ffmpeg', '-y',
+            '-i', input_video_path,
+            '-filter_complex', ';'.join(filters),
+            '-map', '[v]',
+            *(['-map', '[a]'] if has_audio else []),
+            *_encoder_args(info),
+            tmp_filename
+        ], media_s=sum(fin - inicio for inicio, fin in cortes) / 1000)
\ No newline at end of file
@@ -0,0 +1,169 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Any, Optional, Tuple, List
+
+CACHE_DIR = 'cache'
+INDEX_VERSION = 1
+VIDEO_EXT = '.mp4'
+
+def _index_cache_path(input_folder: str) -> str:
+    """
+    Retorna la ruta del archivo donde se guarda el índice de una carpeta de entrada.
+
+    Args:
+        input_folder (str): Carpeta de entrada indexada.
+
+    Returns:
+        str: Ruta del archivo JSON del índice.
+    """
+    key = hashlib.sha1(os.path.abspath(input_folder).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(os.getcwd(), CACHE_DIR, f'indice-{key}.json')
+
+def video_id_from_name(filename: str) -> Optional[str]:
+    """
+    Obtiene el ID de un archivo de video a partir de su nombre.
+
+    El ID es todo lo que va antes del primer punto, así '112.mp4' es el ID '112'
+    y nunca se confunde con el ID '12'.
+
+    Args:
+        filename (str): Nombre del archivo.
+
+    Returns:
+        Optional[str]: ID del video, o None si el archivo no es un MP4.
+    """
+    if os.path.splitext(filename)[1].lower() != VIDEO_EXT:
+        return None
+    return filename.split('.', 1)[0]
+
+def _scan_directory(path: str) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Recorre un directorio con una sola pasada de scandir.
+
+    Args:
+        path (str): Directorio a recorrer.
+
+    Returns:
+        Tuple[Dict[str, Any], List[str]]: Entrada de caché del directorio (mtime y archivos)
+        y la lista de sus subdirectorios.
+    """
+    files = {}
+    subdirs = []
+    dir_mtime = os.stat(path).st_mtime_ns
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+                continue
+            if video_id_from_name(entry.name) is None:
+                continue
+            stat = entry.stat()
+            files[entry.name] = [stat.st_size, stat.st_mtime_ns]
+    return {'mtime': dir_mtime, 'files': files, 'subdirs': subdirs}, subdirs
+
+def _load_cache(cache_path: str, input_folder: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Carga el índice guardado en una ejecución anterior.
+
+    Args:
+        cache_path (str): Ruta del archivo del índice.
+        input_folder (str): Carpeta de entrada a la que debe pertenecer el índice.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Directorios guardados, vacío si no hay índice válido.
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != INDEX_VERSION or data.get('root') != os.path.abspath(input_folder):
+        return {}
+    return data.get('dirs', {})
+
+def _save_cache(cache_path: str, input_folder: str, dirs: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Guarda el índice en disco de forma atómica.
+
+    Args:
+        cache_path (str): Ruta del archivo del índice.
+        input_folder (str): Carpeta de entrada indexada.
+        dirs (Dict[str, Dict[str, Any]]): Directorios indexados.
+    """
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f'{cache_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'root': os.path.abspath(input_folder), 'dirs': dirs}, f)
+    os.replace(tmp_path, cache_path)
+
+def build_input_index(input_folder: str, recursive: bool = False, use_cache: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Construye el índice ID -> archivo de la carpeta de videos sin editar.
+
+    Solo se vuelven a recorrer los directorios cuyo mtime cambió desde la última
+    ejecución; el resto se toma del índice guardado en disco.
+
+    Args:
+        input_folder (str): Carpeta de entrada donde se encuentran los videos sin editar.
+        recursive (bool): Si se deben indexar también los subdirectorios.
+        use_cache (bool): Si se debe leer y guardar el índice en disco.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Diccionario ID -> {'path', 'size', 'mtime'}.
+    """
+    cache_path = _index_cache_path(input_folder)
+    cached = _load_cache(cache_path, input_folder) if use_cache else {}
+    root = os.path.abspath(input_folder)
+
+    dirs = {}
+    pending = [root]
+    rescanned = 0
+    while pending:
+        current = pending.pop()
+        previous = cached.get(current)
+        try:
+            mtime = os.stat(current).st_mtime_ns
+            if previous is not None and previous['mtime'] == mtime:
+                entry, subdirs = previous, previous.get('subdirs', [])
+            else:
+                entry, subdirs = _scan_directory(current)
+                rescanned += 1
+        except OSError as e:
+            logging.warning(f'No se pudo leer el directorio {current}: {str(e)}')
+            continue
+        dirs[current] = entry
+        if recursive:
+            # El mtime de cada subdirectorio es independiente del de su padre
+            pending.extend(subdirs)
+
+    if use_cache:
+        try:
+            _save_cache(cache_path, input_folder, dirs)
+        except OSError as e:
+            logging.warning(f'No se pudo guardar el índice de entrada: {str(e)}')
+
+    index = {}
+    for dir_path in sorted(dirs):
+        for filename, (size, mtime) in sorted(dirs[dir_path]['files'].items()):
+            video_id = video_id_from_name(filename)
+            if video_id not in index:
+                index[video_id] = {'path': os.path.join(dir_path, filename), 'size': size, 'mtime': mtime}
+
+    logging.info(f'Índice de entrada: {len(index)} videos ({rescanned} directorios recorridos)')
+    return index
+
+def find_input_video(index: Dict[str, Dict[str, Any]], id: Any) -> str:
+    """
+    Busca la ruta del video sin editar de un ID en el índice.
+
+    Args:
+        index (Dict[str, Dict[str, Any]]): Índice construido con build_input_index.
+        id (Any): ID del recurso.
+
+    Returns:
+        str: Ruta del video, o cadena vacía si no se encontró.
+    """
+    entry = index.get(str(id))
+    return entry['path'] if entry else ''
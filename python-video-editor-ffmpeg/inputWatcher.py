@@ -0,0 +1,204 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from inputIndex import video_id_from_name
+
+STABLE_SECONDS = 10.0  # Tiempo sin cambios de tamaño ni mtime para dar un archivo por terminado
+POLL_SECONDS = 5.0  # Intervalo entre recorridos de la carpeta cuando no hay inotify
+
+# Constantes de <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+_EVENT = struct.Struct('iIII')
+
+class _InotifyBackend:
+    """
+    Avisos del kernel de Linux sobre los archivos de una carpeta, usando inotify con ctypes.
+    """
+
+    def __init__(self, folder: str) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1')
+        mask = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self._fd, os.fsencode(folder), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, f'inotify_add_watch {folder}')
+
+    def changes(self, timeout: float) -> Optional[Set[str]]:
+        # None indica que se perdieron avisos y hay que recorrer la carpeta
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return set()
+            raise
+        names = set()
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            if mask & IN_Q_OVERFLOW:
+                return None
+            names.add(os.fsdecode(data[offset:offset + length].rstrip(b'\0')))
+            offset += length
+        return names
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+class _PollingBackend:
+    """
+    Recorre la carpeta cada cierto tiempo; sirve en cualquier sistema y en carpetas de red.
+    """
+
+    def __init__(self, folder: str, poll_seconds: float) -> None:
+        self.folder = folder
+        self.poll_seconds = poll_seconds
+        self._last_scan = time.monotonic()
+        self._seen = _scan(folder)
+
+    def changes(self, timeout: float) -> Optional[Set[str]]:
+        wait = self._last_scan + self.poll_seconds - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(wait, 0))
+        self._last_scan = time.monotonic()
+        current = _scan(self.folder)
+        names = {name for name, stat in current.items() if self._seen.get(name) != stat}
+        self._seen = current
+        return names
+
+    def close(self) -> None:
+        pass
+
+def _scan(folder: str) -> Dict[str, Tuple[int, int]]:
+    # Nombre -> (tamaño, mtime) de los videos de la carpeta
+    files = {}
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if video_id_from_name(entry.name) is None or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    except OSError as e:
+        logging.warning(f'No se pudo leer la carpeta de entrada: {str(e)}')
+    return files
+
+class InputWatcher:
+    """
+    Vigila la carpeta de entrada y avisa cuando un video terminó de escribirse.
+
+    Usa inotify en Linux y, si no está disponible, recorre la carpeta cada POLL_SECONDS.
+    Un archivo se da por terminado cuando su tamaño y su mtime no cambian durante
+    settle_seconds: las copias por red o las descargas pueden cerrar y reabrir el archivo
+    varias veces, así que el aviso de cierre no alcanza.
+    """
+
+    def __init__(self, folder: str, wanted: Optional[Callable[[str], bool]] = None,
+                 settle_seconds: float = STABLE_SECONDS, poll_seconds: float = POLL_SECONDS) -> None:
+        """
+        Args:
+            folder (str): Carpeta de entrada.
+            wanted (Optional[Callable[[str], bool]]): Filtro de IDs a seguir; por defecto todos.
+            settle_seconds (float): Tiempo sin cambios para dar un archivo por terminado.
+            poll_seconds (float): Intervalo entre recorridos sin inotify.
+        """
+        self.folder = os.path.abspath(folder)
+        self.wanted = wanted or (lambda id: True)
+        self.settle_seconds = settle_seconds
+        self._backend: Any = None
+        if sys.platform.startswith('linux'):
+            try:
+                self._backend = _InotifyBackend(self.folder)
+                logging.info(f'Vigilando {self.folder} con inotify')
+            except (OSError, AttributeError) as e:
+                logging.warning(f'inotify no disponible, se recorre la carpeta cada {poll_seconds:.0f} s: {str(e)}')
+        if self._backend is None:
+            self._backend = _PollingBackend(self.folder, poll_seconds)
+        # Nombre -> (tamaño, mtime, desde cuándo no cambia) de los archivos que todavía se pueden estar escribiendo
+        self._candidates: Dict[str, Tuple[int, int, float]] = {}
+        now = time.time()
+        for name, (size, mtime) in _scan(self.folder).items():
+            # Los que cambiaron hace poco pueden estar a medio copiar al arrancar
+            if now - mtime / 1e9 < settle_seconds:
+                self._add(name)
+
+    def _add(self, name: str) -> None:
+        id = video_id_from_name(name)
+        if id is None or not self.wanted(id):
+            return
+        try:
+            stat = os.stat(os.path.join(self.folder, name))
+        except OSError:
+            self._candidates.pop(name, None)
+            return
+        previous = self._candidates.get(name)
+        if previous is None or previous[:2] != (stat.st_size, stat.st_mtime_ns):
+            self._candidates[name] = (stat.st_size, stat.st_mtime_ns, time.monotonic())
+
+    def is_settling(self, id: str) -> bool:
+        """
+        Indica si el video de un ID todavía se está escribiendo.
+
+        Args:
+            id (str): ID del video.
+
+        Returns:
+            bool: True si hay un archivo de ese ID que cambió hace menos de settle_seconds.
+        """
+        return any(video_id_from_name(name) == id for name in self._candidates)
+
+    def poll(self, timeout: float = 1.0) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Espera avisos hasta timeout segundos y retorna los videos que terminaron de escribirse.
+
+        Args:
+            timeout (float): Espera máxima en segundos.
+
+        Returns:
+            List[Tuple[str, Dict[str, Any]]]: ID y entrada del índice ({'path', 'size', 'mtime'})
+            de cada video listo.
+        """
+        names = self._backend.changes(timeout)
+        if names is None:
+            logging.warning('Se perdieron avisos de la carpeta de entrada, se recorre completa')
+            names = set(_scan(self.folder))
+        for name in names:
+            self._add(name)
+        ready = []
+        now = time.monotonic()
+        for name in list(self._candidates):
+            # Se vuelve a medir: con inotify no llega un aviso cuando el archivo deja de cambiar
+            self._add(name)
+            entry = self._candidates.get(name)
+            if entry is None:
+                continue
+            size, mtime, since = entry
+            if size > 0 and now - since >= self.settle_seconds:
+                del self._candidates[name]
+                ready.append((video_id_from_name(name), {'path': os.path.join(self.folder, name),
+                                                         'size': size, 'mtime': mtime}))
+        return ready
+
+    def close(self) -> None:
+        self._backend.close()
@@ -0,0 +1,354 @@
+import os
+import time
+import socket
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import manifest
+from cutJob import CutJob
+from manifest import Manifest
+
+LEASE_SECONDS = 120.0  # Tiempo sin latido tras el cual un trabajo se considera abandonado
+HEARTBEAT_SECONDS = 30.0
+POLL_SECONDS = 5.0  # Espera entre consultas cuando solo quedan trabajos de otras máquinas
+MAX_ATTEMPTS = 3  # Reclamos antes de dar por fallido un trabajo que tumba a quien lo procesa
+BUSY_TIMEOUT_MS = 60000
+
+STATE_PENDING = 'pendiente'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS leases (
+    id TEXT PRIMARY KEY,
+    cuts_hash TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    owner TEXT,
+    token INTEGER NOT NULL DEFAULT 0,
+    expires_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+)
+'''
+INDEX = 'CREATE INDEX IF NOT EXISTS leases_claim ON leases (state, priority)'
+# IDs que este nodo no tiene para procesar; es una tabla de la conexión, no se comparte
+DECLINED = 'CREATE TEMP TABLE IF NOT EXISTS declined (id TEXT PRIMARY KEY)'
+
+def csv_fingerprint(csv_path: str) -> str:
+    """
+    Identifica el contenido de un CSV, igual en todas las máquinas aunque cambie su ruta o su mtime.
+
+    Args:
+        csv_path (str): Ruta del CSV.
+
+    Returns:
+        str: Huella hexadecimal corta.
+    """
+    digest = hashlib.sha1()
+    with open(csv_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+class LeaseTable:
+    """
+    Tabla de trabajos compartida entre varias máquinas, sin coordinador.
+
+    Todas las máquinas cargan los mismos trabajos del CSV y cada una reclama el siguiente
+    pendiente cuando tiene un núcleo libre. Un reclamo es un préstamo con vencimiento que
+    la máquina renueva con latidos mientras el trabajo corre; si la máquina muere, el
+    préstamo vence y otra lo reclama. Cada reclamo incrementa un token, y solo quien tiene
+    el token vigente puede cerrar el trabajo, así un nodo que perdió su préstamo no pisa
+    el resultado del que lo reclamó después.
+
+    La tabla vive en un SQLite en la carpeta compartida, en modo de diario clásico (el modo
+    WAL no funciona entre máquinas); cada reclamo es una transacción IMMEDIATE.
+    """
+
+    def __init__(self, path: str, node: Optional[str] = None, lease_seconds: float = LEASE_SECONDS,
+                 heartbeat_seconds: float = HEARTBEAT_SECONDS, poll_seconds: float = POLL_SECONDS) -> None:
+        """
+        Args:
+            path (str): Ruta del archivo SQLite compartido.
+            node (Optional[str]): Nombre de esta máquina y proceso; por defecto host-pid.
+            lease_seconds (float): Duración de un préstamo sin renovar.
+            heartbeat_seconds (float): Intervalo entre renovaciones.
+            poll_seconds (float): Espera entre consultas cuando solo quedan trabajos de otros nodos.
+        """
+        self.path = path
+        self.node = node or f'{socket.gethostname()}-{os.getpid()}'
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        # Las transacciones se abren a mano; el latido y el ejecutor asyncio usan la conexión desde otros hilos
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        self._conn.execute('PRAGMA journal_mode=DELETE')
+        self._conn.execute(SCHEMA)
+        self._conn.execute(INDEX)
+        self._conn.execute(DECLINED)
+        self._held: Dict[str, int] = {}  # ID -> token de los trabajos que tiene este nodo
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    @classmethod
+    def for_csv(cls, shared_folder: str, csv_path: str, **kwargs: Any) -> 'LeaseTable':
+        """
+        Abre la tabla de trabajos de un CSV en la carpeta compartida, creándola si no existe.
+
+        Las máquinas que usan el mismo CSV comparten la tabla; un CSV distinto usa otra.
+
+        Args:
+            shared_folder (str): Carpeta visible desde todas las máquinas.
+            csv_path (str): CSV de la ejecución.
+            **kwargs (Any): Opciones de LeaseTable.
+
+        Returns:
+            LeaseTable: Tabla abierta.
+        """
+        return cls(os.path.join(shared_folder, f'trabajos-{csv_fingerprint(csv_path)}.sqlite3'), **kwargs)
+
+    def _transaction(self, statements: Any) -> Any:
+        # Ejecuta statements(conn) dentro de BEGIN IMMEDIATE: toma el bloqueo de escritura antes de leer
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = statements(self._conn)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return result
+
+    def seed(self, jobs: Iterable[CutJob]) -> int:
+        """
+        Carga los trabajos en la tabla. Lo hacen todas las máquinas; los que ya existen no cambian
+        salvo en los casos de abajo.
+
+        El orden de los trabajos es su prioridad al reclamarlos, así se respeta la política de
+        planificación (ver schedulingPolicy.order_jobs). Un trabajo que falló, que no se encontró
+        o cuyos cortes cambiaron vuelve a quedar pendiente si nadie lo está procesando; uno listo
+        con los mismos cortes no se repite.
+
+        Args:
+            jobs (Iterable[CutJob]): Trabajos a procesar.
+
+        Returns:
+            int: Cantidad de trabajos nuevos o reiniciados.
+        """
+        now = time.time()
+        rows = [(job.id, manifest.cuts_hash(job), priority, STATE_PENDING, now) for priority, job in enumerate(jobs)]
+
+        def statements(conn: sqlite3.Connection) -> int:
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT INTO leases (id, cuts_hash, priority, state, updated_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET cuts_hash = excluded.cuts_hash, priority = excluded.priority, '
+                'state = excluded.state, owner = NULL, attempts = 0, updated_at = excluded.updated_at '
+                'WHERE leases.state IN (?, ?) OR (leases.state != ? AND leases.cuts_hash != excluded.cuts_hash)',
+                [row + (manifest.STATE_ERROR, manifest.STATE_NOT_FOUND, manifest.STATE_RUNNING) for row in rows])
+            return conn.total_changes - before
+        return self._transaction(statements)
+
+    def claim(self) -> Optional[str]:
+        """
+        Reclama el siguiente trabajo pendiente o con el préstamo vencido.
+
+        Returns:
+            Optional[str]: ID reclamado, o None si por ahora no hay nada para reclamar.
+        """
+        def statements(conn: sqlite3.Connection) -> Optional[Tuple[str, int]]:
+            now = time.time()
+            while True:
+                row = conn.execute(
+                    'SELECT id, token, attempts, state FROM leases WHERE (state = ? OR (state = ? AND expires_at < ?)) '
+                    'AND id NOT IN (SELECT id FROM declined) ORDER BY priority LIMIT 1',
+                    (STATE_PENDING, manifest.STATE_RUNNING, now)).fetchone()
+                if row is None:
+                    return None
+                id, token, attempts, state = row
+                if state == manifest.STATE_RUNNING:
+                    logging.warning(f'ID {id}: venció el préstamo de otra máquina, se reclama')
+                if attempts >= MAX_ATTEMPTS:
+                    # Cada máquina que lo tomó dejó de responder; no se sigue repartiendo
+                    conn.execute('UPDATE leases SET state = ?, owner = NULL, updated_at = ? WHERE id = ?',
+                                 (manifest.STATE_ERROR, now, id))
+                    logging.error(f'ID {id}: se abandonó después de {attempts} intentos')
+                    continue
+                conn.execute(
+                    'UPDATE leases SET state = ?, owner = ?, token = ?, expires_at = ?, attempts = attempts + 1, '
+                    'updated_at = ? WHERE id = ?',
+                    (manifest.STATE_RUNNING, self.node, token + 1, now + self.lease_seconds, now, id))
+                return id, token + 1
+        claimed = self._transaction(statements)
+        if claimed is None:
+            return None
+        with self._lock:
+            self._held[claimed[0]] = claimed[1]
+        return claimed[0]
+
+    def complete(self, id: str, state: str) -> bool:
+        """
+        Cierra un trabajo de este nodo con su estado final.
+
+        Args:
+            id (str): ID del trabajo.
+            state (str): Estado final (manifest.STATE_*).
+
+        Returns:
+            bool: False si el préstamo ya lo tenía otro nodo; el resultado de ese nodo es el que vale.
+        """
+        with self._lock:
+            token = self._held.pop(id, None)
+        if token is None:
+            return False
+        closed = self._transaction(lambda conn: conn.execute(
+            'UPDATE leases SET state = ?, owner = NULL, expires_at = NULL, updated_at = ? '
+            'WHERE id = ? AND owner = ? AND token = ?', (state, time.time(), id, self.node, token)).rowcount)
+        if not closed:
+            logging.warning(f'ID {id}: el préstamo venció y lo reclamó otra máquina')
+        return bool(closed)
+
+    def release(self, id: str) -> bool:
+        """
+        Devuelve un trabajo reclamado sin procesarlo, para que lo tome otro nodo.
+
+        El trabajo vuelve a quedar pendiente sin contar el intento, y este nodo no lo vuelve a
+        reclamar ni lo espera en wait_for_others.
+
+        Args:
+            id (str): ID del trabajo.
+
+        Returns:
+            bool: False si el préstamo ya lo tenía otro nodo.
+        """
+        with self._lock:
+            token = self._held.pop(id, None)
+        if token is None:
+            return False
+
+        def statements(conn: sqlite3.Connection) -> int:
+            conn.execute('INSERT OR IGNORE INTO declined (id) VALUES (?)', (id,))
+            return conn.execute(
+                'UPDATE leases SET state = ?, owner = NULL, expires_at = NULL, attempts = MAX(attempts - 1, 0), '
+                'updated_at = ? WHERE id = ? AND owner = ? AND token = ?',
+                (STATE_PENDING, time.time(), id, self.node, token)).rowcount
+        return bool(self._transaction(statements))
+
+    def renew(self) -> None:
+        """
+        Extiende el préstamo de todos los trabajos que tiene este nodo.
+        """
+        with self._lock:
+            held = list(self._held.items())
+        if not held:
+            return
+        expires_at = time.time() + self.lease_seconds
+        self._transaction(lambda conn: conn.executemany(
+            'UPDATE leases SET expires_at = ? WHERE id = ? AND owner = ? AND token = ? AND state = ?',
+            [(expires_at, id, self.node, token, manifest.STATE_RUNNING) for id, token in held]))
+
+    def _beat(self) -> None:
+        while not self._stop.wait(self.heartbeat_seconds):
+            try:
+                self.renew()
+            except sqlite3.Error as e:
+                # Un corte breve de la carpeta compartida no debe frenar los cortes en curso
+                logging.warning(f'No se pudo renovar los préstamos: {str(e)}')
+
+    def start_heartbeat(self) -> None:
+        """
+        Empieza a renovar los préstamos de este nodo en un hilo.
+        """
+        self._stop.clear()
+        self._heartbeat = threading.Thread(target=self._beat, name='latido', daemon=True)
+        self._heartbeat.start()
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Returns:
+            Dict[str, int]: Cantidad de trabajos por estado.
+        """
+        with self._lock:
+            return dict(self._conn.execute('SELECT state, COUNT(*) FROM leases GROUP BY state').fetchall())
+
+    def wait_for_others(self) -> bool:
+        """
+        Espera mientras otras máquinas procesan los últimos trabajos.
+
+        Returns:
+            bool: True si apareció algo para reclamar (un préstamo vencido); False si ya no
+            queda ningún trabajo en curso.
+        """
+        while True:
+            with self._lock:
+                now = time.time()
+                running, claimable = self._conn.execute(
+                    'SELECT SUM(state = ?), SUM((state = ? OR (state = ? AND expires_at < ?)) '
+                    'AND id NOT IN (SELECT id FROM declined)) FROM leases',
+                    (manifest.STATE_RUNNING, STATE_PENDING, manifest.STATE_RUNNING, now)).fetchone()
+            if claimable:
+                return True
+            if not running:
+                return False
+            logging.info(f'Esperando {running} trabajos de otras máquinas')
+            time.sleep(self.poll_seconds)
+
+    def claimed_jobs(self, jobs: Dict[str, Tuple[CutJob, bool]],
+                     job_manifest: Manifest) -> Iterator[Tuple[CutJob, bool]]:
+        """
+        Entrega los trabajos a medida que se reclaman, uno por cada núcleo que se libera.
+
+        Termina cuando no queda nada para reclamar; ver rounds para esperar a las otras máquinas.
+
+        Args:
+            jobs (Dict[str, Tuple[CutJob, bool]]): ID -> trabajo (ver pending_jobs).
+            job_manifest (Manifest): Manifiesto de la carpeta de salida.
+
+        Yields:
+            Tuple[CutJob, bool]: Trabajo reclamado por este nodo.
+        """
+        while True:
+            id = self.claim()
+            if id is None:
+                return
+            item = jobs.get(id)
+            if item is None:
+                # Otra máquina lo cargó pero para esta no está pendiente: se devuelve sin procesarlo
+                # ni marcarlo listo, el resultado es de quien sí lo tiene
+                self.release(id)
+                continue
+            job_manifest.mark_running(item[0])
+            yield item
+
+    def rounds(self, jobs: List[Tuple[CutJob, bool]], job_manifest: Manifest) -> Iterator[Iterator[Tuple[CutJob, bool]]]:
+        """
+        Entrega una ronda de trabajos reclamados y vuelve a empezar si vence el préstamo de otra máquina.
+
+        Args:
+            jobs (List[Tuple[CutJob, bool]]): Trabajos ya cargados con seed.
+            job_manifest (Manifest): Manifiesto de la carpeta de salida.
+
+        Yields:
+            Iterator[Tuple[CutJob, bool]]: Trabajos reclamados en cada ronda.
+        """
+        by_id = {job.id: (job, adopt_existing) for job, adopt_existing in jobs}
+        while True:
+            yield self.claimed_jobs(by_id, job_manifest)
+            if not self.wait_for_others():
+                return
+
+    def close(self) -> None:
+        """
+        Detiene el latido y cierra la conexión. Los trabajos sin cerrar quedan para que venzan.
+        """
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        with self._lock:
+            self._conn.close()
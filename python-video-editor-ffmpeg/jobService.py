@@ -0,0 +1,359 @@
+import os
+import json
+import time
+import queue
+import logging
+import argparse
+import datetime
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import cutVideo
+import inputIndex
+import manifest
+import segmentCache
+import scheduler
+import main_procesamiento_paralelo as parallel
+from cutJob import CutJob, MERGE_TOLERANCE_MS
+from manifest import Manifest
+from runLog import RunLog
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+STATE_QUEUED = 'en_cola'
+INDEX_REFRESH_SECONDS = 5.0  # Mínimo entre recorridos de la carpeta de entrada por IDs sin video
+QUEUE_POLL_SECONDS = 0.2
+MAX_BODY_BYTES = 10 * 1024 * 1024
+CONSUMER_RESTART_SECONDS = 1.0  # Pausa antes de volver a arrancar el consumidor de la cola tras un error
+MAX_CONSUMER_RESTARTS = 5  # Errores seguidos, sin ningún trabajo terminado, antes de dar el consumidor por caído
+HEALTH_OK = 'ok'
+HEALTH_DOWN = 'caido'
+
+class JobService:
+    """
+    Servicio local que recibe trabajos de corte por HTTP y los procesa con un pool de larga vida.
+
+    El proceso queda abierto entre pedidos: el pool, el índice de entrada y la caché de
+    ffprobe ya están cargados, así un trabajo nuevo no paga el arranque del intérprete ni de
+    pandas. Los trabajos entran a una cola que consume process_stream, el mismo planificador
+    de main_procesamiento_paralelo, y el estado de cada uno queda en memoria y en el manifiesto.
+    """
+
+    def __init__(self, input_folder: str, output_folder: str, num_processes: int,
+                 executor: str = parallel.EXECUTOR_PROCESSES, cut_mode: str = cutVideo.MODE_COPY) -> None:
+        """
+        Args:
+            input_folder (str): Carpeta de los videos sin editar.
+            output_folder (str): Carpeta de los videos editados.
+            num_processes (int): Cortes simultáneos.
+            executor (str): parallel.EXECUTOR_PROCESSES o parallel.EXECUTOR_ASYNCIO.
+            cut_mode (str): Modo de corte (cutVideo.MODE_*).
+        """
+        self.input_folder = input_folder
+        self.output_folder = output_folder
+        self.num_processes = num_processes
+        self.executor = executor
+        self.settings = {'cut_mode': cut_mode, 'segment_cache_dir': segmentCache.for_output(output_folder)}
+        self.input_index = inputIndex.build_input_index(input_folder)
+        self.manifest = Manifest.for_output(output_folder)
+        path_log_not_found, path_log_errors = parallel.create_log_files()
+        run_prefix = os.path.join(os.getcwd(), parallel.LOG_DIR, datetime.datetime.now().strftime('%Y%m%d-%H%M%S'))
+        self.run_log = RunLog(path_log_not_found, path_log_errors, f'{run_prefix}-resultados.jsonl')
+        self.settings['log_queue'] = self.run_log.queue
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}  # ID -> estado publicado
+        self._queue: "queue.Queue[Tuple[CutJob, bool]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._last_refresh = time.monotonic()
+        self._thread: Optional[threading.Thread] = None
+        self._restarts = 0  # Errores seguidos del consumidor
+        self._consumer_error: Optional[str] = None
+
+    def submit(self, data: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """
+        Valida un pedido y lo pone en la cola.
+
+        Args:
+            data (Dict[str, Any]): {'id', 'cortes' (texto con | o lista de tiempos), 'fuente'
+                opcional y 'forzar' opcional para cortar aunque la salida ya esté lista}.
+
+        Returns:
+            Tuple[int, Dict[str, Any]]: Código HTTP y estado del trabajo.
+        """
+        try:
+            job = CutJob.from_dict(data).normalized(MERGE_TOLERANCE_MS)
+        except ValueError as e:
+            return HTTPStatus.BAD_REQUEST, {'error': str(e)}
+        id = job.id
+        if len(job) == 0:
+            return HTTPStatus.BAD_REQUEST, {'error': f'el ID {id} no tiene cortes con duración'}
+        if not self.is_alive():
+            return HTTPStatus.SERVICE_UNAVAILABLE, {'error': 'la cola de trabajos está detenida', **self.health()}
+
+        with self._lock:
+            current = self._jobs.get(id)
+            if current is not None and current['estado'] in (STATE_QUEUED, manifest.STATE_RUNNING):
+                # El mismo pedido repetido no se vuelve a encolar; uno distinto espera a que termine el anterior
+                if current['cuts_hash'] == manifest.cuts_hash(job):
+                    return HTTPStatus.OK, dict(current)
+                return HTTPStatus.CONFLICT, {'error': f'el ID {id} ya se está procesando con otros cortes'}
+            output_path = os.path.join(self.output_folder, f'{id}.mp4')
+            if not data.get('forzar') and self.manifest.is_verified(job, output_path):
+                status = {'id': id, 'estado': manifest.STATE_DONE, 'cuts_hash': manifest.cuts_hash(job),
+                          'output_path': output_path, 'cache': True}
+                self._jobs[id] = status
+                return HTTPStatus.OK, dict(status)
+            # Como en pending_jobs: una salida sin registro se acepta, salvo que se pida cortar de nuevo
+            adopt_existing = self.manifest.get(id) is None and not data.get('forzar')
+            self.manifest.mark_running(job)
+            status = {'id': id, 'estado': STATE_QUEUED, 'cuts_hash': manifest.cuts_hash(job), 'enviado': time.time()}
+            self._jobs[id] = status
+        self._queue.put((job, adopt_existing))
+        return HTTPStatus.ACCEPTED, dict(status)
+
+    def status(self, id: str) -> Optional[Dict[str, Any]]:
+        """
+        Args:
+            id (str): ID del trabajo.
+
+        Returns:
+            Optional[Dict[str, Any]]: Estado del trabajo, o None si el servicio no lo conoce.
+        """
+        with self._lock:
+            status = self._jobs.get(id)
+            return dict(status) if status is not None else None
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: Cantidad de trabajos por estado y tamaño de la cola.
+        """
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for status in self._jobs.values():
+                counts[status['estado']] = counts.get(status['estado'], 0) + 1
+        return {'trabajos': counts, 'en_cola': self._queue.qsize()}
+
+    def is_alive(self) -> bool:
+        """
+        Returns:
+            bool: Si el hilo que consume la cola está corriendo.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def health(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: 'estado' (HEALTH_OK o HEALTH_DOWN si el consumidor de la cola terminó),
+            'reinicios' seguidos del consumidor y el último error, si hubo.
+        """
+        return {'estado': HEALTH_OK if self.is_alive() else HEALTH_DOWN, 'reinicios': self._restarts,
+                'ultimo_error': self._consumer_error}
+
+    def _locate(self, job: CutJob) -> Optional[str]:
+        # Un ID sin video puede haber llegado después de arrancar: se vuelve a indexar, como mucho cada tanto
+        path = inputIndex.find_input_video(self.input_index, job.source_id)
+        if not path and time.monotonic() - self._last_refresh >= INDEX_REFRESH_SECONDS:
+            self._last_refresh = time.monotonic()
+            self.input_index.update(inputIndex.build_input_index(self.input_folder))
+            path = inputIndex.find_input_video(self.input_index, job.source_id)
+        return path or None
+
+    def _items(self) -> Iterator[Any]:
+        # Trabajos de la cola con su video de entrada; scheduler.IDLE mientras la cola está vacía
+        while True:
+            try:
+                job, adopt_existing = self._queue.get(timeout=QUEUE_POLL_SECONDS)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                yield scheduler.IDLE
+                continue
+            with self._lock:
+                self._jobs[job.id].update(estado=manifest.STATE_RUNNING, iniciado=time.time())
+            yield (job, adopt_existing), self._locate(job)
+
+    def _record(self, result: Dict[str, Any]) -> None:
+        self.manifest.record_result(result)
+        self.run_log.record_result(result)
+        with self._lock:
+            status = self._jobs[result['id']]
+            status.update(estado=result['state'], terminado=time.time(), output_path=result.get('output_path'),
+                          output_size=result.get('output_size'), error=result.get('error'))
+        logging.info(f"ID {result['id']}: {result['state']}")
+
+    def _consume(self) -> None:
+        for result in parallel.process_stream(self._items(), self.input_folder, self.output_folder,
+                                              self.num_processes, self.input_index, self.executor, self.settings,
+                                              located=True):
+            self._restarts = 0
+            self._record(result)
+
+    def _fail_running(self, error: str) -> None:
+        # Los trabajos que ya salieron de la cola se perdieron con el pool; los encolados siguen esperando
+        with self._lock:
+            running = [{'id': id, 'state': manifest.STATE_ERROR, 'cuts_hash': status['cuts_hash'],
+                        'started_at': status.get('iniciado'), 'error': error}
+                       for id, status in self._jobs.items() if status['estado'] == manifest.STATE_RUNNING]
+        for result in running:
+            self._record(result)
+
+    def _fail_queued(self, error: str) -> None:
+        while True:
+            try:
+                job, _ = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._record({'id': job.id, 'state': manifest.STATE_ERROR, 'cuts_hash': manifest.cuts_hash(job),
+                          'error': error})
+
+    def _run(self) -> None:
+        # Un error del planificador o del pool no deja al servicio aceptando trabajos que nadie procesa
+        while True:
+            try:
+                self._consume()
+                return
+            except Exception as e:
+                self._restarts += 1
+                self._consumer_error = f'{type(e).__name__}: {e}'
+                logging.exception(f'Error en la cola de trabajos: {self._consumer_error}')
+                self._fail_running(f'Error en la cola de trabajos: {self._consumer_error}')
+            if self._restarts > MAX_CONSUMER_RESTARTS:
+                logging.error(f'La cola de trabajos falló {self._restarts} veces seguidas, se detiene')
+                self._fail_queued(f'La cola de trabajos se detuvo: {self._consumer_error}')
+                return
+            if self._stop.wait(CONSUMER_RESTART_SECONDS):
+                return
+            logging.info(f'Reiniciando la cola de trabajos (intento {self._restarts})')
+
+    def start(self) -> None:
+        """
+        Arranca el pool y el hilo que consume la cola.
+        """
+        self.run_log.start()
+        self._thread = threading.Thread(target=self._run, name='cola-trabajos', daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        Termina los trabajos encolados y en curso, y cierra el manifiesto.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.manifest.close()
+        self.run_log.close()
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    POST /trabajos (un pedido o una lista), GET /trabajos, GET /trabajos/<id> y GET /salud.
+    """
+    service: JobService
+    protocol_version = 'HTTP/1.1'
+    # Encabezados y cuerpo salen en escrituras separadas; con Nagle cada respuesta espera el ACK retardado
+    disable_nagle_algorithm = True
+
+    def _send(self, code: int, body: Any) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        path = self.path.rstrip('/')
+        if path == '/salud':
+            health = self.service.health()
+            self._send(HTTPStatus.OK if health['estado'] == HEALTH_OK else HTTPStatus.SERVICE_UNAVAILABLE, health)
+        elif path == '/trabajos':
+            self._send(HTTPStatus.OK, self.service.summary())
+        elif path.startswith('/trabajos/'):
+            status = self.service.status(path[len('/trabajos/'):])
+            if status is None:
+                self._send(HTTPStatus.NOT_FOUND, {'error': 'trabajo desconocido'})
+            else:
+                self._send(HTTPStatus.OK, status)
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {'error': 'ruta desconocida'})
+
+    def do_POST(self) -> None:
+        if self.path.rstrip('/') != '/trabajos':
+            self._send(HTTPStatus.NOT_FOUND, {'error': 'ruta desconocida'})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self._send(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'pedido demasiado grande'})
+            return
+        try:
+            data = json.loads(self.rfile.read(length) or b'null')
+        except ValueError:
+            self._send(HTTPStatus.BAD_REQUEST, {'error': 'el cuerpo no es JSON'})
+            return
+        if isinstance(data, list):
+            # Varios pedidos en una sola llamada: se responde el estado de cada uno
+            self._send(HTTPStatus.OK, [self._submit_one(item)[1] for item in data])
+            return
+        self._send(*self._submit_one(data))
+
+    def _submit_one(self, data: Any) -> Tuple[int, Dict[str, Any]]:
+        if not isinstance(data, dict):
+            return HTTPStatus.BAD_REQUEST, {'error': 'cada pedido debe ser un objeto JSON'}
+        return self.service.submit(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.debug(f'{self.address_string()} {format % args}')
+
+def serve(service: JobService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """
+    Crea el servidor HTTP del servicio; el llamador ejecuta serve_forever.
+
+    Args:
+        service (JobService): Servicio ya arrancado.
+        host (str): Dirección donde escuchar; por defecto solo la máquina local.
+        port (int): Puerto; 0 elige uno libre.
+
+    Returns:
+        ThreadingHTTPServer: Servidor listo para atender pedidos.
+    """
+    handler = type('Handler', (_Handler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main() -> None:
+    """
+    Arranca el servicio de cortes y atiende pedidos hasta Ctrl+C.
+    """
+    parser = argparse.ArgumentParser(description='Servicio local de cortes de video')
+    parser.add_argument('--entrada', required=True, help='Carpeta de los videos sin editar')
+    parser.add_argument('--salida', required=True, help='Carpeta de los videos editados')
+    parser.add_argument('--procesos', type=int, default=max(os.cpu_count() or 1, 1), help='Cortes simultáneos')
+    parser.add_argument('--ejecutor', choices=[parallel.EXECUTOR_PROCESSES, parallel.EXECUTOR_ASYNCIO],
+                        default=parallel.EXECUTOR_PROCESSES)
+    parser.add_argument('--modo', choices=[cutVideo.MODE_COPY, cutVideo.MODE_SMART, cutVideo.MODE_REENCODE],
+                        default=cutVideo.MODE_COPY, help='Modo de corte')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--puerto', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    for folder, message in ((args.entrada, 'El directorio de entrada'), (args.salida, 'El directorio de salida')):
+        if not parallel.verify_directory(folder, message):
+            return
+    service = JobService(args.entrada, args.salida, args.procesos, args.ejecutor, args.modo)
+    service.start()
+    server = serve(service, args.host, args.puerto)
+    logging.info(f'Servicio de cortes en http://{args.host}:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info('Deteniendo el servicio, se terminan los trabajos en curso')
+    finally:
+        server.server_close()
+        service.close()
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
 import os
 import cutVideo
 import readCSV
+import inputIndex
 import mimetypes
 import datetime
 
@@ -73,14 +74,14 @@ def main():
     log_erros = open(path_log_erros,mode='+a',encoding='utf-8')
     
     items = readCSV.readDataCSV(csv_path)
+    input_index = inputIndex.build_input_index(input_folder)
     
     print(f'[***** {len(items)} PARA EDITAR *****]')
     
     count = 0
     
-    for item in items:
-        id = item['id']
-        cortes = item['cortes']
+    for job in items:
+        id = job.id
         
         exist = os.path.join(output_folder,f'{id}.mp4')
         
@@ -89,25 +90,19 @@ def main():
             print(f'ID {id} YA FUE EDITADO')
             continue
         
-        radis_list = os.listdir(input_folder) 
-        radi_founded = False
-        input_video_path = ''
-        for radi in radis_list:
-            if f'{id}.' in radi and '.mp4' in radi:
-                radi_founded = True
-                input_video_path = os.path.join(input_folder,radi)
-                break
-        if not radi_founded:
+        input_video_path = inputIndex.find_input_video(input_index,job.source_id)
+        if not input_video_path:
             log_not_found.write(f'{id},\n')
             continue
         try:
-            if type(cortes[0]) == str:
+            cortes = cutVideo.snap_to_keyframes(input_video_path,job.pairs())
+            if len(cortes) == 1:
                 print('CORTE SIMPLE')
-                cutVideo.cutSingleVideo(input_video_path,f'{id}','mp4',cortes,output_folder)
+                cutVideo.cutSingleVideo(input_video_path,f'{id}','mp4',cortes[0],output_folder)
                 count += 1
-            elif type(cortes[0]) == list:
+            else:
                 print('CORTE MULTIPLE')
-                cutVideo.cutMultipleVideo(input_video_path,f'{id}','mp4',cortes,output_folder)
+                cutVideo.cutMultipleVideoSinglePass(input_video_path,f'{id}','mp4',cortes,output_folder)
                 count += 1
         except Exception as e:
             print(f'[!!!!! ERROR AL EDITAR {id} !!!!!]')
@@ -1,6 +1,10 @@
 import os
 import cutVideo
 import readCSV
+import inputIndex
+import runLog
+from cutJob import CutJob
+from runLog import RunLog
 import datetime
 from typing import TextIO, List, Dict, Any, Tuple
 import time
@@ -70,19 +74,34 @@ def create_log_files() -> Tuple[str, str]:
     
     return path_log_not_found, path_log_errors
 
-def process_video(args: Tuple[Dict[str, Any], str, str, str, str]) -> bool:
+# Índice ID -> video compartido con los procesos del pool
+_input_index: Dict[str, Dict[str, Any]] = {}
+
+def init_worker(input_index: Dict[str, Dict[str, Any]], log_queue: Any) -> None:
+    """
+    Inicializa un proceso del pool con el índice de videos de entrada.
+    
+    Args:
+        input_index (Dict[str, Dict[str, Any]]): Índice construido con inputIndex.build_input_index.
+        log_queue (Any): Cola de RunLog donde se mandan los registros.
+    """
+    global _input_index
+    _input_index = input_index
+    runLog.configure_worker(log_queue)
+
+@runLog.flushed
+def process_video(args: Tuple[CutJob, str, str]) -> bool:
     """
     Procesa un video individual y retorna True si fue exitoso.
     
     Args:
-        args (Tuple[Dict[str, Any], str, str, str, str]): Argumentos necesarios para procesar el video.
+        args (Tuple[CutJob, str, str]): Trabajo y carpetas de entrada y salida.
     
     Returns:
         bool: True si el video fue procesado exitosamente, False en caso contrario.
     """
-    item, input_folder, output_folder, path_log_not_found, path_log_errors = args
-    id = item['id']
-    cortes = item['cortes']
+    job, input_folder, output_folder = args
+    id = job.id
     
     # Verificar si el video ya fue procesado
     exist = os.path.join(output_folder, f'{id}.mp4')
@@ -91,29 +110,24 @@ def process_video(args: Tuple[Dict[str, Any], str, str, str, str]) -> bool:
         return True
     
     # Buscar el archivo de video
-    input_video_path = ''
-    for radi in os.listdir(input_folder):
-        if f'{id}.' in radi and '.mp4' in radi:
-            input_video_path = os.path.join(input_folder, radi)
-            break
+    input_video_path = inputIndex.find_input_video(_input_index, job.source_id)
     
     if not input_video_path:
-        with open(path_log_not_found, 'a') as f:
-            write_to_log(f, f'{id},')
+        runLog.not_found.info(f'{id},')
         return False
     
     try:
-        if isinstance(cortes[0], str):
+        cortes = cutVideo.snap_to_keyframes(input_video_path, job.pairs())
+        if len(cortes) == 1:
             logging.info(f'✂️  Realizando corte simple para el video {id}')
-            cutVideo.cutSingleVideo(input_video_path, f'{id}', 'mp4', cortes, output_folder)
-        elif isinstance(cortes[0], list):
+            cutVideo.cutSingleVideo(input_video_path, f'{id}', 'mp4', cortes[0], output_folder)
+        else:
             logging.info(f'✂️✂️ Realizando cortes múltiples para el video {id}')
-            cutVideo.cutMultipleVideo(input_video_path, f'{id}', 'mp4', cortes, output_folder)
+            cutVideo.cutMultipleVideoSinglePass(input_video_path, f'{id}', 'mp4', cortes, output_folder)
         return True
     except Exception as e:
         logging.error(f'❌ Error al editar {id}: {str(e)}')
-        with open(path_log_errors, 'a') as f:
-            write_to_log(f, f'ID {id} ERROR {str(e)}')
+        runLog.errors.info(f'ID {id} ERROR {str(e)}')
         return False
 
 # def get_cpu_temperature() -> float:
@@ -190,25 +204,25 @@ def select_processing_intensity(cpu_count_logical: int) -> int:
         except ValueError:
             logging.warning("😅 Necesito un número válido del 1 al 3")
 
-def process_batch(batch_items: List[Dict[str, Any]], input_folder: str, output_folder: str, 
-                 path_log_not_found: str, path_log_errors: str, num_processes: int) -> List[bool]:
+def process_batch(batch_items: List[CutJob], input_folder: str, output_folder: str, 
+                 log_queue: Any, num_processes: int,
+                 input_index: Dict[str, Dict[str, Any]]) -> List[bool]:
     """
     Procesa un lote de videos.
     
     Args:
-        batch_items (List[Dict[str, Any]]): Lista de items a procesar.
+        batch_items (List[CutJob]): Lista de trabajos a procesar.
         input_folder (str): Carpeta de entrada donde se encuentran los videos sin editar.
         output_folder (str): Carpeta de salida donde se guardarán los videos editados.
-        path_log_not_found (str): Ruta del archivo de log para IDs no encontrados.
-        path_log_errors (str): Ruta del archivo de log para errores.
+        log_queue (Any): Cola de RunLog donde los procesos mandan sus registros.
         num_processes (int): Número de procesos a utilizar.
+        input_index (Dict[str, Dict[str, Any]]): Índice ID -> video de la carpeta de entrada.
     
     Returns:
         List[bool]: Lista de resultados de procesamiento para cada video.
     """
-    with Pool(processes=num_processes) as pool:
-        args = [(item, input_folder, output_folder, path_log_not_found, path_log_errors) 
-               for item in batch_items]
+    with Pool(processes=num_processes, initializer=init_worker, initargs=(input_index, log_queue)) as pool:
+        args = [(job, input_folder, output_folder) for job in batch_items]
         return pool.map(process_video, args)
 
 def main() -> None:
@@ -236,10 +250,15 @@ def main() -> None:
         return
     
     path_log_not_found, path_log_errors = create_log_files()
+    # Un solo hilo escribe la consola y los logs de todos los procesos (ver runLog)
+    run_prefix = os.path.join(os.getcwd(), LOG_DIR, datetime.datetime.now().strftime("%Y%m%d-%H%M%S"))
+    run_log = RunLog(path_log_not_found, path_log_errors, f'{run_prefix}-resultados.jsonl')
+    run_log.start()
     
     try:
         start_time = time.time()
         items = readCSV.readDataCSV(csv_path)
+        input_index = inputIndex.build_input_index(input_folder)
         total_items = len(items)
         logging.info(f'🎬 Encontré {total_items} videos para editar')
         
@@ -266,7 +285,7 @@ def main() -> None:
             # Procesar el lote
 
             results = process_batch(current_batch, input_folder, output_folder,
-                                 path_log_not_found, path_log_errors, num_processes)
+                                 run_log.queue, num_processes, input_index)
             
             successful_edits += sum(1 for result in results if result)
             
@@ -289,6 +308,7 @@ def main() -> None:
             print("\n📝 Los registros quedaron guardados en:")
             logging.info(f"• Videos no encontrados: {path_log_not_found}")
             logging.info(f"• Registro de errores: {path_log_errors}")
+        run_log.close()
 
 if __name__ == "__main__":
     main()
@@ -1,18 +1,48 @@
 import os
 import cutVideo
 import readCSV
+import inputIndex
+import probe
+import manifest
+from manifest import Manifest
+import cutJob
+from cutJob import CutJob
+import scheduler
+import schedulingPolicy
+import segmentCache
+import staging
+from staging import StagingArea
+from jobLeases import LeaseTable
+from inputWatcher import InputWatcher
+import tracing
+import progress
+from progress import ProgressMonitor
+import runLog
+from runLog import RunLog
 import datetime
-from typing import TextIO, List, Dict, Any, Tuple
+from typing import TYPE_CHECKING, TextIO, Callable, Dict, Any, List, Tuple, Iterable, Iterator, Optional
 import time
-from multiprocessing import Pool, cpu_count
-# psutil es una biblioteca que permite obtener información sobre el sistema y los procesos en ejecución.
-import psutil
+import subprocess
+from multiprocessing import Pool, Queue, cpu_count
 import logging
+# asyncio, psutil y pandas se importan recién cuando se usan: el arranque y cada proceso del pool
+# creado con spawn no pagan esos imports si la ejecución no los necesita
+if TYPE_CHECKING:
+    from adaptiveConcurrency import AdaptiveController
 # Para temas de temperatura
 #import wmi 
 
 LOG_DIR = 'logs'
 TEMP_LIMIT = 80  # Límite de temperatura en grados Celsius
+EXECUTOR_PROCESSES = 'procesos'
+EXECUTOR_ASYNCIO = 'asyncio'
+SNAP_TO_KEYFRAMES = True  # Ajusta los inicios de corte al fotograma clave anterior
+SPLIT_MIN_MS = 5 * 60 * 1000  # Duración total a partir de la cual los tramos de un video se cortan en paralelo
+
+# Tipos de tarea del pool cuando los tramos de un video se reparten entre los procesos
+TASK_VIDEO = 'video'
+TASK_PIECE = 'tramo'
+TASK_CONCAT = 'union'
 
 # Configuro logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -71,51 +101,330 @@ def create_log_files() -> Tuple[str, str]:
     
     return path_log_not_found, path_log_errors
 
-def process_video(args: Tuple[Dict[str, Any], str, str, str, str]) -> bool:
+# Índice ID -> video y opciones de la ejecución, compartidos con los procesos del pool
+_input_index: Dict[str, Dict[str, Any]] = {}
+_settings: Dict[str, Any] = {'cut_mode': cutVideo.MODE_COPY}
+
+def init_worker(input_index: Dict[str, Dict[str, Any]], settings: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Inicializa un proceso del pool con el índice de videos de entrada y las opciones de la ejecución.
+    
+    Args:
+        input_index (Dict[str, Dict[str, Any]]): Índice construido con inputIndex.build_input_index.
+        settings (Optional[Dict[str, Any]]): Opciones de la ejecución, por ejemplo 'cut_mode',
+            'segment_cache_dir', 'trace_dir', 'progress_queue' o 'log_queue'.
+    """
+    global _input_index
+    _input_index = input_index
+    if settings:
+        _settings.update(settings)
+    runLog.configure_worker(_settings.get('log_queue'))
+    segmentCache.configure(_settings.get('segment_cache_dir'))
+    tracing.configure(_settings.get('trace_dir'))
+    progress.configure(_settings.get('progress_queue'))
+
+def is_valid_output(path: str) -> bool:
+    """
+    Verifica que un video editado se pueda leer completo.
+    
+    Un MP4 interrumpido no tiene el índice (moov) y ffprobe no puede leer su duración.
+    
+    Args:
+        path (str): Ruta del video editado.
+    
+    Returns:
+        bool: True si ffprobe lee el archivo y reporta una duración mayor a cero.
+    """
+    try:
+        return probe.probe_source(path, use_cache=False).duration_ms > 0
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return False
+
+def _record_error(result: Dict[str, Any], message: str) -> Dict[str, Any]:
+    """
+    Registra el error de un video en el log y en su resultado.
+    
+    Args:
+        result (Dict[str, Any]): Resultado del video.
+        message (str): Descripción del error.
+    
+    Returns:
+        Dict[str, Any]: El mismo resultado, con estado de error.
+    """
+    logging.error(f'[!!!!! ERROR AL EDITAR {result["id"]} !!!!!] - {message}')
+    runLog.errors.info(f'ID {result["id"]} ERROR {message}')
+    result.update(state=manifest.STATE_ERROR, error=message)
+    return result
+
+def _new_result(job: CutJob, output_folder: str, adopt_existing: bool) -> Dict[str, Any]:
     """
-    Procesa un video individual y retorna True si fue exitoso.
+    Crea el resultado de un video y acepta su salida existente si corresponde.
     
     Args:
-        args (Tuple[Dict[str, Any], str, str, str, str]): Argumentos necesarios para procesar el video.
+        job (CutJob): Trabajo del video.
+        output_folder (str): Carpeta de salida donde se guardarán los videos editados.
+        adopt_existing (bool): Si una salida existente sin registro en el manifiesto se puede aceptar.
     
     Returns:
-        bool: True si el video fue procesado exitosamente, False en caso contrario.
+        Dict[str, Any]: Resultado con 'id', 'cuts_hash', 'output_path' y 'started_at'; con estado
+        listo si se aceptó la salida existente.
     """
-    item, input_folder, output_folder, path_log_not_found, path_log_errors = args
-    id = item['id']
-    cortes = item['cortes']
+    output_path = os.path.join(output_folder, f'{job.id}.mp4')
+    result = {'id': job.id, 'cuts_hash': manifest.cuts_hash(job), 'output_path': output_path,
+              'started_at': time.time()}
     
-    # Verifico si el video ya fue procesado, busca por id
-    exist = os.path.join(output_folder, f'{id}.mp4')
-    if os.path.exists(exist):
-        logging.info(f'ID {id} YA FUE EDITADO')
-        return True
+    # Salida de una ejecución sin manifiesto: solo se acepta si el archivo está completo. Con
+    # staging se corta en la carpeta local, pero la salida anterior está en la carpeta definitiva
+    existing_path = os.path.join(_settings.get('adopt_folder') or output_folder, f'{job.id}.mp4')
+    if adopt_existing and os.path.exists(existing_path) and is_valid_output(existing_path):
+        logging.info(f'ID {job.id} YA FUE EDITADO')
+        result.update(state=manifest.STATE_DONE, output_path=existing_path, output_size=os.path.getsize(existing_path))
+    return result
+
+def _open_source(job: CutJob, input_video_path: str) -> Tuple[Dict[str, Any], Optional[probe.ProbeInfo], str]:
+    """
+    Lee los datos y la información de ffprobe del video de entrada, y decide el modo de corte.
+    
+    Args:
+        job (CutJob): Trabajo que usa el video.
+        input_video_path (str): Ruta del video de entrada.
+    
+    Returns:
+        Tuple[Dict[str, Any], Optional[probe.ProbeInfo], str]: Datos de entrada para el resultado,
+        información del video (None si no se pudo analizar) y modo de corte a usar.
+    """
+    input_stat = os.stat(input_video_path)
+    source = {'input_path': input_video_path, 'input_size': input_stat.st_size, 'input_mtime': input_stat.st_mtime_ns}
+    
+    # La información del video sale de la caché de ffprobe, solo se analiza una vez por archivo
+    info = None
+    with tracing.span(tracing.STAGE_PROBE, id=job.id):
+        try:
+            info = probe.probe_source(input_video_path)
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            logging.warning(f'No se pudo analizar el video {job.id}, se corta sin ajustar: {str(e)}')
+    
+    cut_mode = _settings['cut_mode']
+    if cut_mode != cutVideo.MODE_COPY and info is None:
+        logging.warning(f'El modo {cut_mode} necesita analizar el video, {job.id} se corta copiando el flujo')
+        cut_mode = cutVideo.MODE_COPY
+    return source, info, cut_mode
+
+def _snap_job(job: CutJob, info: Optional[probe.ProbeInfo], cut_mode: str, output_seek: bool = False) -> CutJob:
+    # Solo al copiar el flujo el corte arranca en un fotograma clave; los otros modos son exactos.
+    # output_seek es para el corte en abanico, que busca con -ss después de -i
+    if info is not None and cut_mode == cutVideo.MODE_COPY and SNAP_TO_KEYFRAMES:
+        return job.with_segments(probe.snap_segments(job.pairs(), info, output_seek))
+    return job
+
+def _find_input_video(job: CutJob, input_path: Optional[str]) -> Optional[str]:
+    if input_path:
+        return input_path
+    with tracing.span(tracing.STAGE_LOOKUP, id=job.id):
+        return inputIndex.find_input_video(_input_index, job.source_id)
+
+def process_video(args: Tuple[CutJob, str, str, bool, Optional[str]]) -> Dict[str, Any]:
+    """
+    Procesa un video individual y retorna su resultado para el manifiesto.
+    
+    Args:
+        args (Tuple[CutJob, str, str, bool, Optional[str]]): Trabajo, carpetas de entrada y salida,
+            y dos opciones más. El cuarto indica si una salida existente sin registro en el manifiesto
+            se puede aceptar tras verificarla; el último es la copia local del video de entrada
+            (ver staging.StagingArea), o None para buscarlo en el índice.
+    
+    Returns:
+        Dict[str, Any]: Resultado con 'id', 'state' (manifest.STATE_*), 'cuts_hash' y los datos
+        de entrada, salida o error.
+    """
+    # El tiempo total del video, con su estado final, para ubicar las demás etapas en la línea de tiempo
+    with tracing.span(tracing.STAGE_VIDEO, id=args[0].id) as trace:
+        result = _process_video(args)
+        trace['state'] = result['state']
+        return result
+
+def _process_video(args: Tuple[CutJob, str, str, bool, Optional[str]]) -> Dict[str, Any]:
+    job, input_folder, output_folder, adopt_existing, input_path = args
+    id = job.id
+    result = _new_result(job, output_folder, adopt_existing)
+    if 'state' in result:
+        return result
+    output_path = result['output_path']
     
     # Buscar el archivo de video por id 
-    input_video_path = ''
-    for radi in os.listdir(input_folder):
-        if f'{id}.' in radi and '.mp4' in radi:
-            input_video_path = os.path.join(input_folder, radi)
-            break
+    input_video_path = _find_input_video(job, input_path)
     
     if not input_video_path:
-        with open(path_log_not_found, 'a') as f:
-            write_to_log(f, f'{id},')
-        return False
+        runLog.not_found.info(f'{id},')
+        result.update(state=manifest.STATE_NOT_FOUND)
+        return result
     
     try:
-        if isinstance(cortes[0], str):
+        # El video puede desaparecer o dejar de ser legible entre el índice y el corte
+        source, info, cut_mode = _open_source(job, input_video_path)
+        result.update(source)
+        
+        job = _snap_job(job, info, cut_mode)
+        if len(job) == 0:
+            return _record_error(result, 'cortes fuera de la duración del video')
+        
+        plan, segments = cutJob.plan_cut(job, info.duration_ms if info is not None else None)
+        if (plan == cutJob.PLAN_MULTIPLE and _settings.get('split_segments') and job.duration_ms >= SPLIT_MIN_MS
+                and cut_mode in (cutVideo.MODE_COPY, cutVideo.MODE_SMART)):
+            # Los tramos se cortan como tareas separadas del pool (ver _SplitTracker)
+            pieces = cutVideo.plan_pieces(input_video_path, f'{id}', 'mp4', segments, output_folder,
+                                          info if cut_mode == cutVideo.MODE_SMART else None)
+            result.update(state=manifest.STATE_RUNNING, pieces=pieces)
+            return result
+        if plan == cutJob.PLAN_COPY:
+            logging.info('COPIA COMPLETA')
+            cutVideo.copyVideo(input_video_path, f'{id}', 'mp4', output_folder)
+        elif cut_mode == cutVideo.MODE_SMART:
+            logging.info('CORTE INTELIGENTE')
+            cutVideo.cutVideoSmart(input_video_path, f'{id}', 'mp4', segments, output_folder, info)
+        elif cut_mode == cutVideo.MODE_REENCODE:
+            logging.info('CORTE RECODIFICADO')
+            cutVideo.cutVideoReencode(input_video_path, f'{id}', 'mp4', segments, output_folder, info)
+        elif plan == cutJob.PLAN_SINGLE:
             logging.info('CORTE SIMPLE')
-            cutVideo.cutSingleVideo(input_video_path, f'{id}', 'mp4', cortes, output_folder)
-        elif isinstance(cortes[0], list):
+            cutVideo.cutSingleVideo(input_video_path, f'{id}', 'mp4', segments[0], output_folder)
+        else:
             logging.info('CORTE MULTIPLE')
-            cutVideo.cutMultipleVideo(input_video_path, f'{id}', 'mp4', cortes, output_folder)
-        return True
+            cutVideo.cutMultipleVideoSinglePass(input_video_path, f'{id}', 'mp4', segments, output_folder)
+        result.update(state=manifest.STATE_DONE, output_size=os.path.getsize(output_path))
+        return result
     except Exception as e:
-        logging.error(f'[!!!!! ERROR AL EDITAR {id} !!!!!] - {str(e)}')
-        with open(path_log_errors, 'a') as f:
-            write_to_log(f, f'ID {id} ERROR {str(e)}')
-        return False
+        return _record_error(result, str(e))
+
+@runLog.flushed
+def run_task(task: Tuple[str, Any]) -> Dict[str, Any]:
+    """
+    Ejecuta una tarea del pool: un video completo, un tramo o la unión de los tramos.
+    
+    Args:
+        task (Tuple[str, Any]): Tipo de tarea (TASK_*) y sus argumentos.
+    
+    Returns:
+        Dict[str, Any]: Resultado del video; para un tramo, {'id', 'task', 'error'}.
+    """
+    kind, args = task
+    if kind == TASK_VIDEO:
+        return process_video(args)
+    if kind == TASK_PIECE:
+        id, input_video_path, piece, inicio, fin, codec_args = args
+        try:
+            cutVideo.cut_piece(input_video_path, piece, inicio, fin, codec_args)
+            return {'id': id, 'task': TASK_PIECE, 'error': None}
+        except Exception as e:
+            return {'id': id, 'task': TASK_PIECE, 'error': str(e)}
+    
+    result, errors = args
+    pieces = result.pop('pieces')
+    if errors:
+        # Los tramos que sí se cortaron quedan para reutilizarlos en el próximo intento
+        return _record_error(result, errors[0])
+    try:
+        logging.info(f'UNIÓN DE {len(pieces)} TRAMOS')
+        cutVideo.concat_pieces([piece for piece, _, _, _ in pieces], result['output_path'])
+        result.update(state=manifest.STATE_DONE, output_size=os.path.getsize(result['output_path']))
+        return result
+    except Exception as e:
+        return _record_error(result, str(e))
+
+class _SplitTracker:
+    """
+    Sigue los videos cuyos tramos se cortan en paralelo y envía su unión al terminar el último.
+    
+    Se usa como followups del planificador: recibe cada resultado y retorna las tareas nuevas.
+    """
+    
+    def __init__(self) -> None:
+        # ID -> [resultado con los tramos, tramos pendientes, errores]
+        self._pending: Dict[str, List[Any]] = {}
+    
+    def followups(self, result: Dict[str, Any]) -> List[Tuple[str, Any]]:
+        if result.get('task') == TASK_PIECE:
+            entry = self._pending[result['id']]
+            entry[1] -= 1
+            if result['error']:
+                entry[2].append(result['error'])
+            if entry[1]:
+                return []
+            del self._pending[result['id']]
+            return [(TASK_CONCAT, (entry[0], entry[2]))]
+        if 'pieces' in result:
+            pieces = result['pieces']
+            logging.info(f'ID {result["id"]}: {len(pieces)} tramos en paralelo')
+            self._pending[result['id']] = [result, len(pieces), []]
+            return [(TASK_PIECE, (result['id'], result['input_path'], *piece)) for piece in pieces]
+        return []
+    
+    @staticmethod
+    def is_final(result: Dict[str, Any]) -> bool:
+        return result.get('task') != TASK_PIECE and 'pieces' not in result
+
+@runLog.flushed
+def process_group(args: Tuple[List[Tuple[CutJob, bool]], str, str, Optional[str]]) -> List[Dict[str, Any]]:
+    """
+    Procesa varios videos que se cortan del mismo video de entrada, leyéndolo una sola vez.
+    
+    Solo se aplica al copiar el flujo; en los otros modos, o si el grupo tiene un solo video,
+    cada trabajo se procesa con process_video.
+    
+    Args:
+        args (Tuple[List[Tuple[CutJob, bool]], str, str, Optional[str]]): Grupo de trabajos
+            (ver schedulingPolicy.group_by_source), carpetas de entrada y salida y copia local del
+            video de entrada, o None.
+    
+    Returns:
+        List[Dict[str, Any]]: Resultado de cada video del grupo.
+    """
+    group, input_folder, output_folder, input_path = args
+    input_video_path = _find_input_video(group[0][0], input_path)
+    if len(group) == 1 or _settings['cut_mode'] != cutVideo.MODE_COPY or not input_video_path:
+        return [process_video((job, input_folder, output_folder, adopt_existing, input_path))
+                for job, adopt_existing in group]
+    
+    try:
+        source, info, cut_mode = _open_source(group[0][0], input_video_path)
+    except Exception as e:
+        # Sin el video de entrada falla cada video del grupo que faltaba cortar
+        results = [_new_result(job, output_folder, adopt_existing) for job, adopt_existing in group]
+        return [result if 'state' in result else _record_error(result, str(e)) for result in results]
+    results = []
+    fan_out = []  # (id, segmentos, resultado)
+    for job, adopt_existing in group:
+        result = _new_result(job, output_folder, adopt_existing)
+        results.append(result)
+        if 'state' in result:
+            continue
+        result.update(source)
+        
+        job = _snap_job(job, info, cut_mode, output_seek=True)
+        if len(job) == 0:
+            _record_error(result, 'cortes fuera de la duración del video')
+            continue
+        plan, segments = cutJob.plan_cut(job, info.duration_ms if info is not None else None)
+        if plan != cutJob.PLAN_COPY:
+            fan_out.append((job.id, segments, result))
+            continue
+        try:
+            logging.info('COPIA COMPLETA')
+            cutVideo.copyVideo(input_video_path, f'{job.id}', 'mp4', output_folder)
+            result.update(state=manifest.STATE_DONE, output_size=os.path.getsize(result['output_path']))
+        except Exception as e:
+            _record_error(result, str(e))
+    
+    if fan_out:
+        try:
+            logging.info(f'CORTE EN ABANICO ({len(fan_out)} videos)')
+            cutVideo.cutFanOut(input_video_path, 'mp4', [(id, segments) for id, segments, _ in fan_out], output_folder)
+            for _, _, result in fan_out:
+                result.update(state=manifest.STATE_DONE, output_size=os.path.getsize(result['output_path']))
+        except Exception as e:
+            for _, _, result in fan_out:
+                _record_error(result, str(e))
+    return results
 
 # No funciona, depende mucho del fabricante de la CPU
 # Ya intente con otras librerias y no funciona
@@ -136,23 +445,6 @@ def process_video(args: Tuple[Dict[str, Any], str, str, str, str]) -> bool:
 #         logging.warning(f'No se pudo obtener la temperatura de la CPU: {str(e)}')
 #     return None
 
-def calculate_optimal_batch_size(total_items: int) -> int:
-    """
-    Calcula el tamaño óptimo del lote basado en el número total de items.
-    
-    Args:
-        total_items (int): Número total de items a procesar.
-    
-    Returns:
-        int: Tamaño óptimo del lote.
-    """
-    if total_items <= 10:
-        return total_items
-    elif total_items <= 30:
-        return 10
-    else:
-        return 20
-
 def get_processor_info() -> Tuple[int, int]:
     """
     Obtiene información sobre el procesador.
@@ -160,11 +452,13 @@ def get_processor_info() -> Tuple[int, int]:
     Returns:
         Tuple[int, int]: Número de núcleos físicos y lógicos del procesador.
     """
+    # psutil es una biblioteca que permite obtener información sobre el sistema y los procesos en ejecución.
+    import psutil
     physical_cores = psutil.cpu_count(logical=False)
     logical_cores = cpu_count()  # Usando cpu_count de multiproceso
     return physical_cores, logical_cores
 
-def select_processing_intensity(cpu_count_logical: int) -> int:
+def select_processing_intensity(cpu_count_logical: int) -> Tuple[int, bool]:
     """
     Permite al usuario seleccionar la intensidad de procesamiento.
     
@@ -172,53 +466,297 @@ def select_processing_intensity(cpu_count_logical: int) -> int:
         cpu_count_logical (int): Número de núcleos lógicos del procesador.
     
     Returns:
-        int: Número de núcleos a utilizar para el procesamiento.
+        Tuple[int, bool]: Número de núcleos a utilizar para el procesamiento y si la cantidad
+        de trabajos simultáneos se ajusta según la carga (en ese caso el número es el máximo).
     """
     while True:
         print("\nSeleccione la intensidad de procesamiento:")
         print(f"1 - Baja (25% de núcleos - {max(cpu_count_logical // 4, 1)} núcleos)")
         print(f"2 - Media (50% de núcleos - {max(cpu_count_logical // 2, 1)} núcleos)")
         print(f"3 - Alta ({cpu_count_logical - 1} núcleos)")
+        print(f"4 - Adaptativa (según la carga de CPU, disco y memoria, hasta {max(cpu_count_logical - 1, 1)} núcleos)")
         
         try:
-            choice = int(input("Ingrese su elección (1-3): "))
+            choice = int(input("Ingrese su elección (1-4): "))
             if choice == 1:
-                return max(cpu_count_logical // 4, 1)
+                return max(cpu_count_logical // 4, 1), False
             elif choice == 2:
-                return max(cpu_count_logical // 2, 1)
+                return max(cpu_count_logical // 2, 1), False
             elif choice == 3:
-                return max(cpu_count_logical - 1, 1)
+                return max(cpu_count_logical - 1, 1), False
+            elif choice == 4:
+                return max(cpu_count_logical - 1, 1), True
             else:
-                logging.warning("Por favor, seleccione una opción válida (1-3)")
+                logging.warning("Por favor, seleccione una opción válida (1-4)")
         except ValueError:
             logging.warning("Por favor, ingrese un número válido")
 
-def process_batch(batch_items: List[Dict[str, Any]], input_folder: str, output_folder: str, 
-                 path_log_not_found: str, path_log_errors: str, num_processes: int) -> List[bool]:
+def select_executor() -> str:
+    """
+    Permite al usuario elegir cómo se ejecutan los cortes.
+    
+    Returns:
+        str: 'procesos' para el pool de procesos o 'asyncio' para hilos con asyncio.
+    """
+    while True:
+        print("\nSeleccione el ejecutor de los cortes:")
+        print("1 - Pool de procesos (un proceso de Python por trabajo)")
+        print("2 - Asyncio (hilos que solo esperan a ffmpeg, menos memoria)")
+        
+        choice = input("Ingrese su elección (1-2): ").strip()
+        if choice == '1':
+            return EXECUTOR_PROCESSES
+        elif choice == '2':
+            return EXECUTOR_ASYNCIO
+        logging.warning("Por favor, seleccione una opción válida (1-2)")
+
+def select_cut_mode() -> str:
+    """
+    Permite al usuario elegir el modo de corte.
+    
+    Returns:
+        str: Uno de cutVideo.MODE_COPY, cutVideo.MODE_SMART o cutVideo.MODE_REENCODE.
+    """
+    while True:
+        print("\nSeleccione el modo de corte:")
+        print("1 - Copia (muy rápido, el corte arranca en el fotograma clave anterior)")
+        print("2 - Inteligente (exacto, recodifica solo el inicio de cada corte)")
+        print("3 - Recodificar todo (exacto, muy lento)")
+        
+        choice = input("Ingrese su elección (1-3): ").strip()
+        if choice == '1':
+            return cutVideo.MODE_COPY
+        elif choice == '2':
+            return cutVideo.MODE_SMART
+        elif choice == '3':
+            return cutVideo.MODE_REENCODE
+        logging.warning("Por favor, seleccione una opción válida (1-3)")
+
+def select_scheduling_policy() -> str:
     """
-    Procesa un lote de videos.
+    Permite al usuario elegir en qué orden se procesan los videos.
+    
+    Returns:
+        str: Una de las políticas de schedulingPolicy.
+    """
+    while True:
+        print("\nSeleccione el orden de procesamiento:")
+        print("1 - Más largos primero (menor tiempo total, analiza todos los videos antes de empezar)")
+        print("2 - Más cortos primero (los primeros resultados salen antes)")
+        print("3 - Orden del CSV (empieza a cortar mientras lee el CSV)")
+        
+        choice = input("Ingrese su elección (1-3): ").strip()
+        if choice == '1':
+            return schedulingPolicy.POLICY_LONGEST_FIRST
+        elif choice == '2':
+            return schedulingPolicy.POLICY_SHORTEST_FIRST
+        elif choice == '3':
+            return schedulingPolicy.POLICY_CSV
+        logging.warning("Por favor, seleccione una opción válida (1-3)")
+
+def pending_jobs(items: Iterable[CutJob], output_folder: str, job_manifest: Manifest,
+                 counts: Dict[str, int], diff_mode: bool = False,
+                 mark_running: bool = True) -> Iterator[Tuple[CutJob, bool]]:
+    """
+    Descarta los trabajos cuya salida ya está lista y registra el resto como en curso.
+    
+    Cada fila se compara con el manifiesto por el hash de su ID y sus cortes: las nuevas y las
+    que cambiaron se procesan, las que no cambiaron y quedaron listas son aciertos de caché.
+    En modo diferencias se confía en el manifiesto sin revisar los archivos de salida, así
+    un CSV de correcciones con pocas filas cambiadas se resuelve sin tocar el disco.
     
     Args:
-        batch_items (List[Dict[str, Any]]): Lista de items a procesar.
+        items (Iterable[CutJob]): Trabajos leídos del CSV.
+        output_folder (str): Carpeta de salida donde se guardarán los videos editados.
+        job_manifest (Manifest): Manifiesto de la carpeta de salida.
+        counts (Dict[str, int]): Contadores 'nuevos', 'cambiados', 'reintentos' y 'sin_cambios'
+            que se actualizan a medida que se recorren los trabajos.
+        diff_mode (bool): Si las filas sin cambios se descartan sin verificar su salida.
+        mark_running (bool): Si se registran como en curso; en una ejecución repartida se
+            registran al reclamarlos (ver jobLeases.LeaseTable.claimed_jobs).
+    
+    Yields:
+        Tuple[CutJob, bool]: Trabajo a procesar y si se puede aceptar una salida existente
+        sin registro en el manifiesto.
+    """
+    previous = job_manifest.snapshot()
+    for job in items:
+        record = previous.get(job.id)
+        if record is None:
+            counts['nuevos'] += 1
+        elif record[1] != manifest.cuts_hash(job):
+            counts['cambiados'] += 1
+            logging.info(f'ID {job.id} CAMBIARON SUS CORTES')
+        elif record[0] == manifest.STATE_DONE and (
+                # Mismo criterio que Manifest.is_verified, con el registro ya cargado y sin una consulta por fila
+                diff_mode or manifest.output_matches(os.path.join(output_folder, f'{job.id}.mp4'), record[2])):
+            counts['sin_cambios'] += 1
+            logging.debug(f'ID {job.id} YA FUE EDITADO')
+            continue
+        else:
+            # Mismos cortes pero falló, no se encontró o su salida no coincide con el manifiesto
+            counts['reintentos'] += 1
+        if mark_running:
+            job_manifest.mark_running(job)
+        yield job, record is None
+
+def _run_jobs(func: Callable[[Any], Any], args: Iterable[Any], num_processes: int,
+              input_index: Dict[str, Dict[str, Any]], executor: str, settings: Optional[Dict[str, Any]],
+              controller: Optional['AdaptiveController'],
+              followups: Optional[Callable[[Any], Iterable[Any]]] = None) -> Iterator[Any]:
+    if executor == EXECUTOR_ASYNCIO:
+        import asyncRunner
+        # Los hilos comparten este proceso, el índice se carga aquí mismo
+        init_worker(input_index, settings)
+        limit = controller.limit if controller is not None else None
+        yield from asyncRunner.AsyncJobRunner(num_processes, limit).imap_unordered(func, args, followups)
+        return
+    with Pool(processes=num_processes, initializer=init_worker, initargs=(input_index, settings)) as pool:
+        if controller is not None:
+            # Sin cola: los trabajos enviados son exactamente los que corren, y el resto de los procesos espera
+            yield from scheduler.imap_unordered_bounded(pool, func, args, controller.limit, followups)
+            return
+        # Cola acotada: cada proceso tiene un video en curso y otro esperando
+        yield from scheduler.imap_unordered_bounded(pool, func, args, num_processes * 2, followups)
+
+def watch_jobs(items: Iterable[Tuple[CutJob, bool]], input_index: Dict[str, Dict[str, Any]],
+               watcher: InputWatcher, until_complete: bool = False) -> Iterator[Any]:
+    """
+    Entrega los trabajos con su video de entrada y espera los videos que todavía no llegaron.
+    
+    Los trabajos cuyo video ya está completo salen primero; el resto queda en memoria y sale
+    apenas su video termina de escribirse en la carpeta de entrada. Mientras no llega ninguno
+    se entrega scheduler.IDLE para que los resultados en curso se sigan registrando.
+    
+    Por defecto se sigue vigilando hasta Ctrl+C aunque ya hayan llegado todos: si vuelve a
+    llegar el video de un ID ya entregado (con otro tamaño o fecha), sus trabajos se cortan
+    de nuevo sin aceptar la salida anterior.
+    
+    Args:
+        items (Iterable[Tuple[CutJob, bool]]): Trabajos a procesar (ver pending_jobs).
+        input_index (Dict[str, Dict[str, Any]]): Índice ID -> video, se completa con los que llegan.
+        watcher (InputWatcher): Vigilancia de la carpeta de entrada.
+        until_complete (bool): Si se termina apenas llegaron todos los videos esperados.
+    
+    Yields:
+        Any: Cada trabajo con la ruta de su video de entrada, o scheduler.IDLE.
+    """
+    waiting: Dict[str, List[Tuple[CutJob, bool]]] = {}
+    delivered: Dict[str, List[Tuple[CutJob, bool]]] = {}
+    watcher.wanted = lambda id: id in waiting or (not until_complete and id in delivered)
+    for item in items:
+        source_id = item[0].source_id
+        input_video_path = inputIndex.find_input_video(input_index, source_id)
+        if input_video_path and not watcher.is_settling(source_id):
+            delivered.setdefault(source_id, []).append(item)
+            yield item, input_video_path
+        else:
+            waiting.setdefault(source_id, []).append(item)
+    if waiting:
+        logging.info(f'Esperando {sum(len(jobs) for jobs in waiting.values())} videos que todavía no llegaron')
+    elif not until_complete:
+        logging.info('Se sigue vigilando la carpeta de entrada hasta Ctrl+C')
+    while waiting or (delivered and not until_complete):
+        ready = watcher.poll()
+        if not ready:
+            yield scheduler.IDLE
+            continue
+        for source_id, entry in ready:
+            jobs = waiting.pop(source_id, None)
+            arrived = jobs is not None
+            if arrived:
+                message = 'llegó su video de entrada'
+                delivered.setdefault(source_id, []).extend(jobs)
+            else:
+                previous = input_index.get(source_id)
+                if previous is not None and (previous['size'], previous['mtime']) == (entry['size'], entry['mtime']):
+                    continue
+                message = 'llegó otra versión de su video de entrada, se corta de nuevo'
+                jobs = [(job, False) for job, _ in delivered.get(source_id, [])]
+            input_index[source_id] = entry
+            for item in jobs:
+                logging.info(f'ID {item[0].id}: {message}')
+                yield item, entry['path']
+            if arrived and not waiting:
+                logging.info('Llegaron todos los videos esperados' if until_complete else
+                             'Llegaron todos los videos esperados, se sigue vigilando la carpeta de entrada hasta Ctrl+C')
+
+def _video_tasks(staged: Iterable[Any], input_folder: str, cut_folder: str) -> Iterator[Any]:
+    for entry in staged:
+        if entry is scheduler.IDLE:
+            yield entry
+            continue
+        (job, adopt_existing), input_path = entry
+        yield TASK_VIDEO, (job, input_folder, cut_folder, adopt_existing, input_path)
+
+def process_stream(items: Iterable[Any], input_folder: str, output_folder: str, num_processes: int,
+                   input_index: Dict[str, Dict[str, Any]], executor: str = EXECUTOR_PROCESSES,
+                   settings: Optional[Dict[str, Any]] = None,
+                   controller: Optional['AdaptiveController'] = None,
+                   fan_out: bool = False, staging: Optional[StagingArea] = None,
+                   located: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Procesa los videos con un pool de larga vida, arrancando el siguiente apenas se libera un núcleo.
+    
+    Args:
+        items (Iterable[Any]): Trabajos a procesar (ver pending_jobs), puede ser un generador; con
+            fan_out, grupos de trabajos (ver schedulingPolicy.group_by_source).
         input_folder (str): Carpeta de entrada donde se encuentran los videos sin editar.
         output_folder (str): Carpeta de salida donde se guardarán los videos editados.
-        path_log_not_found (str): Ruta del archivo de log para IDs no encontrados.
-        path_log_errors (str): Ruta del archivo de log para errores.
-        num_processes (int): Número de procesos a utilizar.
+        num_processes (int): Número de procesos a utilizar (el máximo si hay controlador).
+        input_index (Dict[str, Dict[str, Any]]): Índice ID -> video de la carpeta de entrada.
+        executor (str): EXECUTOR_PROCESSES o EXECUTOR_ASYNCIO.
+        settings (Optional[Dict[str, Any]]): Opciones de la ejecución para init_worker.
+        controller (Optional[AdaptiveController]): Si se indica, decide cuántos trabajos hay en
+            curso según la carga de la máquina.
+        fan_out (bool): Si cada item es un grupo de trabajos que comparten el video de entrada.
+        staging (Optional[StagingArea]): Si se indica, los videos se copian a una carpeta local
+            antes de cortarlos y las salidas se mueven después a output_folder.
+        located (bool): Si cada item ya viene con la ruta de su video de entrada, o es
+            scheduler.IDLE (ver watch_jobs).
     
-    Returns:
-        List[bool]: Lista de resultados de procesamiento para cada video.
+    Yields:
+        Dict[str, Any]: Resultado de cada video, en el orden en que terminan.
     """
-    with Pool(processes=num_processes) as pool:
-        args = [(item, input_folder, output_folder, path_log_not_found, path_log_errors) 
-               for item in batch_items]
-        return pool.map(process_video, args)
+    if staging is not None:
+        # Los cortes leen la copia local y escriben en la carpeta local de salida
+        staged = staging.stage_in(items)
+        cut_folder = staging.out_dir
+        settings = {**(settings or {}), 'adopt_folder': output_folder}
+    elif located:
+        staged = items
+        cut_folder = output_folder
+    else:
+        staged = ((item, None) for item in items)
+        cut_folder = output_folder
+    
+    if fan_out:
+        args = ((group, input_folder, cut_folder, input_path)
+                for group, input_path in staged)
+        results = (result for group_results in _run_jobs(process_group, args, num_processes, input_index,
+                                                         executor, settings, controller)
+                   for result in group_results)
+    else:
+        # Los tramos y uniones de los videos repartidos comparten el pool y el límite con los videos completos
+        tracker = _SplitTracker()
+        args = _video_tasks(staged, input_folder, cut_folder)
+        results = (result for result in _run_jobs(run_task, args, num_processes, input_index, executor, settings,
+                                                  controller, tracker.followups)
+                   if tracker.is_final(result))
+    
+    if staging is not None:
+        yield from staging.stage_out(results, output_folder)
+    else:
+        yield from results
 
 def main() -> None:
     """
     Función principal que coordina la ejecución del programa.
     """
-    csv_path = r'C:\Users\Lenovo\Desktop\corte-actualizado\corte-video\python-video-editor-ffmpeg\SUBSANACIONES-KOLIBRI-CORTES.csv'
+    csv_path = input('\nIngrese la ruta del archivo CSV con los cortes: ').strip()
+    if not os.path.isfile(csv_path):
+        logging.error(f'El archivo CSV {csv_path} no existe')
+        return
     
     # Mostrar información del procesador
     cpu_physical, cpu_logical = get_processor_info()
@@ -226,8 +764,20 @@ def main() -> None:
     logging.info(f"Núcleos lógicos: {cpu_logical}")
     
     # Seleccionar intensidad de procesamiento
-    num_processes = select_processing_intensity(cpu_logical)
-    logging.info(f"Procesando con {num_processes} núcleos")
+    num_processes, adaptive = select_processing_intensity(cpu_logical)
+    if adaptive:
+        logging.info(f"Procesando con hasta {num_processes} núcleos según la carga")
+    else:
+        logging.info(f"Procesando con {num_processes} núcleos")
+    
+    executor = select_executor()
+    logging.info(f"Ejecutor seleccionado: {executor}")
+    
+    cut_mode = select_cut_mode()
+    logging.info(f"Modo de corte: {cut_mode}")
+    
+    policy = select_scheduling_policy()
+    logging.info(f"Orden de procesamiento: {policy}")
     
     input_folder = input('\nIngrese la carpeta donde se encuentran los videos sin editar: ').strip()
     if not verify_directory(input_folder, 'El directorio de entrada'):
@@ -237,49 +787,177 @@ def main() -> None:
     if not verify_directory(output_folder, 'El directorio de salida'):
         return
     
+    # Varias filas pueden cortar el mismo video de entrada (columna FUENTE del CSV)
+    fan_out = input('¿Cortar en una sola lectura los IDs que comparten video de entrada? (s/n): ').strip().lower() == 's'
+    
+    # Los videos largos con varios cortes reparten sus tramos entre los procesos libres
+    split_segments = input('¿Cortar en paralelo los tramos de los videos largos? (s/n): ').strip().lower() == 's'
+    
+    # Con la entrada en una carpeta de red, los videos se copian primero a un disco local
+    scratch_folder = input('Carpeta local para copiar los videos antes de cortarlos (vacío para leer directo): ').strip()
+    staging_budget_gb = staging.DEFAULT_BUDGET_GB
+    if scratch_folder:
+        try:
+            staging_budget_gb = float(input(f'Espacio máximo para las copias en GB ({staging.DEFAULT_BUDGET_GB}): ').strip()
+                                      or staging.DEFAULT_BUDGET_GB)
+        except ValueError:
+            logging.warning(f'Valor inválido, se usan {staging.DEFAULT_BUDGET_GB} GB')
+    
+    # Varias máquinas con el mismo CSV y la misma carpeta de salida se reparten los trabajos
+    shared_folder = input('Carpeta compartida para repartir los trabajos entre varias máquinas (vacío para usar solo esta): ').strip()
+    if shared_folder and not verify_directory(shared_folder, 'El directorio compartido'):
+        return
+    
+    # Los IDs cuyo video todavía no está en la carpeta de entrada se cortan apenas llega
+    watch = input('¿Quedarse esperando los videos que todavía no llegaron a la carpeta de entrada? (s/n): ').strip().lower() == 's'
+    # Si no, se sigue vigilando hasta Ctrl+C y se vuelve a cortar un ID si llega otra versión de su video
+    until_complete = watch and input('¿Terminar apenas lleguen todos los videos del CSV? (s/n): ').strip().lower() == 's'
+    
+    # En modo diferencias solo se procesan las filas nuevas o con cortes distintos a la ejecución anterior
+    diff_mode = input('¿Procesar solo las filas nuevas o con cambios? (s/n): ').strip().lower() == 's'
+    
+    run(readCSV.iterDataCSV(csv_path), input_folder, output_folder, num_processes, adaptive, executor, cut_mode,
+        policy, fan_out, split_segments, scratch_folder, staging_budget_gb, shared_folder, watch, diff_mode, csv_path,
+        until_complete)
+
+def run(jobs: Iterable[CutJob], input_folder: str, output_folder: str, num_processes: int,
+        adaptive: bool = False, executor: str = EXECUTOR_PROCESSES, cut_mode: str = cutVideo.MODE_COPY,
+        policy: str = schedulingPolicy.POLICY_CSV, fan_out: bool = False, split_segments: bool = False,
+        scratch_folder: str = '', staging_budget_gb: float = staging.DEFAULT_BUDGET_GB,
+        shared_folder: str = '', watch: bool = False, diff_mode: bool = False,
+        csv_path: Optional[str] = None, until_complete: bool = False) -> Optional[Tuple[int, int]]:
+    """
+    Procesa una lista de trabajos con las opciones elegidas en main o en cli.
+    
+    Args:
+        jobs (Iterable[CutJob]): Trabajos a cortar, por ejemplo readCSV.iterDataCSV; puede ser un generador.
+        input_folder (str): Carpeta de entrada donde se encuentran los videos sin editar.
+        output_folder (str): Carpeta de salida donde se guardarán los videos editados.
+        num_processes (int): Número de procesos a utilizar (el máximo si es adaptativo).
+        adaptive (bool): Si la cantidad de trabajos simultáneos se ajusta según la carga.
+        executor (str): EXECUTOR_PROCESSES o EXECUTOR_ASYNCIO.
+        cut_mode (str): Modo de corte (cutVideo.MODE_*).
+        policy (str): Orden de procesamiento (schedulingPolicy.POLICY_*).
+        fan_out (bool): Si los IDs que comparten video de entrada se cortan en una sola lectura.
+        split_segments (bool): Si los tramos de los videos largos se cortan en paralelo.
+        scratch_folder (str): Carpeta local donde copiar los videos antes de cortarlos; vacío para leer directo.
+        staging_budget_gb (float): Espacio máximo de las copias locales.
+        shared_folder (str): Carpeta compartida para repartir los trabajos entre máquinas; vacío para usar solo esta.
+        watch (bool): Si se espera a los videos que todavía no llegaron a la carpeta de entrada.
+        diff_mode (bool): Si solo se procesan las filas nuevas o con cortes distintos.
+        csv_path (Optional[str]): CSV de los trabajos; necesario para repartirlos entre máquinas.
+        until_complete (bool): Con watch, si se termina apenas llegaron todos los videos del CSV;
+            si no, se sigue vigilando la carpeta de entrada hasta Ctrl+C (ver watch_jobs).
+    
+    Returns:
+        Optional[Tuple[int, int]]: Videos editados y videos procesados, o None si la ejecución
+        se interrumpió por un error general.
+    """
+    if shared_folder:
+        if csv_path is None:
+            logging.warning('Solo se reparten entre máquinas los trabajos de un CSV')
+            shared_folder = ''
+        elif fan_out:
+            logging.warning('El corte en una sola lectura no se usa al repartir los trabajos entre máquinas')
+            fan_out = False
+    if watch:
+        if shared_folder:
+            logging.warning('La espera de videos nuevos no se usa al repartir los trabajos entre máquinas')
+            watch = False
+        else:
+            if fan_out:
+                logging.warning('El corte en una sola lectura no se usa mientras se esperan videos nuevos')
+                fan_out = False
+            if scratch_folder:
+                logging.warning('La copia a una carpeta local no se usa mientras se esperan videos nuevos')
+                scratch_folder = ''
+    
     path_log_not_found, path_log_errors = create_log_files()
+    staging_area = None
+    lease_table = None
+    watcher = None
+    run_prefix = os.path.join(os.getcwd(), LOG_DIR, datetime.datetime.now().strftime("%Y%m%d-%H%M%S"))
+    # Cada proceso escribe ahí los tiempos de sus etapas; al terminar se juntan en un Chrome trace
+    trace_dir = f'{run_prefix}-traza'
+    tracing.configure(trace_dir)
+    # Los ffmpeg informan su avance por esta cola; el estado se publica en el log y en un JSON
+    progress_queue = Queue()
+    monitor = ProgressMonitor(progress_queue, f'{run_prefix}-estado.json')
+    # Un solo hilo escribe la consola, los logs de texto y el JSONL de resultados de todos los procesos
+    run_log = RunLog(path_log_not_found, path_log_errors, f'{run_prefix}-resultados.jsonl')
+    run_log.start()
     
     try:
         start_time = time.time()
-        items = readCSV.readDataCSV(csv_path)
-        total_items = len(items)
-        logging.info(f'{total_items} videos para editar')
-        
-        # Calcular tamaño óptimo de lote
-        batch_size = calculate_optimal_batch_size(total_items)
-        total_batches = (total_items + batch_size - 1) // batch_size
+        input_index = inputIndex.build_input_index(input_folder)
+        job_manifest = Manifest.for_output(output_folder, shared=bool(shared_folder))
+        # Con el orden del CSV, se lee por bloques mientras los primeros videos ya se están cortando
+        counts = {'nuevos': 0, 'cambiados': 0, 'reintentos': 0, 'sin_cambios': 0}
+        controller = None
+        if adaptive:
+            from adaptiveConcurrency import AdaptiveController
+            controller = AdaptiveController(num_processes)
+        items = pending_jobs(jobs, output_folder, job_manifest, counts, diff_mode, mark_running=not shared_folder)
+        if shared_folder:
+            # Todas las máquinas cargan la misma lista ordenada; cada una reclama un trabajo por núcleo libre
+            lease_table = LeaseTable.for_csv(shared_folder, csv_path)
+            jobs = list(schedulingPolicy.order_jobs(items, input_index, policy, cut_mode, max_workers=num_processes))
+            seeded = lease_table.seed(job for job, _ in jobs)
+            logging.info(f'Nodo {lease_table.node}: {seeded} trabajos nuevos en la tabla compartida {lease_table.path}')
+            lease_table.start_heartbeat()
+            rounds = (monitor.track(claimed) for claimed in lease_table.rounds(jobs, job_manifest))
+        else:
+            items = schedulingPolicy.order_jobs(monitor.track(items), input_index, policy, cut_mode,
+                                                max_workers=num_processes)
+            if fan_out:
+                items = schedulingPolicy.group_by_source(items, input_index)
+            if watch:
+                watcher = InputWatcher(input_folder)
+                items = watch_jobs(items, input_index, watcher, until_complete)
+            rounds = [items]
+        if scratch_folder:
+            # Se preparan por adelantado tantos videos como trabajos pueden estar en vuelo
+            staging_area = StagingArea(scratch_folder, input_index, int(staging_budget_gb * 1024 ** 3),
+                                       lookahead=num_processes * 2)
         
+        # Los tramos cortados quedan en una caché junto a la salida para reutilizarlos en otras ejecuciones
+        settings = {'cut_mode': cut_mode, 'segment_cache_dir': segmentCache.for_output(output_folder),
+                    # Los grupos del corte en abanico ya leen su video una sola vez, no se reparten
+                    'split_segments': split_segments and not fan_out, 'trace_dir': trace_dir,
+                    'progress_queue': progress_queue, 'log_queue': run_log.queue}
         successful_edits = 0
+        processed = 0
+        monitor.start()
+        
+        # Al repartir entre máquinas hay otra ronda si vence el préstamo de un trabajo de otra máquina
+        try:
+            for round_items in rounds:
+                for result in process_stream(round_items, input_folder, output_folder, num_processes, input_index,
+                                             executor, settings, controller, fan_out, staging_area, watch):
+                    job_manifest.record_result(result)
+                    run_log.record_result(result)
+                    if lease_table is not None:
+                        lease_table.complete(result['id'], result['state'])
+                    monitor.finish(result['id'])
+                    processed += 1
+                    if result['state'] == manifest.STATE_DONE:
+                        successful_edits += 1
+                    logging.info(f"Videos procesados: {processed}")
+        except KeyboardInterrupt:
+            if not watch or until_complete:
+                raise
+            # Vigilando sin fin, Ctrl+C es la forma de terminar; lo que quedó en curso se corta en la próxima ejecución
+            logging.info('Vigilancia de la carpeta de entrada detenida con Ctrl+C')
+        job_manifest.close()
+        segmentCache.configure(settings['segment_cache_dir'])
+        segmentCache.evict()
         
-        for batch_num in range(total_batches):
-            start_idx = batch_num * batch_size
-            end_idx = min(start_idx + batch_size, total_items)
-            current_batch = items[start_idx:end_idx]
-            
-            logging.info(f"Procesando lote {batch_num + 1}/{total_batches}")
-            logging.info(f"Videos {start_idx + 1} a {end_idx} de {total_items}")
-            
-            # Verificar temperatura antes de procesar el lote
-            # No funciona, depende mucho del fabricante de la CPU
-            # temp = get_cpu_temperature()
-            # if temp and temp > TEMP_LIMIT:
-            #     logging.warning(f"¡ADVERTENCIA! Temperatura CPU alta: {temp}°C")
-            #     logging.info("Pausando por 2 minutos para enfriamiento...")
-            #     time.sleep(120)
-            
-            # Procesar el lote
-            results = process_batch(current_batch, input_folder, output_folder,
-                                 path_log_not_found, path_log_errors, num_processes)
-            
-            successful_edits += sum(1 for result in results if result)
-            
-            # Pequeña pausa entre lotes
-            if batch_num < total_batches - 1:
-                # Sugiero cambiar esta linea ya que usar los nucleos excplusivamente para este proceso aumenta la temperatura
-                # del procesador y causa problemas de rendimiento
-                # Preguntar sobre tiempos de espera entre lotes
-                logging.info("Pausa de 10 segundos entre lotes...") 
-                time.sleep(1)
+        logging.info(f"Filas nuevas: {counts['nuevos']}, con cambios: {counts['cambiados']}, "
+                     f"reintentos: {counts['reintentos']}, sin cambios (caché): {counts['sin_cambios']}")
+        
+        # Los videos que no cambiaron desde la ejecución anterior cuentan como editados
+        successful_edits += counts['sin_cambios']
+        processed += counts['sin_cambios']
         
         end_time = time.time()
         total_process_time = end_time - start_time
@@ -288,16 +966,33 @@ def main() -> None:
         # Formatear el tiempo total de procesamiento a HH:MM:SS
         total_process_time_formatted = time.strftime("%H:%M:%S", time.gmtime(total_process_time))
         
-        logging.info(f'Se editaron {successful_edits} de {total_items} videos')
+        logging.info(f'Se editaron {successful_edits} de {processed} videos')
         logging.info(f'Tiempo total de procesamiento: {total_process_time_formatted}')
+        return successful_edits, processed
         
     except Exception as e:
         logging.error(f'Error general en la ejecución: {str(e)}')
+        return None
     finally:
+        monitor.close()
+        if staging_area is not None:
+            staging_area.close()
+        if lease_table is not None:
+            lease_table.close()
+        if watcher is not None:
+            watcher.close()
+        try:
+            trace_path, summary = tracing.write_report(trace_dir)
+            logging.info(f'Tiempos por etapa:\n{summary}')
+            logging.info(f'Línea de tiempo (chrome://tracing o Perfetto): {trace_path}')
+        except OSError as e:
+            logging.warning(f'No se pudo guardar la línea de tiempo: {str(e)}')
         if os.path.exists(path_log_not_found) or os.path.exists(path_log_errors):
             logging.info("Archivos de log creados:")
             logging.info(f"No encontrados: {path_log_not_found}")
             logging.info(f"Errores: {path_log_errors}")
+            logging.info(f"Resultados: {run_log.path_results}")
+        run_log.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,188 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from cutJob import CutJob
+
+MANIFEST_NAME = 'manifiesto.sqlite3'
+
+STATE_RUNNING = 'en_curso'
+STATE_DONE = 'listo'
+STATE_ERROR = 'error'
+STATE_NOT_FOUND = 'no_encontrado'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    cuts_hash TEXT NOT NULL,
+    input_path TEXT,
+    input_size INTEGER,
+    input_mtime INTEGER,
+    output_path TEXT,
+    output_size INTEGER,
+    error TEXT,
+    updated_at REAL NOT NULL
+)
+'''
+
+def cuts_hash(job: CutJob) -> str:
+    """
+    Calcula el hash del ID, la lista de cortes y el video de entrada de un trabajo.
+
+    Args:
+        job (CutJob): Trabajo a identificar.
+
+    Returns:
+        str: Hash hexadecimal; cambia si cambia cualquier corte o el video de entrada.
+    """
+    digest = hashlib.sha1(f'{job.id}|'.encode('utf-8'))
+    digest.update(job.segments.tobytes())
+    # Sin video de entrada propio el hash queda igual que en los manifiestos anteriores
+    if job.source is not None:
+        digest.update(f'|{job.source}'.encode('utf-8'))
+    return digest.hexdigest()
+
+def output_matches(output_path: str, output_size: Optional[int]) -> bool:
+    """
+    Indica si un video editado existe con el tamaño registrado en el manifiesto.
+
+    Args:
+        output_path (str): Ruta del video editado.
+        output_size (Optional[int]): Tamaño registrado.
+
+    Returns:
+        bool: True si el archivo existe y tiene ese tamaño.
+    """
+    try:
+        return os.path.getsize(output_path) == output_size
+    except OSError:
+        return False
+
+class Manifest:
+    """
+    Registro persistente del estado de cada trabajo de una carpeta de salida.
+
+    Solo el proceso principal escribe en el manifiesto; los procesos de trabajo devuelven
+    su resultado y el principal lo registra, así no hay escrituras concurrentes en SQLite.
+    En una ejecución repartida entre varias máquinas (ver jobLeases) cada una tiene su
+    proceso principal escribiendo en el mismo manifiesto.
+    """
+
+    def __init__(self, path: str, shared: bool = False) -> None:
+        """
+        Args:
+            path (str): Ruta del archivo SQLite del manifiesto.
+            shared (bool): Si varias máquinas lo abren a la vez desde una carpeta compartida.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # El ejecutor asyncio consume los trabajos desde otro hilo
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=60)
+        # WAL usa memoria compartida, que no existe entre máquinas
+        self._conn.execute('PRAGMA journal_mode=DELETE' if shared else 'PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def for_output(cls, output_folder: str, shared: bool = False) -> 'Manifest':
+        """
+        Abre el manifiesto de una carpeta de salida, creándolo si no existe.
+
+        Args:
+            output_folder (str): Carpeta de salida de los videos editados.
+            shared (bool): Si varias máquinas escriben en la misma carpeta de salida.
+
+        Returns:
+            Manifest: Manifiesto abierto.
+        """
+        return cls(os.path.join(output_folder, MANIFEST_NAME), shared)
+
+    def get(self, id: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna el registro de un trabajo.
+
+        Args:
+            id (str): ID del trabajo.
+
+        Returns:
+            Optional[Dict[str, Any]]: Registro con todas las columnas, o None si no existe.
+        """
+        with self._lock:
+            cursor = self._conn.execute('SELECT * FROM jobs WHERE id = ?', (id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return dict(zip([c[0] for c in cursor.description], row))
+
+    def snapshot(self) -> Dict[str, Tuple[str, str, Optional[int]]]:
+        """
+        Carga el estado de todos los trabajos con una sola consulta.
+
+        Returns:
+            Dict[str, Tuple[str, str, Optional[int]]]: ID -> (estado, hash de cortes, tamaño de salida).
+        """
+        with self._lock:
+            rows = self._conn.execute('SELECT id, state, cuts_hash, output_size FROM jobs').fetchall()
+        return {id: (state, digest, size) for id, state, digest, size in rows}
+
+    def is_verified(self, job: CutJob, output_path: str) -> bool:
+        """
+        Indica si la salida de un trabajo está terminada y corresponde a sus cortes actuales.
+
+        Args:
+            job (CutJob): Trabajo a verificar.
+            output_path (str): Ruta del video editado.
+
+        Returns:
+            bool: True si el manifiesto la registra como lista, con el mismo hash de cortes,
+            y el archivo existe con el tamaño registrado.
+        """
+        record = self.get(job.id)
+        if record is None or record['state'] != STATE_DONE or record['cuts_hash'] != cuts_hash(job):
+            return False
+        return output_matches(output_path, record['output_size'])
+
+    def mark_running(self, job: CutJob) -> None:
+        """
+        Registra que un trabajo se envió a procesar.
+
+        Args:
+            job (CutJob): Trabajo enviado.
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO jobs (id, state, cuts_hash, updated_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET state = excluded.state, cuts_hash = excluded.cuts_hash, '
+                'error = NULL, updated_at = excluded.updated_at',
+                (job.id, STATE_RUNNING, cuts_hash(job), time.time()))
+            self._conn.commit()
+
+    def record_result(self, result: Dict[str, Any]) -> None:
+        """
+        Registra el resultado que devolvió un proceso de trabajo.
+
+        Args:
+            result (Dict[str, Any]): Resultado de process_video, con 'id', 'state', 'cuts_hash'
+                y opcionalmente datos de entrada, salida y error.
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO jobs (id, state, cuts_hash, input_path, input_size, input_mtime, '
+                'output_path, output_size, error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET state = excluded.state, cuts_hash = excluded.cuts_hash, '
+                'input_path = excluded.input_path, input_size = excluded.input_size, '
+                'input_mtime = excluded.input_mtime, output_path = excluded.output_path, '
+                'output_size = excluded.output_size, error = excluded.error, updated_at = excluded.updated_at',
+                (result['id'], result['state'], result['cuts_hash'], result.get('input_path'),
+                 result.get('input_size'), result.get('input_mtime'), result.get('output_path'),
+                 result.get('output_size'), result.get('error'), time.time()))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
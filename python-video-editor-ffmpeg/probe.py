@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import base64
+import bisect
+import hashlib
+import subprocess
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from inputIndex import CACHE_DIR
+from cutJob import normalize_segments
+
+PROBE_DIR = 'probe'
+PROBE_VERSION = 2  # 2: fotogramas clave en microsegundos
+US_PER_MS = 1000
+
+STREAM_ENTRIES = ('index,codec_type,codec_name,profile,pix_fmt,width,height,r_frame_rate,'
+                  'time_base,sample_rate,channels,channel_layout,bit_rate')
+
+class ProbeInfo:
+    """
+    Información de un video de entrada: duración, fotogramas clave y flujos.
+
+    Los fotogramas clave se guardan como un array ordenado de microsegundos para poder
+    buscarlos con bisect. No se redondean a milisegundos: un fotograma en 1.0333 s guardado
+    como 1033 ms queda antes del fotograma real, y un -ss de entrada en 1.033 arranca en el
+    fotograma clave anterior (ver seek_ms).
+    """
+    __slots__ = ('duration_ms', 'keyframes', 'streams')
+
+    def __init__(self, duration_ms: int, keyframes: array, streams: List[Dict[str, Any]]) -> None:
+        """
+        Args:
+            duration_ms (int): Duración del video en milisegundos.
+            keyframes (array): Tiempos de los fotogramas clave del primer flujo de video, en µs.
+            streams (List[Dict[str, Any]]): Flujos del archivo tal como los reporta ffprobe.
+        """
+        self.duration_ms = duration_ms
+        self.keyframes = keyframes
+        self.streams = streams
+
+    def stream(self, codec_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Retorna el primer flujo de un tipo ('video' o 'audio').
+
+        Args:
+            codec_type (str): Tipo de flujo.
+
+        Returns:
+            Optional[Dict[str, Any]]: Flujo encontrado, o None.
+        """
+        return next((s for s in self.streams if s.get('codec_type') == codec_type), None)
+
+    def to_json(self) -> Dict[str, Any]:
+        keyframes = self.keyframes
+        if sys.byteorder != 'little':
+            keyframes = array('q', keyframes)
+            keyframes.byteswap()
+        return {
+            'version': PROBE_VERSION,
+            'duration_ms': self.duration_ms,
+            'keyframes': base64.b64encode(keyframes.tobytes()).decode('ascii'),
+            'streams': self.streams,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'ProbeInfo':
+        keyframes = array('q')
+        keyframes.frombytes(base64.b64decode(data['keyframes']))
+        if sys.byteorder != 'little':
+            keyframes.byteswap()
+        return cls(data['duration_ms'], keyframes, data['streams'])
+
+def _cache_path(path: str, size: int, mtime_ns: int) -> str:
+    key = f'{os.path.abspath(path)}|{size}|{mtime_ns}'
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(os.getcwd(), CACHE_DIR, PROBE_DIR, digest[:2], f'{digest}.json')
+
+def _run_ffprobe(path: str) -> ProbeInfo:
+    """
+    Ejecuta ffprobe sobre un video.
+
+    Los fotogramas clave se obtienen de los paquetes (bandera K), sin decodificar el video.
+
+    Args:
+        path (str): Ruta del video.
+
+    Returns:
+        ProbeInfo: Información del video.
+
+    Raises:
+        subprocess.CalledProcessError: Si ffprobe termina con error.
+    """
+    result = subprocess.run([
+        'ffprobe', '-v', 'error',
+        '-show_entries', f'format=duration:stream={STREAM_ENTRIES}',
+        '-of', 'json',
+        path
+    ], check=True, capture_output=True, text=True)
+    data = json.loads(result.stdout)
+    duration = data.get('format', {}).get('duration')
+    duration_ms = round(float(duration) * 1000) if duration not in (None, 'N/A') else 0
+
+    result = subprocess.run([
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-show_entries', 'packet=pts_time,flags',
+        '-of', 'csv=p=0',
+        path
+    ], check=True, capture_output=True, text=True)
+    keyframes = array('q')
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if 'K' in flags and pts_time not in ('', 'N/A'):
+            # ffprobe da los tiempos con seis decimales, la misma precisión con la que ffmpeg lee -ss
+            keyframes.append(round(float(pts_time) * 1000000))
+    # El orden de los paquetes es el de decodificación; con fotogramas B puede no estar ordenado
+    keyframes = array('q', sorted(keyframes))
+
+    return ProbeInfo(duration_ms, keyframes, data.get('streams', []))
+
+def probe_source(path: str, use_cache: bool = True) -> ProbeInfo:
+    """
+    Obtiene la información de un video, usando la caché en disco si el archivo no cambió.
+
+    La caché se identifica por ruta, tamaño y mtime, así un video que se reemplaza se vuelve
+    a analizar y uno que no cambió nunca se analiza dos veces.
+
+    Args:
+        path (str): Ruta del video.
+        use_cache (bool): Si se debe leer y guardar la caché en disco.
+
+    Returns:
+        ProbeInfo: Información del video.
+
+    Raises:
+        subprocess.CalledProcessError: Si ffprobe termina con error.
+    """
+    stat = os.stat(path)
+    cache_path = _cache_path(path, stat.st_size, stat.st_mtime_ns)
+    if use_cache:
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == PROBE_VERSION:
+                return ProbeInfo.from_json(data)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    info = _run_ffprobe(path)
+
+    if use_cache:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        # Varios procesos pueden analizar el mismo video, cada uno escribe su propio temporal
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(info.to_json(), f)
+        os.replace(tmp_path, cache_path)
+    return info
+
+def seek_ms(t_us: int, output_seek: bool = False) -> int:
+    """
+    Convierte el tiempo exacto de un fotograma al milisegundo que hay que pasar a -ss para caer en él.
+
+    Con -ss antes de -i (búsqueda de entrada) y -c copy, ffmpeg arranca en el último fotograma
+    clave en o antes del tiempo pedido, así que se redondea hacia arriba. Con -ss después de -i
+    (búsqueda de salida) se descartan los paquetes anteriores al tiempo pedido, así que se
+    redondea hacia abajo para no perder el fotograma clave.
+
+    Args:
+        t_us (int): Tiempo del fotograma en µs.
+        output_seek (bool): Si el -ss va después de -i.
+
+    Returns:
+        int: Tiempo en ms.
+    """
+    if output_seek:
+        return t_us // US_PER_MS
+    return -(-t_us // US_PER_MS)
+
+def keyframe_before(keyframes: Sequence[int], t_us: int) -> int:
+    """
+    Busca el último fotograma clave en o antes de un tiempo.
+
+    Args:
+        keyframes (Sequence[int]): Fotogramas clave ordenados, en µs.
+        t_us (int): Tiempo buscado, en µs.
+
+    Returns:
+        int: Tiempo del fotograma clave, o 0 si no hay ninguno antes.
+    """
+    i = bisect.bisect_right(keyframes, t_us)
+    return keyframes[i - 1] if i else 0
+
+def keyframe_after(keyframes: Sequence[int], t_us: int) -> Optional[int]:
+    """
+    Busca el primer fotograma clave en o después de un tiempo.
+
+    Args:
+        keyframes (Sequence[int]): Fotogramas clave ordenados, en µs.
+        t_us (int): Tiempo buscado, en µs.
+
+    Returns:
+        Optional[int]: Tiempo del fotograma clave, o None si no hay ninguno después.
+    """
+    i = bisect.bisect_left(keyframes, t_us)
+    return keyframes[i] if i < len(keyframes) else None
+
+def snap_segments(segments: Sequence[Tuple[int, int]], info: ProbeInfo, output_seek: bool = False) -> List[Tuple[int, int]]:
+    """
+    Ajusta los segmentos a los fotogramas clave del video para cortar copiando el flujo.
+
+    Con -c copy ffmpeg siempre arranca en el fotograma clave anterior al inicio pedido; al
+    mover el inicio a ese fotograma la duración del corte es exacta y el final no se corre.
+    El final se limita a la duración del video y, si al mover los inicios dos segmentos
+    quedan solapados, se unen.
+
+    El inicio se redondea al milisegundo según dónde va el -ss del motor que corta (ver seek_ms).
+
+    Args:
+        segments (Sequence[Tuple[int, int]]): Pares (inicio_ms, fin_ms).
+        info (ProbeInfo): Información del video de entrada.
+        output_seek (bool): Si el corte usa -ss después de -i, como cutVideo.cutFanOut.
+
+    Returns:
+        List[Tuple[int, int]]: Segmentos ajustados.
+    """
+    snapped = []
+    for start, end in segments:
+        if info.duration_ms:
+            end = min(end, info.duration_ms)
+        if info.keyframes:
+            start = seek_ms(keyframe_before(info.keyframes, start * US_PER_MS), output_seek)
+        snapped.append((start, end))
+    return normalize_segments(snapped)
@@ -0,0 +1,262 @@
+import os
+import json
+import time
+import queue
+import logging
+import datetime
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, Optional, Tuple
+
+# ffmpeg escribe su avance en stdout como bloques clave=valor terminados en progress=continue|end
+PROGRESS_ARGS = ['-progress', 'pipe:1', '-nostats']
+STATUS_INTERVAL = 10.0  # Segundos entre líneas de estado
+RATE_WINDOW_S = 60.0  # Ventana para medir la velocidad actual
+
+# Cola donde los procesos de corte informan su avance; None desactiva el seguimiento
+_sink: Optional[Any] = None
+
+def configure(sink: Optional[Any]) -> None:
+    """
+    Activa el envío del avance de ffmpeg a una cola.
+
+    Args:
+        sink (Optional[Any]): Cola con put() compartida con el proceso principal (por ejemplo
+            multiprocessing.Queue); None desactiva el seguimiento.
+    """
+    global _sink
+    _sink = sink
+
+def enabled() -> bool:
+    return _sink is not None
+
+def with_progress(cmd: list[str]) -> list[str]:
+    # Las opciones globales van antes de las entradas; el archivo de salida sigue siendo el último argumento
+    return [cmd[0], *PROGRESS_ARGS, *cmd[1:]]
+
+def report(media_s: float, written_bytes: int) -> None:
+    """
+    Informa al proceso principal el avance de un ffmpeg desde el último informe.
+
+    Args:
+        media_s (float): Segundos de video procesados.
+        written_bytes (int): Bytes escritos.
+    """
+    if _sink is None or (not media_s and not written_bytes):
+        return
+    try:
+        _sink.put((media_s, written_bytes))
+    except (OSError, ValueError):
+        # La cola ya se cerró al terminar la ejecución
+        pass
+
+class ProgressParser:
+    """
+    Lee la salida de -progress de un ffmpeg y calcula el avance desde el bloque anterior.
+    """
+
+    def __init__(self, count_media: bool = True) -> None:
+        """
+        Args:
+            count_media (bool): Si los segundos de salida cuentan como video procesado; la unión
+                de tramos ya contados solo suma bytes.
+        """
+        self.count_media = count_media
+        self._block: Dict[str, str] = {}
+        self._out_time_us = 0
+        self._total_size = 0
+
+    def feed(self, line: str) -> Optional[Tuple[float, int]]:
+        """
+        Procesa una línea de la salida de ffmpeg.
+
+        Args:
+            line (str): Línea clave=valor.
+
+        Returns:
+            Optional[Tuple[float, int]]: Segundos de video y bytes nuevos al cerrar un bloque, o None.
+        """
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return None
+        if key != 'progress':
+            self._block[key] = value
+            return None
+        block, self._block = self._block, {}
+        # Al arrancar ffmpeg informa N/A en los campos que todavía no conoce
+        out_time_us = self._int(block.get('out_time_us', block.get('out_time_ms')), self._out_time_us)
+        total_size = self._int(block.get('total_size'), self._total_size)
+        media_s = max(out_time_us - self._out_time_us, 0) / 1e6 if self.count_media else 0.0
+        written_bytes = max(total_size - self._total_size, 0)
+        self._out_time_us, self._total_size = max(out_time_us, self._out_time_us), max(total_size, self._total_size)
+        return media_s, written_bytes
+
+    @staticmethod
+    def _int(value: Optional[str], default: int) -> int:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return default
+
+    def feed_and_report(self, line: str) -> None:
+        delta = self.feed(line)
+        if delta is not None:
+            report(*delta)
+
+def _format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '?'
+    return str(datetime.timedelta(seconds=round(seconds)))
+
+class ProgressMonitor:
+    """
+    Junta el avance de todos los ffmpeg en curso y publica el estado de la ejecución.
+
+    Cada STATUS_INTERVAL segundos escribe una línea en el log y reescribe el archivo de
+    estado (JSON) con los segundos de video por segundo, los MB/s escritos y el tiempo
+    restante estimado a partir de la duración de los cortes que faltan.
+    """
+
+    def __init__(self, sink: Any, status_path: str, interval: float = STATUS_INTERVAL) -> None:
+        """
+        Args:
+            sink (Any): Cola que reciben los procesos de corte en configure.
+            status_path (str): Archivo JSON de estado.
+            interval (float): Segundos entre actualizaciones.
+        """
+        self.sink = sink
+        self.status_path = status_path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._media_s = 0.0
+        self._bytes = 0
+        # (momento, segundos de video acumulados, bytes acumulados) para la velocidad actual
+        self._samples: Deque[Tuple[float, float, int]] = deque([(self._start, 0.0, 0)])
+        self._planned: Dict[str, float] = {}  # ID en cola -> segundos de video de sus cortes
+        self._planned_s = 0.0
+        self._done_s = 0.0
+        self._jobs = 0
+        self._done_jobs = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, items: Iterable[Any]) -> Iterator[Any]:
+        """
+        Suma a lo planificado la duración de cada trabajo que pasa a la cola.
+
+        Args:
+            items (Iterable[Any]): Trabajos (CutJob, bool) (ver pending_jobs).
+
+        Yields:
+            Any: Los mismos trabajos.
+        """
+        for item in items:
+            job = item[0]
+            with self._lock:
+                media_s = job.duration_ms / 1000
+                self._planned[job.id] = media_s
+                self._planned_s += media_s
+                self._jobs += 1
+            yield item
+
+    def finish(self, id: str) -> None:
+        """
+        Marca un video como terminado, con o sin error.
+
+        Args:
+            id (str): ID del video.
+        """
+        with self._lock:
+            self._done_s += self._planned.pop(id, 0.0)
+            self._done_jobs += 1
+
+    def _add(self, media_s: float, written_bytes: int) -> None:
+        with self._lock:
+            self._media_s += media_s
+            self._bytes += written_bytes
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Calcula el estado actual de la ejecución.
+
+        Returns:
+            Dict[str, Any]: Avance, velocidades en la ventana RATE_WINDOW_S y tiempo restante estimado.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._samples.append((now, self._media_s, self._bytes))
+            while len(self._samples) > 2 and now - self._samples[1][0] >= RATE_WINDOW_S:
+                self._samples.popleft()
+            since, media_s, written_bytes = self._samples[0]
+            elapsed = max(now - since, 1e-6)
+            media_rate = (self._media_s - media_s) / elapsed
+            remaining_s = max(self._planned_s - self._done_s, 0.0)
+            return {
+                'actualizado': datetime.datetime.now().isoformat(timespec='seconds'),
+                'transcurrido_s': round(now - self._start, 1),
+                'videos_en_cola': self._jobs,
+                'videos_terminados': self._done_jobs,
+                'video_s_en_cola': round(self._planned_s, 1),
+                'video_s_terminados': round(self._done_s, 1),
+                'video_s_procesados': round(self._media_s, 1),
+                'video_s_por_s': round(media_rate, 2),
+                'mb_por_s': round((self._bytes - written_bytes) / elapsed / 1024 ** 2, 2),
+                'mb_escritos': round(self._bytes / 1024 ** 2, 1),
+                'restante_s': round(remaining_s / media_rate) if media_rate > 0 else None,
+            }
+
+    def publish(self, final: bool = False) -> Dict[str, Any]:
+        """
+        Escribe la línea de estado en el log y actualiza el archivo de estado.
+
+        Args:
+            final (bool): Si la ejecución terminó.
+
+        Returns:
+            Dict[str, Any]: Estado publicado.
+        """
+        status = self.status()
+        status['terminado'] = final
+        logging.info(f"Progreso: {status['videos_terminados']}/{status['videos_en_cola']} videos, "
+                     f"{status['video_s_por_s']:.1f} s de video/s, {status['mb_por_s']:.1f} MB/s, "
+                     f"restan {_format_eta(status['restante_s'])}")
+        tmp_path = f'{self.status_path}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(status, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.status_path)
+        except OSError as e:
+            logging.warning(f'No se pudo escribir el archivo de estado: {str(e)}')
+        return status
+
+    def _drain(self) -> None:
+        next_publish = time.monotonic() + self.interval
+        while True:
+            try:
+                update = self.sink.get(timeout=max(min(next_publish - time.monotonic(), 1.0), 0.01))
+            except queue.Empty:
+                update = ()
+            if update is None:
+                return
+            if update:
+                self._add(*update)
+            if time.monotonic() >= next_publish:
+                self.publish()
+                next_publish = time.monotonic() + self.interval
+
+    def start(self) -> None:
+        """
+        Empieza a leer la cola de avance en un hilo.
+        """
+        self._thread = threading.Thread(target=self._drain, name='avance', daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """
+        Lee lo que quedó en la cola y publica el estado final.
+        """
+        if self._thread is not None:
+            self.sink.put(None)
+            self._thread.join()
+            self._thread = None
+        self.publish(final=True)
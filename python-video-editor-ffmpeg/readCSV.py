@@ -1,4 +1,8 @@
-import pandas as pd
+import json
+import logging
+from typing import Iterator, TextIO
+from cutJob import CutJob, MERGE_TOLERANCE_MS
+import tracing
 
 def convert_string_to_list_of_pairs(string:str):
     # Separa la cadena de texto en una lista de pares
@@ -17,26 +21,68 @@ def convert_string_to_list_of_pairs(string:str):
 
 # print(array)
 
-def readDataCSV(csvPath:str):
-    df = pd.read_csv(csvPath)
-    data = df.iterrows()
-    items = []
-    for row in data:
-        item = row[1]
-        id = item['ID']
-        cortes = item['CORTES']
-        
-        if item['TYPE'] != 'Video':
+CSV_COLUMNS = ['ID', 'TYPE', 'CORTES']
+# Columna opcional con el ID del video de entrada, para varias filas que cortan el mismo video
+SOURCE_COLUMN = 'FUENTE'
+CSV_DTYPES = {'ID': str, 'TYPE': str, 'CORTES': str, SOURCE_COLUMN: str}
+CHUNK_SIZE = 10000
+
+def iterDataCSV(csvPath:str, chunksize:int=CHUNK_SIZE, tolerance_ms:int=MERGE_TOLERANCE_MS):
+    # Lee solo las columnas necesarias, por bloques, para que los primeros cortes
+    # puedan empezar antes de terminar de leer el archivo
+    # pandas tarda en importarse; los trabajos que llegan por JSONL no lo necesitan
+    import pandas as pd
+    usecols = lambda column: column in CSV_COLUMNS or column == SOURCE_COLUMN
+    with pd.read_csv(csvPath, usecols=usecols, dtype=CSV_DTYPES, chunksize=chunksize) as reader:
+        iterator = iter(reader)
+        while True:
+            # Cada bloque se mide aparte (lectura y validación), sin contar lo que tarda quien consume los trabajos
+            with tracing.span(tracing.STAGE_CSV) as trace:
+                chunk = next(iterator, None)
+                if chunk is None:
+                    break
+                jobs = []
+                videos = chunk[(chunk['TYPE'] == 'Video') & chunk['CORTES'].notna()]
+                cortes = videos['CORTES'].str.split('|')
+                if SOURCE_COLUMN in videos:
+                    sources = videos[SOURCE_COLUMN].where(videos[SOURCE_COLUMN].notna(), None)
+                else:
+                    sources = [None] * len(videos)
+                for id, values, source in zip(videos['ID'], cortes, sources):
+                    # Los tiempos se validan una sola vez aquí y viajan como enteros en milisegundos
+                    try:
+                        job = CutJob.from_values(id, values, source)
+                    except ValueError as e:
+                        logging.warning(f'Fila ignorada: {str(e)}')
+                        continue
+                    # Menos segmentos son menos procesos ffmpeg y menos uniones en el concat
+                    job = job.normalized(tolerance_ms)
+                    if len(job) == 0:
+                        logging.warning(f'Fila ignorada: el ID {id} no tiene cortes con duración')
+                        continue
+                    jobs.append(job)
+                trace.update(filas=len(chunk), trabajos=len(jobs))
+            yield from jobs
+
+def iterJobsJSONL(stream:TextIO, tolerance_ms:int=MERGE_TOLERANCE_MS) -> Iterator[CutJob]:
+    # Un trabajo por línea, con el mismo formato que los pedidos del servicio (ver CutJob.from_dict);
+    # cada trabajo sale apenas se lee su línea, así el primer corte no espera al final de la entrada
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
             continue
-        if not isinstance(cortes,str):
+        try:
+            job = CutJob.from_dict(json.loads(line))
+        except ValueError as e:
+            logging.warning(f'Línea {number} ignorada: {str(e)}')
             continue
-        cortes = convert_string_to_list_of_pairs(cortes)
-        items.append({
-            'id':id,
-            'cortes':cortes
-        })
-    
-    return items
+        job = job.normalized(tolerance_ms)
+        if len(job) == 0:
+            logging.warning(f'Línea {number} ignorada: el ID {job.id} no tiene cortes con duración')
+            continue
+        yield job
+
+def readDataCSV(csvPath:str, tolerance_ms:int=MERGE_TOLERANCE_MS):
+    return list(iterDataCSV(csvPath, tolerance_ms=tolerance_ms))
 
 # print(readDataCSV('videos-editar-paquete-mayo.csv'))
     
\ No newline at end of file
@@ -0,0 +1,256 @@
+import json
+import time
+import logging
+import datetime
+import functools
+import multiprocessing
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Dict, List, Optional
+
+# Registros que van solo a los archivos de la ejecución, no a la consola
+LOGGER_NOT_FOUND = 'cortes.no_encontrados'
+LOGGER_ERRORS = 'cortes.errores'
+LOGGER_RESULTS = 'cortes.resultados'
+BATCH_RECORDS = 256  # Líneas acumuladas antes de escribir un archivo si la cola no se vacía
+WORKER_BATCH_RECORDS = 64  # Registros que junta un proceso del pool antes de mandarlos a la cola
+WORKER_FLUSH_SECONDS = 0.5  # Antigüedad del lote a partir de la cual el próximo registro lo manda
+
+_logger = logging.getLogger('cortes')
+# Sin una ejecución en curso (RunLog o configure_worker) estos registros se descartan
+_logger.propagate = False
+_logger.setLevel(logging.INFO)
+not_found = logging.getLogger(LOGGER_NOT_FOUND)
+errors = logging.getLogger(LOGGER_ERRORS)
+results = logging.getLogger(LOGGER_RESULTS)
+
+def configure_worker(log_queue: Optional[Any]) -> None:
+    """
+    Manda todos los registros de un proceso del pool al escritor del proceso principal.
+
+    Reemplaza los handlers heredados (o los que agrega logging.basicConfig al importar el módulo
+    con spawn), así ningún registro se escribe dos veces. Fuera del proceso principal los
+    registros se mandan por lotes (ver flush_worker).
+
+    Args:
+        log_queue (Optional[Any]): Cola de RunLog; None deja el logging como está.
+    """
+    if log_queue is None:
+        return
+    # En el proceso principal (y en los hilos del ejecutor asyncio) cada línea sale enseguida a la consola
+    batched = multiprocessing.parent_process() is not None
+    handler = _QueueHandler(log_queue, WORKER_BATCH_RECORDS if batched else 1)
+    for logger in (logging.getLogger(), _logger):
+        for old in logger.handlers[:]:
+            logger.removeHandler(old)
+        logger.addHandler(handler)
+
+def flush_worker() -> None:
+    """
+    Manda a la cola los registros que este proceso todavía tiene juntados.
+    """
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
+def flushed(func: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """
+    Decora una tarea del pool para que sus registros salgan antes de devolver el resultado.
+
+    Args:
+        func (Callable[[Any], Any]): Tarea del pool, definida a nivel de módulo.
+
+    Returns:
+        Callable[[Any], Any]: La misma tarea, que llama a flush_worker al terminar.
+    """
+    @functools.wraps(func)
+    def task(args: Any) -> Any:
+        try:
+            return func(args)
+        finally:
+            flush_worker()
+    return task
+
+class _QueueHandler(QueueHandler):
+    # Cada put serializa y toma el lock de la cola, que comparten todos los procesos: en los
+    # procesos del pool los registros se juntan y se mandan en una sola lista, sin un hilo
+    # aparte: el lote sale al llenarse, cuando el próximo registro lo encuentra viejo y al
+    # terminar cada tarea (ver flushed). SimpleQueue escribe en
+    # el pipe al llamar a put, así un lote ya enviado no se pierde si el pool termina sus
+    # procesos apenas devuelven el último resultado
+    def __init__(self, queue: Any, batch_records: int) -> None:
+        super().__init__(queue)
+        self.batch_records = batch_records
+        self._buffer: List[logging.LogRecord] = []
+        self._batch_start = 0.0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Como QueueHandler.prepare pero sin copiar el registro: en este proceso no hay otro
+        # handler que lo vaya a leer (ver configure_worker)
+        msg = self.format(record)
+        record.message = record.msg = msg
+        record.args = record.exc_info = record.exc_text = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.batch_records <= 1:
+            self.queue.put(record)
+            return
+        # Se llama con el lock del handler tomado (ver logging.Handler.handle)
+        if not self._buffer:
+            self._batch_start = record.created
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_records or record.created - self._batch_start >= WORKER_FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self._buffer:
+                batch, self._buffer = self._buffer, []
+                self.queue.put(batch)
+        finally:
+            self.release()
+
+class _BatchFileHandler(logging.FileHandler):
+    """
+    Archivo que acumula las líneas y las escribe juntas: al llegar a BATCH_RECORDS o cuando el
+    escritor no tiene más registros en espera (ver _BatchingListener).
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path, mode='a', encoding='utf-8', delay=True)
+        self._buffer: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._buffer.append(self.format(record))
+            if len(self._buffer) >= BATCH_RECORDS:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            if self._buffer:
+                if self.stream is None:
+                    self.stream = self._open()
+                self.stream.write('\n'.join(self._buffer) + '\n')
+                self._buffer.clear()
+            super().flush()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        # FileHandler.close solo vacía un archivo ya abierto; con delay=True las últimas líneas
+        # pueden estar todavía en el buffer
+        self.flush()
+        super().close()
+
+class _JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.result, ensure_ascii=False)
+
+class _BatchingListener(QueueListener):
+    # Los registros de los loggers de archivo van directo a su archivo y el resto a la consola,
+    # sin pasar cada registro por los filtros de todos los handlers
+    def __init__(self, queue: Any, routes: Dict[str, logging.Handler], *handlers: logging.Handler) -> None:
+        super().__init__(queue, *handlers, respect_handler_level=True)
+        self.routes = routes
+
+    def dequeue(self, block: bool) -> Any:
+        # Antes de quedarse esperando, escribe lo acumulado: en ráfagas se agrupan las escrituras
+        # y con poca actividad cada línea llega al disco enseguida
+        if self.queue.empty():
+            for handler in (*self.handlers, *self.routes.values()):
+                handler.flush()
+        return self.queue.get()
+
+    def handle(self, record: Any) -> None:
+        # Los procesos del pool mandan listas de registros (ver _QueueHandler)
+        for item in record if isinstance(record, list) else (record,):
+            handler = self.routes.get(item.name)
+            if handler is not None:
+                handler.handle(item)
+            else:
+                super().handle(item)
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+class RunLog:
+    """
+    Único escritor de los logs de una ejecución.
+
+    Los procesos del pool y el proceso principal mandan sus registros a una cola; un hilo los
+    escribe en la consola, en los archivos de IDs no encontrados y de errores, y en un JSONL
+    con una línea por video terminado. Así ningún proceso abre archivos por cada falla y las
+    líneas de procesos distintos no se mezclan.
+    """
+
+    def __init__(self, path_log_not_found: str, path_log_errors: str, path_results: str) -> None:
+        """
+        Args:
+            path_log_not_found (str): Archivo de IDs no encontrados (ver create_log_files).
+            path_log_errors (str): Archivo de errores.
+            path_results (str): Archivo JSONL de resultados.
+        """
+        self.path_results = path_results
+        self.queue: Any = multiprocessing.SimpleQueue()
+        self._files: Dict[str, logging.Handler] = {}
+        for path, name, formatter in ((path_log_not_found, LOGGER_NOT_FOUND, None),
+                                      (path_log_errors, LOGGER_ERRORS, None),
+                                      (path_results, LOGGER_RESULTS, _JSONFormatter())):
+            handler = _BatchFileHandler(path)
+            if formatter is not None:
+                handler.setFormatter(formatter)
+            self._files[name] = handler
+        self._root_handlers: List[logging.Handler] = []
+        self._listener: Optional[QueueListener] = None
+
+    def start(self) -> None:
+        """
+        Pasa el logging de este proceso a la cola y arranca el escritor.
+
+        Los handlers que ya tenía el logger raíz (la consola) pasan al escritor.
+        """
+        root = logging.getLogger()
+        self._root_handlers = root.handlers[:]
+        self._listener = _BatchingListener(self.queue, self._files, *self._root_handlers)
+        self._listener.start()
+        configure_worker(self.queue)
+
+    @staticmethod
+    def record_result(result: Dict[str, Any]) -> None:
+        """
+        Agrega la línea de un video terminado al JSONL de resultados.
+
+        Args:
+            result (Dict[str, Any]): Resultado de process_video, con 'started_at' si se llegó a procesar.
+        """
+        started_at = result.get('started_at')
+        results.info(result['id'], extra={'result': {
+            'id': result['id'],
+            'estado': result['state'],
+            'duracion_s': round(time.time() - started_at, 3) if started_at else None,
+            'bytes': result.get('output_size'),
+            'error': result.get('error'),
+            'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        }})
+
+    def close(self) -> None:
+        """
+        Escribe lo que quedó en la cola, cierra los archivos y devuelve los handlers al logger raíz.
+        """
+        if self._listener is None:
+            return
+        root = logging.getLogger()
+        for logger in (root, _logger):
+            for handler in logger.handlers[:]:
+                logger.removeHandler(handler)
+        for handler in self._root_handlers:
+            root.addHandler(handler)
+        self._listener.stop()
+        self._listener = None
+        for handler in self._files.values():
+            handler.close()
+        self.queue.close()
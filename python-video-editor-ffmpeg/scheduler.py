@@ -0,0 +1,99 @@
+import queue
+from collections import deque
+from multiprocessing.pool import Pool
+from typing import Any, Callable, Deque, Iterable, Iterator, Optional, Union
+
+# Cada cuántos segundos se vuelve a consultar un límite dinámico mientras se espera un resultado
+LIMIT_POLL_SECONDS = 1.0
+# Lo entrega un iterable que por ahora no tiene trabajos (por ejemplo, esperando videos nuevos)
+IDLE = object()
+
+def imap_unordered_bounded(pool: Pool, func: Callable[[Any], Any], iterable: Iterable[Any],
+                           max_pending: Union[int, Callable[[], int]],
+                           followups: Optional[Callable[[Any], Iterable[Any]]] = None) -> Iterator[Any]:
+    """
+    Reparte trabajos en un pool de larga vida y entrega los resultados a medida que terminan.
+
+    A diferencia de pool.imap_unordered, nunca hay más de max_pending trabajos enviados al
+    pool, así que el iterable se consume de a poco (puede ser un generador que lee el CSV)
+    y cada trabajo nuevo arranca apenas se libera un lugar.
+
+    Si max_pending es una función (por ejemplo AdaptiveController.limit) se consulta antes
+    de cada envío, así el límite puede subir o bajar durante la ejecución.
+
+    Si se indica followups, se llama con cada resultado y los trabajos que retorna se
+    envían antes que los siguientes del iterable, respetando el mismo límite.
+
+    Un iterable que puede quedarse sin trabajos por un tiempo entrega IDLE en lugar de
+    bloquearse, así los resultados de los trabajos en curso se siguen entregando.
+
+    Args:
+        pool (Pool): Pool de procesos ya creado.
+        func (Callable[[Any], Any]): Función a ejecutar con cada elemento.
+        iterable (Iterable[Any]): Argumentos de cada trabajo.
+        max_pending (Union[int, Callable[[], int]]): Máximo de trabajos en vuelo al mismo
+            tiempo, o una función que lo retorna.
+        followups (Optional[Callable[[Any], Iterable[Any]]]): Trabajos que dependen de un resultado.
+
+    Yields:
+        Any: Resultado de cada trabajo, en orden de finalización.
+    """
+    done: "queue.Queue[Any]" = queue.Queue()
+    in_flight = 0
+    limit = max_pending if callable(max_pending) else lambda: max_pending
+    # Con un límite fijo se espera sin timeout; con uno dinámico se revisa cada tanto por si sube
+    timeout = LIMIT_POLL_SECONDS if callable(max_pending) else None
+
+    def on_error(error: BaseException) -> None:
+        done.put(_Failure(error))
+
+    extra: Deque[Any] = deque()
+    iterator = iter(iterable)
+    exhausted = False
+    while True:
+        idle = False
+        while in_flight < max(limit(), 1):
+            if extra:
+                args = extra.popleft()
+            elif not exhausted:
+                try:
+                    args = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    continue
+                if args is IDLE:
+                    idle = True
+                    break
+            else:
+                break
+            pool.apply_async(func, (args,), callback=done.put, error_callback=on_error)
+            in_flight += 1
+        if not in_flight:
+            if exhausted:
+                return
+            continue
+        try:
+            # Sin trabajos nuevos por ahora, se vuelve a preguntar al iterable cada tanto
+            result = done.get(timeout=LIMIT_POLL_SECONDS if idle else timeout)
+        except queue.Empty:
+            continue
+        in_flight -= 1
+        result = _unwrap(result)
+        if followups is not None:
+            extra.extend(followups(result))
+        yield result
+
+class _Failure:
+    """
+    Envuelve una excepción de un trabajo para relanzarla en el proceso o hilo principal
+    (también la usa asyncRunner).
+    """
+    __slots__ = ('error',)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+def _unwrap(result: Any) -> Any:
+    if isinstance(result, _Failure):
+        raise result.error
+    return result
@@ -0,0 +1,126 @@
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import cutVideo
+import inputIndex
+import probe
+from cutJob import CutJob
+from probe import ProbeInfo
+
+POLICY_CSV = 'csv'
+POLICY_LONGEST_FIRST = 'mayor_primero'
+POLICY_SHORTEST_FIRST = 'menor_primero'
+
+# Modelo de costo aproximado, en segundos de trabajo
+COPY_BYTES_PER_S = 200 * 1024 * 1024  # Lectura y escritura al copiar el flujo
+SEGMENT_OVERHEAD_S = 0.2  # Arranque de ffmpeg, búsqueda y unión por cada segmento
+REENCODE_S_PER_MEDIA_S = 0.5  # Recodificar con el preset por defecto
+SMART_REENCODE_MEDIA_S = 2.0  # Tramo recodificado al inicio de cada segmento en modo inteligente
+
+def estimate_cost(job: CutJob, size: int, info: Optional[ProbeInfo], cut_mode: str = cutVideo.MODE_COPY) -> float:
+    """
+    Estima cuánto tarda un trabajo a partir del video de entrada y sus cortes.
+
+    El valor solo sirve para comparar trabajos entre sí: lo que se copia cuesta en proporción
+    a los bytes que se leen, lo que se recodifica en proporción a su duración, y cada segmento
+    suma un costo fijo.
+
+    Args:
+        job (CutJob): Trabajo a estimar.
+        size (int): Tamaño del video de entrada en bytes.
+        info (Optional[ProbeInfo]): Información del video, si se pudo analizar.
+        cut_mode (str): Modo de corte de la ejecución.
+
+    Returns:
+        float: Costo estimado en segundos.
+    """
+    cut_ms = job.duration_ms
+    # Sin duración conocida se asume que se lee el archivo completo
+    fraction = min(cut_ms / info.duration_ms, 1.0) if info is not None and info.duration_ms else 1.0
+    cost = size * fraction / COPY_BYTES_PER_S + len(job) * SEGMENT_OVERHEAD_S
+    if cut_mode == cutVideo.MODE_REENCODE:
+        cost += cut_ms / 1000 * REENCODE_S_PER_MEDIA_S
+    elif cut_mode == cutVideo.MODE_SMART:
+        cost += len(job) * SMART_REENCODE_MEDIA_S * REENCODE_S_PER_MEDIA_S
+    return cost
+
+def _job_cost(job: CutJob, input_index: Dict[str, Dict[str, Any]], cut_mode: str) -> float:
+    path = inputIndex.find_input_video(input_index, job.source_id)
+    if not path:
+        # Un ID sin video termina al instante
+        return 0.0
+    info = None
+    try:
+        info = probe.probe_source(path)
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        logging.warning(f'No se pudo analizar el video {job.id} para estimar su costo: {str(e)}')
+    return estimate_cost(job, input_index[job.source_id]['size'], info, cut_mode)
+
+def order_jobs(items: Iterable[Tuple[CutJob, bool]], input_index: Dict[str, Dict[str, Any]],
+               policy: str = POLICY_CSV, cut_mode: str = cutVideo.MODE_COPY,
+               max_workers: int = 4) -> Iterable[Tuple[CutJob, bool]]:
+    """
+    Ordena los trabajos según la política de planificación.
+
+    Con POLICY_LONGEST_FIRST los trabajos más largos arrancan primero y los cortos rellenan
+    los huecos al final, así un video de varias horas no queda solo corriendo cuando el resto
+    ya terminó. POLICY_SHORTEST_FIRST entrega resultados lo antes posible. POLICY_CSV mantiene
+    el orden del CSV sin leerlo completo.
+
+    Los videos se analizan en hilos; el resultado queda en la caché de probe, así los
+    procesos de corte no vuelven a analizarlos.
+
+    Args:
+        items (Iterable[Tuple[CutJob, bool]]): Trabajos a ordenar (ver pending_jobs).
+        input_index (Dict[str, Dict[str, Any]]): Índice ID -> video de la carpeta de entrada.
+        policy (str): POLICY_CSV, POLICY_LONGEST_FIRST o POLICY_SHORTEST_FIRST.
+        cut_mode (str): Modo de corte de la ejecución, cambia el costo de cada trabajo.
+        max_workers (int): Cantidad de ffprobe simultáneos.
+
+    Returns:
+        Iterable[Tuple[CutJob, bool]]: Trabajos en el orden en que se deben enviar.
+    """
+    if policy == POLICY_CSV:
+        return items
+    pending: List[Tuple[CutJob, bool]] = list(items)
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1), thread_name_prefix='costo') as executor:
+        costs = list(executor.map(lambda item: _job_cost(item[0], input_index, cut_mode), pending))
+    order = sorted(range(len(pending)), key=costs.__getitem__, reverse=policy == POLICY_LONGEST_FIRST)
+    if order:
+        logging.info(f'Costo estimado: {sum(costs):.0f} s en total, el mayor {max(costs):.0f} s')
+    return [pending[i] for i in order]
+
+def group_by_source(items: Iterable[Tuple[CutJob, bool]],
+                    input_index: Dict[str, Dict[str, Any]]) -> List[List[Tuple[CutJob, bool]]]:
+    """
+    Agrupa los trabajos que cortan el mismo video de entrada.
+
+    Cada grupo se procesa con una sola lectura del video (ver cutVideo.cutFanOut). Los grupos
+    quedan en el orden de su primer trabajo, así se respeta el orden de order_jobs. Los
+    trabajos sin video de entrada quedan solos.
+
+    Args:
+        items (Iterable[Tuple[CutJob, bool]]): Trabajos a agrupar (ver pending_jobs).
+        input_index (Dict[str, Dict[str, Any]]): Índice ID -> video de la carpeta de entrada.
+
+    Returns:
+        List[List[Tuple[CutJob, bool]]]: Grupos de trabajos.
+    """
+    groups: Dict[str, List[Tuple[CutJob, bool]]] = {}
+    order: List[List[Tuple[CutJob, bool]]] = []
+    for item in items:
+        path = inputIndex.find_input_video(input_index, item[0].source_id)
+        if not path:
+            order.append([item])
+            continue
+        group = groups.get(path)
+        if group is None:
+            group = groups[path] = []
+            order.append(group)
+        group.append(item)
+    shared = sum(1 for group in groups.values() if len(group) > 1)
+    if shared:
+        logging.info(f'{shared} videos de entrada se cortan para varios IDs en una sola lectura')
+    return order
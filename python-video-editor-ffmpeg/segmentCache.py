@@ -0,0 +1,186 @@
+import os
+import shutil
+import hashlib
+import logging
+from typing import Dict, Optional, Sequence, Tuple
+
+# Nombre de la caché dentro de una carpeta de salida
+OUTPUT_CACHE_NAME = '.segmentos'
+MAX_BYTES = 20 * 1024 ** 3
+FINGERPRINT_BLOCK = 64 * 1024
+
+# Carpeta de la caché; conviene que esté en el mismo disco que la salida para usar enlaces duros.
+# Sin configure la caché está desactivada
+_root: Optional[str] = None
+_fingerprints: Dict[Tuple[str, int, int], str] = {}
+
+def configure(root: Optional[str]) -> None:
+    """
+    Activa la caché de tramos en una carpeta, o la desactiva.
+
+    Args:
+        root (Optional[str]): Carpeta de la caché; None la desactiva (fetch no encuentra nada
+            y store no guarda).
+    """
+    global _root
+    _root = root
+
+def for_output(output_folder: str) -> str:
+    """
+    Retorna la carpeta de caché de tramos de una carpeta de salida.
+
+    Los tramos se cortan dentro de la carpeta de salida; con la caché en el mismo disco se
+    guardan y se recuperan con enlaces duros, sin copiar datos.
+
+    Args:
+        output_folder (str): Carpeta de salida de los videos editados.
+
+    Returns:
+        str: Carpeta de la caché.
+    """
+    return os.path.join(output_folder, OUTPUT_CACHE_NAME)
+
+def cache_root() -> Optional[str]:
+    return _root
+
+def fingerprint(input_video_path: str) -> str:
+    """
+    Identifica el contenido de un video sin leerlo completo.
+
+    Usa el tamaño, el mtime y el primer y último bloque del archivo, así una copia con el
+    mismo mtime (por ejemplo la de staging) tiene la misma huella que el original.
+
+    Args:
+        input_video_path (str): Ruta del video.
+
+    Returns:
+        str: Huella hexadecimal.
+    """
+    stat = os.stat(input_video_path)
+    key = (os.path.abspath(input_video_path), stat.st_size, stat.st_mtime_ns)
+    cached = _fingerprints.get(key)
+    if cached is not None:
+        return cached
+    digest = hashlib.sha1(f'{stat.st_size}|{stat.st_mtime_ns}|'.encode('utf-8'))
+    with open(input_video_path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BLOCK))
+        if stat.st_size > FINGERPRINT_BLOCK:
+            f.seek(max(stat.st_size - FINGERPRINT_BLOCK, FINGERPRINT_BLOCK))
+            digest.update(f.read(FINGERPRINT_BLOCK))
+    _fingerprints[key] = digest.hexdigest()
+    return _fingerprints[key]
+
+def _entry_path(input_video_path: str, inicio: int, fin: int, codec_args: Sequence[str], ext: str,
+                mode: str = '') -> str:
+    # Solo se llama con la caché activada (ver fetch y store)
+    root = cache_root() or ''
+    key = '\0'.join([fingerprint(input_video_path), str(inicio), str(fin), *codec_args])
+    if mode:
+        key += f'\0{mode}'
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(root, digest[:2], f'{digest}{ext}')
+
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Otro disco o sistema de archivos sin enlaces duros
+        shutil.copyfile(src, dst)
+
+def fetch(input_video_path: str, inicio: int, fin: int, codec_args: Sequence[str], piece: str,
+          mode: str = '') -> bool:
+    """
+    Recupera un tramo ya cortado de la caché.
+
+    Args:
+        input_video_path (str): Video de entrada.
+        inicio (int): Inicio del tramo en ms.
+        fin (int): Fin del tramo en ms.
+        codec_args (Sequence[str]): Argumentos de códec con los que se cortó.
+        piece (str): Ruta donde debe quedar el tramo.
+        mode (str): Forma de corte cuando no la definen los argumentos de códec, por ejemplo
+            la búsqueda de salida de cutVideo.cutFanOut; vacío para el corte con -ss de entrada.
+
+    Returns:
+        bool: True si el tramo estaba en la caché y quedó en piece; False también con la caché desactivada.
+    """
+    if cache_root() is None:
+        return False
+    try:
+        entry = _entry_path(input_video_path, inicio, fin, codec_args, os.path.splitext(piece)[1], mode)
+        tmp_piece = f'{piece}.{os.getpid()}.tmp'
+        _link_or_copy(entry, tmp_piece)
+        os.replace(tmp_piece, piece)
+    except OSError:
+        return False
+    # El mtime marca el último uso para el desalojo
+    try:
+        os.utime(entry)
+    except OSError:
+        pass
+    return True
+
+def store(input_video_path: str, inicio: int, fin: int, codec_args: Sequence[str], piece: str,
+          mode: str = '') -> None:
+    """
+    Guarda en la caché un tramo recién cortado. Un error al guardar no interrumpe el corte.
+
+    Args:
+        input_video_path (str): Video de entrada.
+        inicio (int): Inicio del tramo en ms.
+        fin (int): Fin del tramo en ms.
+        codec_args (Sequence[str]): Argumentos de códec con los que se cortó.
+        piece (str): Ruta del tramo cortado.
+        mode (str): Forma de corte, la misma que en fetch.
+    """
+    if cache_root() is None:
+        return
+    try:
+        entry = _entry_path(input_video_path, inicio, fin, codec_args, os.path.splitext(piece)[1], mode)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp_entry = f'{entry}.{os.getpid()}.tmp'
+        _link_or_copy(piece, tmp_entry)
+        os.replace(tmp_entry, entry)
+    except OSError as e:
+        logging.warning(f'No se pudo guardar el tramo en la caché: {str(e)}')
+
+def evict(max_bytes: int = MAX_BYTES) -> int:
+    """
+    Borra los tramos usados hace más tiempo hasta que la caché ocupe como máximo max_bytes.
+
+    Args:
+        max_bytes (int): Tamaño máximo de la caché.
+
+    Returns:
+        int: Cantidad de tramos borrados; 0 con la caché desactivada.
+    """
+    root = cache_root()
+    if root is None:
+        return 0
+    entries = []
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith('.tmp'):
+                # Tramo que otro proceso está guardando
+                continue
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+            total += stat.st_size
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        logging.info(f'Caché de tramos: se borraron {removed} tramos, ocupa {total / 1024 ** 3:.1f} GB')
+    return removed
@@ -0,0 +1,250 @@
+import os
+import shutil
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cutVideo
+import manifest
+import tracing
+from cutJob import CutJob
+
+STAGE_IN_DIR = 'entrada'
+STAGE_OUT_DIR = 'salida'
+DEFAULT_BUDGET_GB = 20
+STAGE_IN_WORKERS = 2
+STAGE_OUT_WORKERS = 2
+
+class StagingArea:
+    """
+    Prepara los videos de entrada en una carpeta local rápida antes de cortarlos.
+
+    Tiene tres etapas con su propia concurrencia: copia de entrada (hilos que traen los
+    próximos videos desde la carpeta de red), corte (el pool de siempre, que lee la copia
+    local) y copia de salida (hilos que mueven los videos editados a la carpeta final).
+    Así la transferencia por red se superpone con los cortes.
+
+    Las copias ocupan como máximo budget_bytes. Cuando no entra un video nuevo se borran
+    las copias usadas hace más tiempo que ningún trabajo en curso necesita; si aun así no
+    entra, ese trabajo lee directo de la carpeta de entrada.
+    """
+
+    def __init__(self, scratch_dir: str, input_index: Dict[str, Dict[str, Any]], budget_bytes: int,
+                 lookahead: int, stage_in_workers: int = STAGE_IN_WORKERS,
+                 stage_out_workers: int = STAGE_OUT_WORKERS) -> None:
+        """
+        Args:
+            scratch_dir (str): Carpeta local (disco rápido o tmpfs) para las copias.
+            input_index (Dict[str, Dict[str, Any]]): Índice ID -> video de la carpeta de entrada.
+            budget_bytes (int): Espacio máximo que pueden ocupar las copias de entrada.
+            lookahead (int): Cantidad de trabajos cuya entrada se prepara por adelantado.
+            stage_in_workers (int): Copias de entrada simultáneas.
+            stage_out_workers (int): Copias de salida simultáneas.
+        """
+        self.input_index = input_index
+        self.budget_bytes = budget_bytes
+        self.lookahead = max(lookahead, 1)
+        self.in_dir = os.path.join(scratch_dir, STAGE_IN_DIR)
+        self.out_dir = os.path.join(scratch_dir, STAGE_OUT_DIR)
+        # Restos de una ejecución interrumpida
+        shutil.rmtree(self.in_dir, ignore_errors=True)
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+        os.makedirs(self.in_dir)
+        os.makedirs(self.out_dir)
+
+        self._lock = threading.Lock()
+        # Ruta original -> [copia local, tamaño, trabajos que la usan, copia en curso]; el orden es el de uso (LRU)
+        self._entries: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self._used_bytes = 0
+        self._pinned: Dict[str, Dict[str, Any]] = {}  # ID -> entrada del índice de su video
+        self._stage_in = ThreadPoolExecutor(max_workers=max(stage_in_workers, 1), thread_name_prefix='copia-entrada')
+        self._stage_out = ThreadPoolExecutor(max_workers=max(stage_out_workers, 1), thread_name_prefix='copia-salida')
+
+    def _local_path(self, source_path: str, size: int, mtime: int) -> str:
+        key = hashlib.sha1(f'{os.path.abspath(source_path)}|{size}|{mtime}'.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.in_dir, f'{key}{os.path.splitext(source_path)[1]}')
+
+    def _evict(self, needed: int) -> bool:
+        # Se llama con el lock tomado; borra las copias sin uso más antiguas hasta que entren needed bytes
+        for source_path in list(self._entries):
+            if self._used_bytes + needed <= self.budget_bytes:
+                break
+            local_path, size, pins, future = self._entries[source_path]
+            if pins or not future.done():
+                continue
+            del self._entries[source_path]
+            self._used_bytes -= size
+            try:
+                os.remove(local_path)
+            except OSError:
+                pass
+            logging.debug(f'Copia local liberada: {source_path}')
+        return self._used_bytes + needed <= self.budget_bytes
+
+    def _copy_in(self, source_path: str, local_path: str) -> None:
+        # copy2 conserva el mtime, así la caché de probe reconoce la copia en las siguientes ejecuciones
+        with tracing.span(tracing.STAGE_STAGE_IN, bytes_in=tracing.file_size(source_path)) as trace:
+            with cutVideo.atomic_output(local_path) as tmp_path:
+                shutil.copy2(source_path, tmp_path)
+            trace['bytes_out'] = trace.get('bytes_in')
+
+    def _reserve(self, source_id: str, ids: List[str]) -> Tuple[Optional[Future], str]:
+        """
+        Reserva la copia local de un video para varios trabajos, iniciando la copia si hace falta.
+
+        Returns:
+            Tuple[Optional[Future], str]: Copia en curso o terminada y su ruta local; None si el
+            video no entra en el espacio.
+        """
+        entry = self.input_index.get(source_id)
+        if entry is None:
+            return None, ''
+        source_path = entry['path']
+        # El índice puede ser de antes de que el video terminara de copiarse o se reemplazara:
+        # el espacio se cuenta con el tamaño actual
+        try:
+            stat = os.stat(source_path)
+        except OSError:
+            return None, ''
+        entry = {**entry, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+        with self._lock:
+            cached = self._entries.get(source_path)
+            if cached is None:
+                if entry['size'] > self.budget_bytes or not self._evict(entry['size']):
+                    return None, ''
+                local_path = self._local_path(source_path, entry['size'], entry['mtime'])
+                future = self._stage_in.submit(self._copy_in, source_path, local_path)
+                cached = self._entries[source_path] = [local_path, entry['size'], 0, future]
+                self._used_bytes += entry['size']
+            self._entries.move_to_end(source_path)
+            cached[2] += len(ids)
+            for id in ids:
+                self._pinned[id] = entry
+            return cached[3], cached[0]
+
+    def release(self, id: str) -> Optional[Dict[str, Any]]:
+        """
+        Indica que un trabajo ya no necesita la copia local de su video de entrada.
+
+        Args:
+            id (str): ID del trabajo.
+
+        Returns:
+            Optional[Dict[str, Any]]: Entrada del índice del video original, o None si el
+            trabajo no usaba una copia local.
+        """
+        with self._lock:
+            entry = self._pinned.pop(id, None)
+            if entry is not None and entry['path'] in self._entries:
+                self._entries[entry['path']][2] -= 1
+            return entry
+
+    def _drop(self, source_id: str) -> None:
+        # La copia falló: se olvida para que el próximo trabajo lo vuelva a intentar
+        entry = self.input_index.get(source_id)
+        with self._lock:
+            cached = self._entries.pop(entry['path'], None) if entry else None
+            if cached is not None:
+                self._used_bytes -= cached[1]
+
+    def stage_in(self, items: Iterable[Any]) -> Iterator[Tuple[Any, Optional[str]]]:
+        """
+        Entrega los trabajos junto con la copia local de su video, preparando los siguientes por adelantado.
+
+        Args:
+            items (Iterable[Any]): Trabajos (CutJob, bool) o grupos de trabajos del mismo video.
+
+        Yields:
+            Tuple[Any, Optional[str]]: Cada item y la ruta de la copia local, o None si el
+            trabajo debe leer directo de la carpeta de entrada.
+        """
+        window: Deque[Tuple[Any, str, Optional[Future], str]] = deque()
+        iterator = iter(items)
+        exhausted = False
+        while True:
+            while not exhausted and len(window) < self.lookahead:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                jobs: List[Tuple[CutJob, bool]] = item if isinstance(item, list) else [item]
+                source_id = jobs[0][0].source_id
+                window.append((item, source_id, *self._reserve(source_id, [job.id for job, _ in jobs])))
+            if not window:
+                return
+            item, source_id, future, local_path = window.popleft()
+            if future is None:
+                yield item, None
+                continue
+            try:
+                future.result()
+            except OSError as e:
+                logging.warning(f'No se pudo copiar el video {source_id} a la carpeta local, se lee directo: {str(e)}')
+                self._drop(source_id)
+                yield item, None
+                continue
+            yield item, local_path
+
+    def _move_out(self, result: Dict[str, Any], output_folder: str) -> Dict[str, Any]:
+        local_output = result.get('output_path')
+        final_path = os.path.join(output_folder, os.path.basename(local_output))
+        # Una salida anterior aceptada sin cortar ya está en la carpeta definitiva
+        if os.path.exists(local_output) and os.path.abspath(local_output) != os.path.abspath(final_path):
+            # La carpeta de salida puede estar en otro disco: se copia a un temporal y se renombra
+            size = tracing.file_size(local_output)
+            with tracing.span(tracing.STAGE_STAGE_OUT, id=result['id'], bytes_in=size, bytes_out=size):
+                with cutVideo.atomic_output(final_path) as tmp_path:
+                    shutil.move(local_output, tmp_path)
+        result['output_path'] = final_path
+        return result
+
+    def stage_out(self, results: Iterable[Dict[str, Any]], output_folder: str) -> Iterator[Dict[str, Any]]:
+        """
+        Mueve los videos editados de la carpeta local a la de salida y corrige sus resultados.
+
+        La copia local del video de entrada se libera apenas llega el resultado, antes de
+        mover la salida, así la copia de entrada puede seguir con los próximos videos.
+
+        Args:
+            results (Iterable[Dict[str, Any]]): Resultados de process_video con salida en la carpeta local.
+            output_folder (str): Carpeta de salida definitiva.
+
+        Yields:
+            Dict[str, Any]: Resultados con las rutas de entrada y salida definitivas.
+        """
+        pending: Deque[Tuple[Dict[str, Any], Future]] = deque()
+        for result in results:
+            entry = self.release(result['id'])
+            if entry is not None and 'input_path' in result:
+                # El manifiesto registra el video original, no la copia local
+                result.update(input_path=entry['path'], input_size=entry['size'], input_mtime=entry['mtime'])
+            if result['state'] == manifest.STATE_DONE:
+                pending.append((result, self._stage_out.submit(self._move_out, result, output_folder)))
+            else:
+                result['output_path'] = os.path.join(output_folder, os.path.basename(result['output_path']))
+                yield result
+            while pending and pending[0][1].done():
+                yield self._finish_out(*pending.popleft())
+        while pending:
+            yield self._finish_out(*pending.popleft())
+
+    def _finish_out(self, result: Dict[str, Any], future: Future) -> Dict[str, Any]:
+        try:
+            return future.result()
+        except OSError as e:
+            logging.error(f'[!!!!! ERROR AL EDITAR {result["id"]} !!!!!] - No se pudo mover a la carpeta de salida: {str(e)}')
+            result.update(state=manifest.STATE_ERROR, error=f'copia de salida: {str(e)}')
+            return result
+
+    def close(self) -> None:
+        """
+        Espera las copias en curso y borra la carpeta local.
+        """
+        self._stage_in.shutdown(wait=True, cancel_futures=True)
+        self._stage_out.shutdown(wait=True)
+        shutil.rmtree(self.in_dir, ignore_errors=True)
+        shutil.rmtree(self.out_dir, ignore_errors=True)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos del script están sueltos en la carpeta superior, sin paquete
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,33 @@
+import pytest
+
+pytest.importorskip('psutil')
+
+import adaptiveConcurrency
+from adaptiveConcurrency import AdaptiveController
+
+def _metrics(disk_mb_s: float) -> dict:
+    return {'cpu': 20.0, 'iowait': 0.0, 'disk_mb_s': disk_mb_s, 'available_mb': 64 * 1024.0}
+
+def test_explicit_disk_limit():
+    controller = AdaptiveController(8, initial_jobs=4, max_disk_mb_s=200)
+    assert controller._direction(_metrics(250)) == -1
+    assert controller._direction(_metrics(100)) == 1
+    assert controller._direction(_metrics(180)) == 0
+
+def test_disk_baseline_from_first_samples():
+    controller = AdaptiveController(8, initial_jobs=4)
+    # Referencia: 50 MB/s por trabajo con 4 trabajos
+    for disk_mb_s in (160, 200, 180):
+        assert controller._direction(_metrics(disk_mb_s)) == 1
+    assert controller._disk_baseline == 50
+    # Más trabajos que no suman tráfico: cada uno mueve menos de la mitad de la referencia
+    controller._limit = 8
+    assert controller._direction(_metrics(190)) == -1
+    controller._limit = 4
+    assert controller._direction(_metrics(190)) == 1
+
+def test_little_disk_traffic_is_not_evaluated():
+    controller = AdaptiveController(8, initial_jobs=4)
+    for _ in range(adaptiveConcurrency.DISK_BASELINE_SAMPLES + 1):
+        assert controller._direction(_metrics(1)) == 1
+    assert controller._disk_baseline is None
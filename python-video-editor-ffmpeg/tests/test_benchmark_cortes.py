@@ -0,0 +1,61 @@
+import os
+
+import benchmark_cortes
+import cutVideo
+import segmentCache
+from probe import ProbeInfo
+
+def test_cut_accuracy_exact_cuts():
+    # 25 fps: el corte 1000-2000 ms son los fotogramas 25 a 49
+    frames = list(range(25, 50)) + list(range(100, 125))
+    result = benchmark_cortes.cut_accuracy(frames, [(1000, 2000), (4000, 5000)])
+    assert result == {'tramos_detectados': 2, 'inicio_error_ms': [0, 0], 'inicio_error_ms_max': 0, 'fin_error_ms_max': 0}
+
+def test_cut_accuracy_start_one_gop_early():
+    # El segundo corte arranca en el fotograma clave de 3 s: misma cantidad de fotogramas, 1 s antes
+    frames = list(range(25, 50)) + list(range(75, 100))
+    result = benchmark_cortes.cut_accuracy(frames, [(1000, 2000), (4000, 5000)])
+    assert result['inicio_error_ms'] == [0, -1000]
+    assert result['fin_error_ms_max'] == 1000
+
+def test_cut_accuracy_tolerates_trailing_b_frames_and_reports_merged_cuts():
+    frames = list(range(25, 50)) + [51, 53]
+    assert benchmark_cortes.cut_accuracy(frames, [(1000, 2000)])['fin_error_ms_max'] == 160
+    assert benchmark_cortes.cut_accuracy(list(range(25, 125)), [(1000, 2000), (4000, 5000)])['inicio_error_ms'] is None
+
+def _fake_measurements(monkeypatch):
+    # Sin ffmpeg: solo interesa lo que ve el motor mientras corre
+    monkeypatch.setattr(benchmark_cortes.probe, 'probe_source', lambda path, use_cache: ProbeInfo(1000, None, []))
+    monkeypatch.setattr(benchmark_cortes, 'count_frames', lambda path: 25)
+    monkeypatch.setattr(benchmark_cortes, 'read_frame_numbers', lambda path: list(range(25)))
+
+def test_run_engine_disables_segment_cache(tmp_path, monkeypatch):
+    _fake_measurements(monkeypatch)
+    roots = []
+    monkeypatch.setattr(segmentCache, '_root', str(tmp_path / 'cache'))
+    benchmark_cortes.run_engine(lambda *args: roots.append(segmentCache.cache_root()), 'fuente.mp4',
+                                [(0, 1000)], str(tmp_path))
+    assert roots == [None]
+    assert segmentCache.cache_root() == str(tmp_path / 'cache')
+
+def test_run_engine_counts_pieces_deleted_after_concat(tmp_path, monkeypatch):
+    _fake_measurements(monkeypatch)
+
+    def runner(cmd):
+        with open(cmd[-1], 'wb') as f:
+            f.write(b'\0' * 100)
+
+    def engine(source, name, ext, cuts, outdir):
+        piece = os.path.join(outdir, 'tramo.mp4')
+        cutVideo.run_ffmpeg(['ffmpeg', '-i', source, piece])
+        cutVideo.run_ffmpeg(['ffmpeg', '-i', piece, os.path.join(outdir, f'{name}.{ext}')])
+        os.remove(piece)
+
+    cutVideo.set_runner(runner)
+    try:
+        workdir = tmp_path / 'trabajo'
+        workdir.mkdir()
+        assert benchmark_cortes.run_engine(engine, 'fuente.mp4', [(0, 1000)], str(workdir))['bytes_written'] == 200
+    finally:
+        cutVideo.set_runner(None)
+    assert not os.path.exists(f'{workdir}-traza')
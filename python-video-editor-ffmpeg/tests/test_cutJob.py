@@ -0,0 +1,59 @@
+import pickle
+
+import pytest
+
+import cutJob
+from cutJob import CutJob
+
+@pytest.mark.parametrize('value, expected', [
+    ('00:01:08', 68000),
+    ('00:01:08.250', 68250),
+    ('01:08', 68000),
+    ('8.5', 8500),
+    (' 1:00:00 ', 3600000),
+])
+def test_parse_timestamp(value, expected):
+    assert cutJob.parse_timestamp(value) == expected
+
+@pytest.mark.parametrize('value', ['', '1::2', 'a:00', '00:60:00', '00:00:60', '-1', '1:2:3:4'])
+def test_parse_timestamp_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        cutJob.parse_timestamp(value)
+
+@pytest.mark.parametrize('value', ['inf', 'nan', '00:00:inf', '1e308', '99999999999999999999:00:00'])
+def test_parse_timestamp_rejects_non_finite_and_huge(value):
+    # Deben ser ValueError y no OverflowError, así la lectura del CSV solo descarta la fila
+    with pytest.raises(ValueError):
+        cutJob.parse_timestamp(value)
+
+def test_format_ms_round_trip():
+    assert cutJob.format_ms(3723004) == '01:02:03.004'
+    assert cutJob.parse_timestamp(cutJob.format_ms(3723004)) == 3723004
+
+def test_normalize_segments_sorts_merges_and_drops_empty():
+    segments = [(5000, 6000), (1000, 2000), (1500, 3000), (4000, 4000), (3000, 3500)]
+    assert cutJob.normalize_segments(segments) == [(1000, 3500), (5000, 6000)]
+
+def test_normalize_segments_tolerance():
+    assert cutJob.normalize_segments([(0, 1000), (1200, 2000)], tolerance_ms=200) == [(0, 2000)]
+    assert cutJob.normalize_segments([(0, 1000), (1201, 2000)], tolerance_ms=200) == [(0, 1000), (1201, 2000)]
+
+def test_from_cortes_and_pickle():
+    job = CutJob.from_cortes('123', '00:00:21|00:02:30|00:03:00|00:03:10', source='456')
+    assert job.pairs() == [(21000, 150000), (180000, 190000)]
+    assert job.source_id == '456' and not job.is_single
+    assert pickle.loads(pickle.dumps(job)) == job
+
+def test_from_cortes_rejects_odd_count_and_reversed_segments():
+    with pytest.raises(ValueError):
+        CutJob.from_cortes('1', '00:00:21|00:02:30|00:03:00')
+    with pytest.raises(ValueError):
+        CutJob.from_cortes('1', '00:02:30|00:00:21')
+
+def test_plan_cut():
+    single = CutJob('1', [(0, 5000)])
+    assert cutJob.plan_cut(single) == (cutJob.PLAN_SINGLE, [(0, 5000)])
+    assert cutJob.plan_cut(single, source_duration_ms=5000) == (cutJob.PLAN_COPY, [(0, 5000)])
+    assert cutJob.plan_cut(single, source_duration_ms=6000)[0] == cutJob.PLAN_SINGLE
+    multiple = CutJob('1', [(0, 1000), (2000, 3000)])
+    assert cutJob.plan_cut(multiple, source_duration_ms=3000) == (cutJob.PLAN_MULTIPLE, [(0, 1000), (2000, 3000)])
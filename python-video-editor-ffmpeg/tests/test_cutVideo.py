@@ -0,0 +1,53 @@
+import os
+from array import array
+
+import cutVideo
+import segmentCache
+from probe import ProbeInfo
+
+KEYFRAMES_US = array('q', [0, 1033333, 2066667, 3100000])
+
+def test_smart_pieces_copy_starts_on_exact_keyframe():
+    # El tramo recodificado termina antes del fotograma clave de 1.0333 s y la copia arranca en él
+    assert cutVideo._smart_pieces([(500, 1900)], KEYFRAMES_US) == [(500, 1033, True), (1034, 1900, False)]
+
+def test_smart_pieces_start_on_keyframe_is_copied():
+    assert cutVideo._smart_pieces([(0, 900), (3100, 3500)], KEYFRAMES_US) == [(0, 900, False), (3100, 3500, False)]
+
+def test_smart_pieces_without_keyframe_inside_is_reencoded():
+    assert cutVideo._smart_pieces([(1100, 2000), (3200, 3500)], KEYFRAMES_US) == [(1100, 2000, True), (3200, 3500, True)]
+
+def _video(profile: str) -> ProbeInfo:
+    return ProbeInfo(4000, KEYFRAMES_US, [{'codec_type': 'video', 'codec_name': 'h264', 'profile': profile}])
+
+def test_encoder_args_maps_h264_profiles_to_x264():
+    args = cutVideo._encoder_args(_video('Constrained Baseline'))
+    assert args[args.index('-profile:v') + 1] == 'baseline'
+    args = cutVideo._encoder_args(_video('High 10'))
+    assert args[args.index('-profile:v') + 1] == 'high10'
+
+def test_encoder_args_skips_unknown_profile():
+    assert '-profile:v' not in cutVideo._encoder_args(_video('Extended'))
+
+def test_unconfigured_segment_cache_is_not_used(tmp_path, monkeypatch):
+    # Sin segmentCache.configure cada corte lanza sus ffmpeg y no se crea ninguna caché
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(segmentCache, '_root', None)
+    source = tmp_path / 'fuente.mp4'
+    source.write_bytes(b'video' * 100)
+    calls = []
+
+    def runner(cmd):
+        calls.append(cmd)
+        with open(cmd[-1], 'wb') as f:
+            f.write(b'salida')
+
+    cutVideo.set_runner(runner)
+    try:
+        for workdir in ('uno', 'dos'):
+            os.mkdir(tmp_path / workdir)
+            cutVideo.cutMultipleVideo(str(source), '1', 'mp4', [(0, 1000), (2000, 3000)], str(tmp_path / workdir))
+    finally:
+        cutVideo.set_runner(None)
+    assert len(calls) == 6
+    assert sorted(os.listdir(tmp_path)) == ['dos', 'fuente.mp4', 'uno']
@@ -0,0 +1,130 @@
+import pytest
+
+import jobLeases
+import manifest
+from cutJob import CutJob
+from jobLeases import LeaseTable
+from manifest import Manifest
+
+class _Clock:
+    # Reloj manual para vencer préstamos sin esperar
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(jobLeases, 'time', fake)
+    return fake
+
+@pytest.fixture
+def tables(tmp_path, clock):
+    path = str(tmp_path / 'trabajos.sqlite3')
+    opened = [LeaseTable(path, node=node, lease_seconds=60, poll_seconds=1) for node in ('a', 'b')]
+    yield opened
+    for table in opened:
+        table.close()
+
+def _jobs(*ids):
+    return [CutJob(id, [(0, 1000)]) for id in ids]
+
+def test_claim_in_priority_order_and_once(tables):
+    a, b = tables
+    assert a.seed(_jobs('1', '2')) == 2
+    assert b.seed(_jobs('1', '2')) == 0
+    assert a.claim() == '1'
+    assert b.claim() == '2'
+    assert a.claim() is None and b.claim() is None
+
+def test_expired_lease_is_reclaimed_and_old_owner_cannot_complete(tables, clock):
+    a, b = tables
+    a.seed(_jobs('1'))
+    assert a.claim() == '1'
+    assert b.claim() is None
+    clock.now += 61
+    assert b.claim() == '1'
+    assert not a.complete('1', manifest.STATE_DONE)
+    assert b.complete('1', manifest.STATE_DONE)
+    assert a.counts() == {manifest.STATE_DONE: 1}
+
+def test_renew_keeps_the_lease(tables, clock):
+    a, b = tables
+    a.seed(_jobs('1'))
+    a.claim()
+    clock.now += 50
+    a.renew()
+    clock.now += 50
+    assert b.claim() is None
+    clock.now += 11
+    assert b.claim() == '1'
+
+def test_abandoned_after_max_attempts(tables, clock):
+    a, b = tables
+    a.seed(_jobs('1'))
+    for _ in range(jobLeases.MAX_ATTEMPTS):
+        assert a.claim() == '1'
+        clock.now += 61
+    assert b.claim() is None
+    assert a.counts() == {manifest.STATE_ERROR: 1}
+
+def test_failed_jobs_are_reset_by_seed(tables):
+    a, _ = tables
+    a.seed(_jobs('1'))
+    a.claim()
+    a.complete('1', manifest.STATE_ERROR)
+    assert a.seed(_jobs('1')) == 1
+    assert a.claim() == '1'
+
+def test_job_without_local_item_is_released_not_done(tables, tmp_path):
+    a, b = tables
+    a.seed(_jobs('1', '2'))
+    job_manifest = Manifest(str(tmp_path / 'manifiesto.sqlite3'))
+    try:
+        # Este nodo solo tiene pendiente el 2: el 1 se devuelve y lo toma el otro nodo
+        claimed = list(a.claimed_jobs({'2': (_jobs('2')[0], True)}, job_manifest))
+    finally:
+        job_manifest.close()
+    assert [job.id for job, _ in claimed] == ['2']
+    assert a.counts()[jobLeases.STATE_PENDING] == 1
+    assert a.claim() is None
+    assert b.claim() == '1'
+
+def test_wait_for_others_ignores_released_jobs(tables):
+    a, _ = tables
+    a.seed(_jobs('1'))
+    a.claim()
+    a.release('1')
+    assert a.wait_for_others() is False
+
+def _claim_all(path: str, node: str, queue) -> None:
+    table = LeaseTable(path, node=node)
+    claimed = []
+    while True:
+        id = table.claim()
+        if id is None:
+            break
+        claimed.append(id)
+        table.complete(id, manifest.STATE_DONE)
+    table.close()
+    queue.put(claimed)
+
+def test_concurrent_nodes_claim_each_job_once(tmp_path):
+    import multiprocessing
+    path = str(tmp_path / 'trabajos.sqlite3')
+    seeder = LeaseTable(path)
+    seeder.seed(_jobs(*(str(i) for i in range(200))))
+    seeder.close()
+    queue = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_claim_all, args=(path, f'nodo{i}', queue)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    claimed = [id for _ in workers for id in queue.get(timeout=60)]
+    for worker in workers:
+        worker.join()
+    assert sorted(claimed, key=int) == [str(i) for i in range(200)]
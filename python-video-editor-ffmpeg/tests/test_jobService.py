@@ -0,0 +1,66 @@
+import time
+
+import manifest
+import jobService
+import main_procesamiento_paralelo as parallel
+
+def _service(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(jobService, 'CONSUMER_RESTART_SECONDS', 0.01)
+    for name in ('entrada', 'salida'):
+        (tmp_path / name).mkdir()
+    return jobService.JobService(str(tmp_path / 'entrada'), str(tmp_path / 'salida'), 1)
+
+def _wait(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_consumer_error_fails_running_job_and_restarts(tmp_path, monkeypatch):
+    calls = []
+
+    def process_stream(items, *args, **kwargs):
+        calls.append(1)
+        for item in items:
+            if item is parallel.scheduler.IDLE:
+                continue
+            (job, _), _ = item
+            if len(calls) == 1:
+                raise RuntimeError('pool roto')
+            yield {'id': job.id, 'state': manifest.STATE_DONE, 'cuts_hash': manifest.cuts_hash(job)}
+
+    monkeypatch.setattr(parallel, 'process_stream', process_stream)
+    service = _service(tmp_path, monkeypatch)
+    service.start()
+    try:
+        service.submit({'id': '1', 'cortes': '00:00:01|00:00:05'})
+        _wait(lambda: service.status('1')['estado'] == manifest.STATE_ERROR)
+        assert 'pool roto' in service.status('1')['error']
+        assert service.manifest.get('1')['state'] == manifest.STATE_ERROR
+
+        # El consumidor volvió a arrancar y procesa los trabajos siguientes
+        service.submit({'id': '2', 'cortes': '00:00:01|00:00:05'})
+        _wait(lambda: service.status('2')['estado'] == manifest.STATE_DONE)
+        assert service.health()['estado'] == jobService.HEALTH_OK
+    finally:
+        service.close()
+
+def test_health_reports_dead_consumer(tmp_path, monkeypatch):
+    def process_stream(items, *args, **kwargs):
+        raise RuntimeError('pool roto')
+        yield
+
+    monkeypatch.setattr(parallel, 'process_stream', process_stream)
+    service = _service(tmp_path, monkeypatch)
+    service.start()
+    try:
+        _wait(lambda: not service.is_alive())
+        health = service.health()
+        assert health['estado'] == jobService.HEALTH_DOWN
+        assert health['reinicios'] > jobService.MAX_CONSUMER_RESTARTS
+        assert 'pool roto' in health['ultimo_error']
+        code, _ = service.submit({'id': '1', 'cortes': '00:00:01|00:00:05'})
+        assert code == 503
+    finally:
+        service.close()
@@ -0,0 +1,75 @@
+import itertools
+
+import manifest
+import main_procesamiento_paralelo as parallel
+from cutJob import CutJob
+from manifest import Manifest
+
+def test_missing_input_is_recorded_as_job_error(tmp_path):
+    # El video estaba en el índice pero ya no existe al cortarlo
+    job = CutJob('1', [(0, 1000)])
+    missing = str(tmp_path / 'entrada' / '1.mp4')
+    result = parallel.process_video((job, str(tmp_path / 'entrada'), str(tmp_path), False, missing))
+    assert result['state'] == manifest.STATE_ERROR
+    assert result['id'] == '1' and result['error']
+
+def test_missing_input_fails_every_job_of_a_group(tmp_path):
+    group = [(CutJob('1', [(0, 1000)], source='9'), False), (CutJob('2', [(0, 2000)], source='9'), False)]
+    missing = str(tmp_path / 'entrada' / '9.mp4')
+    results = parallel.process_group((group, str(tmp_path / 'entrada'), str(tmp_path), missing))
+    assert [r['state'] for r in results] == [manifest.STATE_ERROR, manifest.STATE_ERROR]
+
+class _FakeWatcher:
+    # Cada poll entrega la siguiente tanda de videos listos
+    def __init__(self, polls):
+        self.polls = list(polls)
+        self.wanted = lambda id: True
+
+    def is_settling(self, id):
+        return False
+
+    def poll(self, timeout=1.0):
+        ready = self.polls.pop(0) if self.polls else []
+        return [(id, entry) for id, entry in ready if self.wanted(id)]
+
+def _entry(id, size):
+    return {'path': f'/entrada/{id}.mp4', 'size': size, 'mtime': 1}
+
+def test_watch_until_complete_stops_when_every_video_arrived():
+    items = [(CutJob('1', [(0, 1000)]), True), (CutJob('2', [(0, 1000)]), True)]
+    watcher = _FakeWatcher([[], [('2', _entry('2', 10))]])
+    index = {'1': _entry('1', 10)}
+    out = list(parallel.watch_jobs(items, index, watcher, until_complete=True))
+    assert [item if item is parallel.scheduler.IDLE else item[0][0].id for item in out] == \
+        ['1', parallel.scheduler.IDLE, '2']
+
+def test_watch_keeps_going_and_recuts_new_versions():
+    items = [(CutJob('1', [(0, 1000)]), True)]
+    # Primero el mismo archivo (sin cambios) y después otra versión del video
+    watcher = _FakeWatcher([[('1', _entry('1', 10))], [('1', _entry('1', 20))]])
+    index = {'1': _entry('1', 10)}
+    out = [item for item in itertools.islice(parallel.watch_jobs(items, index, watcher), 5)
+           if item is not parallel.scheduler.IDLE]
+    assert [(job.id, adopt) for (job, adopt), _ in out] == [('1', True), ('1', False)]
+    assert index['1']['size'] == 20
+
+def test_pending_jobs_checks_outputs_against_the_snapshot(tmp_path, monkeypatch):
+    ok, resized = CutJob('1', [(0, 1000)]), CutJob('2', [(0, 1000)])
+    job_manifest = Manifest.for_output(str(tmp_path))
+    try:
+        for job in (ok, resized):
+            (tmp_path / f'{job.id}.mp4').write_bytes(b'\0' * 100)
+            job_manifest.record_result({'id': job.id, 'state': manifest.STATE_DONE,
+                                        'cuts_hash': manifest.cuts_hash(job), 'output_size': 100})
+        (tmp_path / '2.mp4').write_bytes(b'\0' * 50)
+
+        def no_queries(*args):
+            raise AssertionError('una consulta por fila')
+
+        monkeypatch.setattr(job_manifest, 'get', no_queries)
+        counts = {'nuevos': 0, 'cambiados': 0, 'reintentos': 0, 'sin_cambios': 0}
+        pending = list(parallel.pending_jobs([ok, resized], str(tmp_path), job_manifest, counts, mark_running=False))
+    finally:
+        job_manifest.close()
+    assert [job.id for job, _ in pending] == ['2']
+    assert counts['sin_cambios'] == 1 and counts['reintentos'] == 1
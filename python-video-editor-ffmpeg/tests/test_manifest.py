@@ -0,0 +1,45 @@
+import manifest
+from cutJob import CutJob
+from manifest import Manifest
+
+def _done(job, output_path, size):
+    return {'id': job.id, 'state': manifest.STATE_DONE, 'cuts_hash': manifest.cuts_hash(job),
+            'output_path': output_path, 'output_size': size}
+
+def test_cuts_hash_changes_with_cuts_and_source():
+    job = CutJob('1', [(0, 1000)])
+    assert manifest.cuts_hash(job) == manifest.cuts_hash(CutJob('1', [(0, 1000)]))
+    assert manifest.cuts_hash(job) != manifest.cuts_hash(CutJob('1', [(0, 2000)]))
+    assert manifest.cuts_hash(job) != manifest.cuts_hash(CutJob('1', [(0, 1000)], source='9'))
+
+def test_verified_only_with_same_cuts_and_output_size(tmp_path):
+    output_path = tmp_path / '1.mp4'
+    output_path.write_bytes(b'\0' * 100)
+    job = CutJob('1', [(0, 1000)])
+    m = Manifest.for_output(str(tmp_path))
+    try:
+        m.mark_running(job)
+        assert not m.is_verified(job, str(output_path))
+        m.record_result(_done(job, str(output_path), 100))
+        assert m.is_verified(job, str(output_path))
+        assert not m.is_verified(CutJob('1', [(0, 2000)]), str(output_path))
+        output_path.write_bytes(b'\0' * 50)
+        assert not m.is_verified(job, str(output_path))
+    finally:
+        m.close()
+
+def test_state_survives_reopening(tmp_path):
+    job = CutJob('1', [(0, 1000)])
+    m = Manifest.for_output(str(tmp_path))
+    m.record_result({'id': '1', 'state': manifest.STATE_ERROR, 'cuts_hash': manifest.cuts_hash(job), 'error': 'x'})
+    m.close()
+    m = Manifest.for_output(str(tmp_path))
+    try:
+        assert m.snapshot() == {'1': (manifest.STATE_ERROR, manifest.cuts_hash(job), None)}
+        # Volver a enviarlo borra el error anterior
+        m.mark_running(job)
+        record = m.get('1')
+        assert record['state'] == manifest.STATE_RUNNING and record['error'] is None
+        assert m.get('2') is None
+    finally:
+        m.close()
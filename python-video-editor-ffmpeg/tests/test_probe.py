@@ -0,0 +1,51 @@
+from array import array
+
+import probe
+from probe import ProbeInfo
+
+# GOP de 31 fotogramas a 30 fps (1/90000): los fotogramas clave no caen en milisegundos exactos
+KEYFRAMES_US = array('q', [0, 1033333, 2066667, 3100000])
+
+def _info(duration_ms: int = 4000) -> ProbeInfo:
+    return ProbeInfo(duration_ms, KEYFRAMES_US, [])
+
+def test_seek_ms_rounds_up_for_input_seek():
+    # -ss 1.033 de entrada arrancaría en el fotograma clave de 0 s
+    assert probe.seek_ms(1033333) == 1034
+    assert probe.seek_ms(2066667) == 2067
+    assert probe.seek_ms(3100000) == 3100
+
+def test_seek_ms_rounds_down_for_output_seek():
+    # -ss 1.034 de salida descartaría el fotograma clave de 1.0333 s
+    assert probe.seek_ms(1033333, output_seek=True) == 1033
+    assert probe.seek_ms(2066667, output_seek=True) == 2066
+    assert probe.seek_ms(3100000, output_seek=True) == 3100
+
+def test_keyframe_before_and_after():
+    assert probe.keyframe_before(KEYFRAMES_US, 1500000) == 1033333
+    assert probe.keyframe_before(KEYFRAMES_US, 1033333) == 1033333
+    assert probe.keyframe_after(KEYFRAMES_US, 1033334) == 2066667
+    assert probe.keyframe_after(KEYFRAMES_US, 3100001) is None
+    assert probe.keyframe_before(array('q'), 1000) == 0
+
+def test_snap_segments_input_seek():
+    assert probe.snap_segments([(1500, 1900), (2500, 3000)], _info()) == [(1034, 1900), (2067, 3000)]
+
+def test_snap_segments_output_seek():
+    assert probe.snap_segments([(1500, 1900), (2500, 3000)], _info(), output_seek=True) == [(1033, 1900), (2066, 3000)]
+
+def test_snap_segments_clamps_end_and_merges_overlaps():
+    # Ambos inicios caen en el fotograma de 1.0333 s y el final pasa de la duración
+    assert probe.snap_segments([(1200, 1600), (1700, 9000)], _info()) == [(1034, 4000)]
+
+def test_snap_segments_without_keyframes_keeps_starts():
+    info = ProbeInfo(0, array('q'), [])
+    assert probe.snap_segments([(1500, 1900)], info) == [(1500, 1900)]
+
+def test_probe_info_json_round_trip():
+    info = ProbeInfo(4000, KEYFRAMES_US, [{'codec_type': 'video'}])
+    data = info.to_json()
+    assert data['version'] == probe.PROBE_VERSION
+    copy = ProbeInfo.from_json(data)
+    assert list(copy.keyframes) == list(KEYFRAMES_US)
+    assert copy.duration_ms == 4000 and copy.streams == info.streams
@@ -0,0 +1,37 @@
+import progress
+from progress import ProgressParser
+
+def _block(parser, **fields):
+    for key, value in fields.items():
+        assert parser.feed(f'{key}={value}\n') is None
+    return parser.feed('progress=continue\n')
+
+def test_reports_delta_since_previous_block():
+    parser = ProgressParser()
+    assert _block(parser, out_time_us=2000000, total_size=1000) == (2.0, 1000)
+    assert _block(parser, out_time_us=5000000, total_size=1500) == (3.0, 500)
+
+def test_unknown_values_keep_previous_totals():
+    # Al arrancar ffmpeg informa N/A
+    parser = ProgressParser()
+    assert _block(parser, out_time_us='N/A', total_size='N/A') == (0.0, 0)
+    assert _block(parser, out_time_us=1000000, total_size=10) == (1.0, 10)
+    assert _block(parser, out_time_us='N/A', total_size='N/A') == (0.0, 0)
+
+def test_counters_never_go_backwards():
+    parser = ProgressParser()
+    _block(parser, out_time_us=3000000, total_size=300)
+    assert _block(parser, out_time_us=1000000, total_size=100) == (0.0, 0)
+    assert _block(parser, out_time_us=4000000, total_size=400) == (1.0, 100)
+
+def test_join_only_counts_bytes():
+    parser = ProgressParser(count_media=False)
+    assert _block(parser, out_time_us=2000000, total_size=100) == (0.0, 100)
+
+def test_lines_without_value_are_ignored():
+    assert ProgressParser().feed('\n') is None
+
+def test_with_progress_keeps_output_last():
+    cmd = progress.with_progress(['ffmpeg', '-i', 'in.mp4', 'out.mp4'])
+    assert cmd[0] == 'ffmpeg' and cmd[-1] == 'out.mp4'
+    assert cmd[1:1 + len(progress.PROGRESS_ARGS)] == progress.PROGRESS_ARGS
@@ -0,0 +1,69 @@
+import os
+import logging
+import multiprocessing
+
+import runLog
+from runLog import RunLog
+
+def _log_lines(count: int) -> int:
+    for i in range(count):
+        runLog.errors.info(f'ID {i} ERROR')
+    return count
+
+def _worker(log_queue, count: int) -> None:
+    runLog.configure_worker(log_queue)
+    runLog.flushed(_log_lines)(count)
+    # Como Pool.terminate: el proceso termina sin pasar por atexit ni por el hilo de los lotes
+    os._exit(0)
+
+def test_worker_batches_reach_the_files_in_order(tmp_path):
+    log = RunLog(str(tmp_path / 'nf.txt'), str(tmp_path / 'err.txt'), str(tmp_path / 'res.jsonl'))
+    log.start()
+    try:
+        count = runLog.WORKER_BATCH_RECORDS * 2 + 5
+        process = multiprocessing.get_context('fork').Process(target=_worker, args=(log.queue, count))
+        process.start()
+        process.join()
+    finally:
+        log.close()
+    with open(tmp_path / 'err.txt', encoding='utf-8') as f:
+        assert f.read().splitlines() == [f'ID {i} ERROR' for i in range(count)]
+    assert not os.path.exists(tmp_path / 'nf.txt')
+
+def test_main_process_sends_each_record_right_away(tmp_path):
+    log = RunLog(str(tmp_path / 'nf.txt'), str(tmp_path / 'err.txt'), str(tmp_path / 'res.jsonl'))
+    log.start()
+    try:
+        # El proceso principal no junta registros: cada uno va a la cola al emitirse
+        assert [handler.batch_records for handler in logging.getLogger().handlers] == [1]
+        RunLog.record_result({'id': '1', 'state': 'listo'})
+    finally:
+        log.close()
+    with open(tmp_path / 'res.jsonl', encoding='utf-8') as f:
+        assert '"id": "1"' in f.read()
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+def test_file_records_stay_out_of_the_console(tmp_path):
+    console = _Collect()
+    root = logging.getLogger()
+    root.addHandler(console)
+    try:
+        log = RunLog(str(tmp_path / 'nf.txt'), str(tmp_path / 'err.txt'), str(tmp_path / 'res.jsonl'))
+        log.start()
+        try:
+            logging.warning('a la consola')
+            runLog.errors.info('ID 1 ERROR')
+        finally:
+            log.close()
+    finally:
+        root.removeHandler(console)
+    assert console.messages == ['a la consola']
+    with open(tmp_path / 'err.txt', encoding='utf-8') as f:
+        assert f.read() == 'ID 1 ERROR\n'
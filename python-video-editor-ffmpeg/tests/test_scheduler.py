@@ -0,0 +1,55 @@
+from multiprocessing.pool import ThreadPool
+
+import pytest
+
+import scheduler
+
+def _square(x):
+    return x * x
+
+def _fail(x):
+    raise ValueError(f'falló {x}')
+
+def test_never_more_than_max_pending_in_flight():
+    pulled = []
+
+    def items():
+        for i in range(20):
+            pulled.append(i)
+            yield i
+
+    results = []
+    with ThreadPool(4) as pool:
+        for result in scheduler.imap_unordered_bounded(pool, _square, items(), 3):
+            # Enviados y todavía sin entregar: como mucho el límite
+            assert len(pulled) - len(results) <= 3
+            results.append(result)
+    assert sorted(results) == [i * i for i in range(20)]
+
+def test_callable_limit_and_followups():
+    limits = []
+
+    def limit():
+        limits.append(1)
+        return 2
+
+    with ThreadPool(2) as pool:
+        # Cada resultado par genera un trabajo más, que se envía antes que los del iterable
+        results = list(scheduler.imap_unordered_bounded(
+            pool, _square, [2, 3], limit, followups=lambda r: [r + 1] if r % 2 == 0 else []))
+    assert sorted(results) == [4, 9, 25]
+    assert limits
+
+def test_idle_does_not_block_results():
+    def items():
+        yield 1
+        yield scheduler.IDLE
+        yield 2
+
+    with ThreadPool(1) as pool:
+        assert sorted(scheduler.imap_unordered_bounded(pool, _square, items(), 4)) == [1, 4]
+
+def test_worker_error_is_raised():
+    with ThreadPool(1) as pool:
+        with pytest.raises(ValueError, match='falló 1'):
+            list(scheduler.imap_unordered_bounded(pool, _fail, [1], 1))
@@ -0,0 +1,64 @@
+import cutVideo
+import schedulingPolicy
+from cutJob import CutJob
+from probe import ProbeInfo
+
+MB = 1024 * 1024
+
+def _index(sizes):
+    return {id: {'path': f'/videos/{id}.mp4', 'size': size} for id, size in sizes.items()}
+
+def _fake_probe(monkeypatch, duration_ms=60000):
+    monkeypatch.setattr(schedulingPolicy.probe, 'probe_source', lambda path: ProbeInfo(duration_ms, None, []))
+
+def test_estimate_cost_grows_with_bytes_segments_and_reencode():
+    info = ProbeInfo(60000, None, [])
+    short = CutJob('1', [(0, 10000)])
+    long = CutJob('2', [(0, 40000)])
+    split = CutJob('3', [(0, 5000), (20000, 25000)])
+    assert schedulingPolicy.estimate_cost(long, 600 * MB, info) > schedulingPolicy.estimate_cost(short, 600 * MB, info)
+    assert schedulingPolicy.estimate_cost(split, 600 * MB, info) > schedulingPolicy.estimate_cost(short, 600 * MB, info)
+    assert (schedulingPolicy.estimate_cost(short, 600 * MB, info, cutVideo.MODE_REENCODE)
+            > schedulingPolicy.estimate_cost(short, 600 * MB, info))
+
+def test_estimate_cost_without_duration_reads_whole_file():
+    job = CutJob('1', [(0, 10000)])
+    whole = schedulingPolicy.estimate_cost(job, 600 * MB, None)
+    assert whole == 600 * MB / schedulingPolicy.COPY_BYTES_PER_S + schedulingPolicy.SEGMENT_OVERHEAD_S
+
+def test_order_jobs_longest_first(monkeypatch):
+    _fake_probe(monkeypatch)
+    index = _index({'1': 10 * MB, '2': 900 * MB, '3': 200 * MB})
+    items = [(CutJob(id, [(0, 30000)]), False) for id in ('1', '2', '3')]
+    ordered = schedulingPolicy.order_jobs(items, index, schedulingPolicy.POLICY_LONGEST_FIRST)
+    assert [job.id for job, _ in ordered] == ['2', '3', '1']
+    ordered = schedulingPolicy.order_jobs(items, index, schedulingPolicy.POLICY_SHORTEST_FIRST)
+    assert [job.id for job, _ in ordered] == ['1', '3', '2']
+
+def test_order_jobs_csv_keeps_order_without_probing(monkeypatch):
+    def fail(path):
+        raise AssertionError('no debería analizar videos')
+
+    monkeypatch.setattr(schedulingPolicy.probe, 'probe_source', fail)
+    items = [(CutJob(id, [(0, 1000)]), False) for id in ('3', '1', '2')]
+    assert schedulingPolicy.order_jobs(items, _index({'1': 1, '2': 2, '3': 3})) is items
+
+def test_order_jobs_missing_video_costs_nothing(monkeypatch):
+    _fake_probe(monkeypatch)
+    items = [(CutJob('1', [(0, 30000)]), False), (CutJob('9', [(0, 30000)]), False)]
+    ordered = schedulingPolicy.order_jobs(items, _index({'1': 100 * MB}), schedulingPolicy.POLICY_LONGEST_FIRST)
+    assert [job.id for job, _ in ordered] == ['1', '9']
+
+def test_group_by_source_joins_rows_with_same_source():
+    index = _index({'9': 100 * MB, '5': 50 * MB})
+    items = [
+        (CutJob('1', [(0, 1000)], source='9'), False),
+        (CutJob('5', [(0, 1000)]), False),
+        (CutJob('2', [(2000, 3000)], source='9'), True),
+        (CutJob('7', [(0, 1000)]), False),
+        (CutJob('3', [(4000, 5000)], source='9'), False),
+    ]
+    groups = schedulingPolicy.group_by_source(items, index)
+    # Los grupos quedan en el orden de su primer trabajo; el ID sin video queda solo
+    assert [[job.id for job, _ in group] for group in groups] == [['1', '2', '3'], ['5'], ['7']]
+    assert [resume for _, resume in groups[0]] == [False, True, False]
@@ -0,0 +1,35 @@
+import os
+
+import segmentCache
+
+def _write(path: str, data: bytes) -> str:
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+def test_store_and_fetch_round_trip(tmp_path):
+    segmentCache.configure(str(tmp_path / 'cache'))
+    try:
+        source = _write(str(tmp_path / 'fuente.mp4'), b'video' * 100)
+        piece = _write(str(tmp_path / 'tramo.mp4'), b'tramo')
+        segmentCache.store(source, 1000, 2000, ['-c', 'copy'], piece)
+        target = str(tmp_path / 'otro.mp4')
+        assert segmentCache.fetch(source, 1000, 2000, ['-c', 'copy'], target)
+        with open(target, 'rb') as f:
+            assert f.read() == b'tramo'
+        assert not segmentCache.fetch(source, 1000, 2001, ['-c', 'copy'], str(tmp_path / 'falta.mp4'))
+    finally:
+        segmentCache.configure(None)
+
+def test_mode_is_part_of_the_key(tmp_path):
+    # Un tramo de búsqueda de salida no sirve para el corte con -ss de entrada ni al revés
+    segmentCache.configure(str(tmp_path / 'cache'))
+    try:
+        source = _write(str(tmp_path / 'fuente.mp4'), b'video' * 100)
+        piece = _write(str(tmp_path / 'tramo.mp4'), b'tramo')
+        segmentCache.store(source, 1000, 2000, ['-c', 'copy'], piece, 'ss-salida')
+        assert not segmentCache.fetch(source, 1000, 2000, ['-c', 'copy'], str(tmp_path / 'a.mp4'))
+        assert segmentCache.fetch(source, 1000, 2000, ['-c', 'copy'], str(tmp_path / 'b.mp4'), 'ss-salida')
+        assert not os.path.exists(str(tmp_path / 'a.mp4'))
+    finally:
+        segmentCache.configure(None)
@@ -0,0 +1,48 @@
+import os
+
+import manifest
+import main_procesamiento_paralelo as parallel
+from cutJob import CutJob
+from staging import StagingArea
+
+def _write(path: str, size: int) -> str:
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    return path
+
+def test_budget_uses_current_size_not_index_size(tmp_path):
+    source = _write(str(tmp_path / '1.mp4'), 1000)
+    # Índice de cuando el video recién empezaba a copiarse
+    index = {'1': {'path': source, 'size': 10, 'mtime': 0}}
+    area = StagingArea(str(tmp_path / 'local'), index, budget_bytes=500, lookahead=1)
+    try:
+        assert list(area.stage_in([(CutJob('1', [(0, 1000)]), False)]))[0][1] is None
+    finally:
+        area.close()
+
+def test_stage_in_copies_and_records_original(tmp_path):
+    source = _write(str(tmp_path / '1.mp4'), 1000)
+    index = {'1': {'path': source, 'size': 10, 'mtime': 0}}
+    area = StagingArea(str(tmp_path / 'local'), index, budget_bytes=5000, lookahead=1)
+    try:
+        [(_, local_path)] = list(area.stage_in([(CutJob('1', [(0, 1000)]), False)]))
+        assert os.path.getsize(local_path) == 1000
+        assert area.release('1')['size'] == 1000
+    finally:
+        area.close()
+
+def test_existing_output_is_adopted_from_final_folder(tmp_path, monkeypatch):
+    output_folder = tmp_path / 'salida'
+    output_folder.mkdir()
+    final_path = _write(str(output_folder / '1.mp4'), 100)
+    area = StagingArea(str(tmp_path / 'local'), {}, budget_bytes=5000, lookahead=1)
+    monkeypatch.setattr(parallel, 'is_valid_output', lambda path: True)
+    monkeypatch.setitem(parallel._settings, 'adopt_folder', str(output_folder))
+    try:
+        result = parallel._new_result(CutJob('1', [(0, 1000)]), area.out_dir, adopt_existing=True)
+        assert result['state'] == manifest.STATE_DONE and result['output_path'] == final_path
+        # Ya está en la carpeta definitiva: stage_out no la mueve ni la pierde
+        [moved] = list(area.stage_out([result], str(output_folder)))
+        assert moved['state'] == manifest.STATE_DONE and os.path.getsize(final_path) == 100
+    finally:
+        area.close()
@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Etapas que se miden
+STAGE_CSV = 'csv'
+STAGE_LOOKUP = 'busqueda'
+STAGE_PROBE = 'probe'
+STAGE_CUT = 'corte'
+STAGE_CONCAT = 'union'
+STAGE_STAGE_IN = 'copia_entrada'
+STAGE_STAGE_OUT = 'copia_salida'
+STAGE_VIDEO = 'video'
+
+# Carpeta donde cada proceso escribe sus eventos; None desactiva la medición
+_trace_dir: Optional[str] = None
+_file = None
+_file_pid = 0
+_lock = threading.Lock()
+
+def configure(trace_dir: Optional[str]) -> None:
+    """
+    Activa la medición de etapas, escribiendo los eventos en una carpeta.
+
+    Cada proceso escribe su propio archivo JSONL, así los procesos del pool no necesitan
+    devolver los eventos al principal.
+
+    Args:
+        trace_dir (Optional[str]): Carpeta de eventos; None desactiva la medición.
+    """
+    global _trace_dir, _file
+    if trace_dir is not None:
+        os.makedirs(trace_dir, exist_ok=True)
+    with _lock:
+        # Los eventos siguientes van a un archivo de la carpeta nueva
+        if _file is not None and _file_pid == os.getpid():
+            _file.close()
+        _file = None
+        _trace_dir = trace_dir
+
+def enabled() -> bool:
+    return _trace_dir is not None
+
+def _write(event: Dict[str, Any]) -> None:
+    global _file, _file_pid
+    line = json.dumps(event, ensure_ascii=False) + '\n'
+    with _lock:
+        # Un proceso hijo hereda el archivo del padre; abre el suyo
+        if _file is None or _file_pid != os.getpid():
+            _file = open(os.path.join(_trace_dir, f'eventos-{os.getpid()}.jsonl'), 'a', encoding='utf-8')
+            _file_pid = os.getpid()
+        _file.write(line)
+        _file.flush()
+
+def record(stage: str, start_us: int, duration_us: int, **args: Any) -> None:
+    """
+    Registra una etapa ya medida.
+
+    Args:
+        stage (str): Etapa (STAGE_*).
+        start_us (int): Inicio en microsegundos desde epoch.
+        duration_us (int): Duración en microsegundos.
+        **args (Any): Datos de la etapa, por ejemplo 'id', 'bytes_in', 'bytes_out' o 'media_s'.
+    """
+    if _trace_dir is None:
+        return
+    _write({
+        'name': stage,
+        'cat': stage,
+        'ph': 'X',
+        'ts': start_us,
+        'dur': duration_us,
+        'pid': os.getpid(),
+        'tid': threading.get_ident(),
+        'args': {k: v for k, v in args.items() if v is not None},
+    })
+
+@contextmanager
+def span(stage: str, **args: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Mide la etapa que corre dentro del bloque.
+
+    El bloque recibe el diccionario de datos y puede completarlo, por ejemplo con los
+    bytes escritos cuando se conocen al terminar.
+
+    Args:
+        stage (str): Etapa (STAGE_*).
+        **args (Any): Datos iniciales de la etapa.
+
+    Yields:
+        Dict[str, Any]: Datos de la etapa.
+    """
+    if _trace_dir is None:
+        yield args
+        return
+    start_us = time.time_ns() // 1000
+    start = time.perf_counter()
+    try:
+        yield args
+    except BaseException as e:
+        args['error'] = type(e).__name__
+        raise
+    finally:
+        record(stage, start_us, round((time.perf_counter() - start) * 1e6), **args)
+
+def file_size(path: str) -> Optional[int]:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return None
+
+def load_events(trace_dir: str) -> List[Dict[str, Any]]:
+    """
+    Lee los eventos que escribieron todos los procesos.
+
+    Args:
+        trace_dir (str): Carpeta de eventos.
+
+    Returns:
+        List[Dict[str, Any]]: Eventos ordenados por inicio.
+    """
+    events = []
+    for filename in sorted(os.listdir(trace_dir)):
+        if not filename.endswith('.jsonl'):
+            continue
+        with open(os.path.join(trace_dir, filename), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    # Línea cortada por un proceso que se interrumpió
+                    continue
+    events.sort(key=lambda e: e['ts'])
+    return events
+
+def export_chrome_trace(events: List[Dict[str, Any]], out_path: str) -> None:
+    """
+    Guarda los eventos en el formato JSON de chrome://tracing y Perfetto.
+
+    Args:
+        events (List[Dict[str, Any]]): Eventos de load_events.
+        out_path (str): Archivo de salida.
+    """
+    names = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': f'proceso {pid}'}}
+             for pid in sorted({e['pid'] for e in events})]
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': names + events, 'displayTimeUnit': 'ms'}, f)
+
+def _percentile(values: List[float], fraction: float) -> float:
+    index = min(int(round(fraction * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+def summarize(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Resume los eventos por etapa.
+
+    Args:
+        events (List[Dict[str, Any]]): Eventos de load_events.
+
+    Returns:
+        List[Dict[str, Any]]: Por etapa: 'stage', 'count', 'total_s', 'p50_s', 'p95_s',
+        'bytes_in', 'bytes_out' y 'media_s'.
+    """
+    stages: Dict[str, List[Dict[str, Any]]] = {}
+    for event in events:
+        stages.setdefault(event['name'], []).append(event)
+    rows = []
+    for stage, stage_events in stages.items():
+        durations = sorted(e['dur'] / 1e6 for e in stage_events)
+        rows.append({
+            'stage': stage,
+            'count': len(durations),
+            'total_s': sum(durations),
+            'p50_s': _percentile(durations, 0.5),
+            'p95_s': _percentile(durations, 0.95),
+            'bytes_in': sum(e['args'].get('bytes_in', 0) for e in stage_events),
+            'bytes_out': sum(e['args'].get('bytes_out', 0) for e in stage_events),
+            'media_s': sum(e['args'].get('media_s', 0) for e in stage_events),
+        })
+    rows.sort(key=lambda r: r['total_s'], reverse=True)
+    return rows
+
+def format_summary(rows: List[Dict[str, Any]]) -> str:
+    """
+    Arma la tabla de resumen para el log.
+
+    Args:
+        rows (List[Dict[str, Any]]): Filas de summarize.
+
+    Returns:
+        str: Tabla en texto.
+    """
+    lines = [f'{"etapa":<15}{"n":>7}{"total s":>11}{"p50 s":>9}{"p95 s":>9}{"MB entrada":>12}{"MB salida":>11}{"media s":>10}']
+    for r in rows:
+        lines.append(f'{r["stage"]:<15}{r["count"]:>7}{r["total_s"]:>11.1f}{r["p50_s"]:>9.2f}{r["p95_s"]:>9.2f}'
+                     f'{r["bytes_in"] / 1024 ** 2:>12.1f}{r["bytes_out"] / 1024 ** 2:>11.1f}{r["media_s"]:>10.1f}')
+    return '\n'.join(lines)
+
+def write_report(trace_dir: str) -> Tuple[str, str]:
+    """
+    Junta los eventos de una ejecución en un único archivo de Chrome trace y arma el resumen.
+
+    La carpeta de eventos se borra al terminar; el archivo queda junto a ella con extensión .json.
+
+    Args:
+        trace_dir (str): Carpeta de eventos pasada a configure.
+
+    Returns:
+        Tuple[str, str]: Ruta del archivo de Chrome trace y tabla de resumen por etapa.
+    """
+    events = load_events(trace_dir)
+    out_path = trace_dir.rstrip(os.sep) + '.json'
+    export_chrome_trace(events, out_path)
+    shutil.rmtree(trace_dir, ignore_errors=True)
+    return out_path, format_summary(summarize(events))